@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, Optional
 
 
 class Settings(BaseSettings):
@@ -15,6 +15,72 @@ class Settings(BaseSettings):
     app_name: str = "IIC Authentication API"
     debug: bool = True
     
+    # Ollama
+    ollama_base_url: str = "http://localhost:11434"
+    ollama_model: str = "llama3.2:1b"
+    # How long Ollama keeps the model loaded after each call ("30m", "24h"; "-1m" = forever)
+    ollama_keep_alive: str = "30m"
+    # Load the model (and prime its prompt cache) when the server starts
+    ollama_warmup_on_startup: bool = True
+    
+    # Health probes
+    health_ping_ttl_seconds: float = 10.0
+    health_deep_check_interval_seconds: float = 0.0  # 0 disables the background deep check
+    
+    # Build the RAG system in the background once the server is listening; when
+    # off it is built by the first chat request or readiness probe
+    rag_warmup_on_startup: bool = True
+    
+    # RAG pipeline concurrency
+    rag_max_concurrency: int = 4
+    rag_max_queue_size: int = 32
+    
+    # Specialist fan-out: shared pool size and per-specialist deadline
+    rag_fanout_workers: int = 8
+    rag_specialist_timeout_seconds: float = 15.0
+    
+    # MultiAgentRAGSystem: "crew" (agents drive their tools) or "direct" (tools + one LLM call)
+    multi_agent_execution_mode: str = "crew"
+    
+    # Prompt token budgets: default, per Ollama model, and per agent (synthesis,
+    # projects, policy, organization), the most specific one wins
+    prompt_token_budget: int = 2048
+    model_prompt_token_budgets: Dict[str, int] = {}
+    agent_prompt_token_budgets: Dict[str, int] = {}
+    
+    # Query routing keyword tables: JSON of {"route": ["term", ...]}; built-in tables when unset
+    query_routes_path: Optional[str] = None
+    
+    # Conversation history: in-process LRU/TTL when no URL is set; a SQLAlchemy URL
+    # (sqlite:///./cache/conversations.sqlite3, postgresql://...) shares sessions between workers
+    conversation_store_url: Optional[str] = None
+    conversation_max_sessions: int = 1000
+    conversation_max_messages: int = 50  # per session, oldest dropped first
+    conversation_max_message_chars: int = 8000
+    conversation_ttl_seconds: float = 86400.0  # idle sessions are evicted
+    
+    # Rolling summaries (RAGChatbot memory): past this many messages, all but the
+    # latest few are folded into a summary in the background
+    conversation_summarize_after: int = 12
+    conversation_keep_recent: int = 6
+    conversation_summary_max_chars: int = 1500
+    
+    # Answer cache
+    answer_cache_enabled: bool = True
+    answer_cache_max_entries: int = 2048
+    answer_cache_ttl_seconds: float = 3600.0
+    answer_cache_path: Optional[str] = None  # e.g. ./cache/answers.sqlite3 to survive restarts
+    answer_cache_embedding_model: Optional[str] = None  # e.g. nomic-embed-text enables the similarity tier
+    answer_cache_similarity_threshold: float = 0.92
+    
+    # Embedding cache shared by ingestion, vector search and the answer cache
+    embedding_cache_enabled: bool = True
+    embedding_cache_max_entries: int = 10000  # vectors kept in memory
+    embedding_cache_path: Optional[str] = None  # e.g. ./cache/embeddings.sqlite3 to survive restarts
+    
+    # Parsed PDF chunks, kept outside RAG_context so they never land in the data directory
+    pdf_index_cache_dir: str = "./cache/pdf_index"
+    
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+_STREAM_END = object()
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when the executor queue is full and new work is rejected."""
+
+
+class BoundedExecutor:
+    """
+    Size-limited thread pool for blocking work called from async handlers.
+
+    At most ``max_workers`` jobs run at once; up to ``max_queue_size`` more wait
+    for a free worker and anything beyond that is rejected immediately, so a
+    burst of slow LLM calls cannot starve the event loop or pile up unbounded.
+    """
+
+    def __init__(
+        self,
+        max_workers: int,
+        max_queue_size: int = 0,
+        name: str = "executor",
+        on_wait: Optional[Callable[[float], None]] = None,
+        on_reject: Optional[Callable[[], None]] = None
+    ):
+        self.name = name
+        self.on_wait = on_wait
+        self.on_reject = on_reject
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _reserve(self):
+        with self._lock:
+            if self.max_queue_size and self._queued >= self.max_queue_size:
+                self._rejected += 1
+                if self.on_reject:
+                    self.on_reject()
+                raise ExecutorSaturatedError(
+                    f"{self.name} executor is saturated ({self._queued} requests waiting)"
+                )
+            self._queued += 1
+
+    def _wrap(self, fn: Callable[..., Any], *args, **kwargs) -> Callable[[], Any]:
+        submitted = time.perf_counter()
+
+        def job():
+            wait = time.perf_counter() - submitted
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self._total_wait += wait
+                self._max_wait = max(self._max_wait, wait)
+            if self.on_wait:
+                self.on_wait(wait)
+            if wait > 1.0:
+                logger.warning(f"{self.name} job waited {wait:.2f}s for a free worker")
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._completed += 1
+
+        return job
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking callable on the pool and await its result"""
+        self._reserve()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, self._wrap(fn, *args, **kwargs))
+
+    async def stream(self, fn: Callable[..., Iterator[Any]], *args, **kwargs) -> AsyncIterator[Any]:
+        """
+        Run a blocking generator on a single worker and yield its items.
+
+        The whole generator occupies one worker for its lifetime. If the
+        consumer stops early the generator is closed on the worker thread.
+        """
+        self._reserve()
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        cancelled = threading.Event()
+
+        def produce():
+            iterator = fn(*args, **kwargs)
+            try:
+                for item in iterator:
+                    if cancelled.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, item)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                close = getattr(iterator, "close", None)
+                if close:
+                    close()
+                loop.call_soon_threadsafe(queue.put_nowait, _STREAM_END)
+
+        loop.run_in_executor(self._pool, self._wrap(produce))
+        try:
+            while True:
+                item = await queue.get()
+                if item is _STREAM_END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # The worker notices on its next item and closes the generator
+            cancelled.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return current queue depth, utilisation and wait times"""
+        with self._lock:
+            started = self._completed + self._active
+            return {
+                "name": self.name,
+                "max_workers": self.max_workers,
+                "max_queue_size": self.max_queue_size,
+                "active": self._active,
+                "queued": self._queued,
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._total_wait / started * 1000, 2) if started else 0.0,
+                "max_wait_ms": round(self._max_wait * 1000, 2),
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting work and release the worker threads"""
+        self._pool.shutdown(wait=wait)
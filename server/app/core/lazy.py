@@ -0,0 +1,87 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Generic, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LazyResource(Generic[T]):
+    """
+    A value built on first use, exactly once, from any thread.
+
+    Concurrent callers of ``get`` during the build wait for the same build. A
+    failed build is not cached: the error is reported in ``status`` and the
+    next ``get`` tries again. ``warm_up`` starts the build on a background
+    thread so it can run while the server is already answering requests; it
+    never waits on a build in progress, so it is safe to call from the event
+    loop.
+    """
+
+    def __init__(self, factory: Callable[[], T], name: str):
+        self.factory = factory
+        self.name = name
+        self._lock = threading.Lock()  # held for the whole build
+        self._start_lock = threading.Lock()  # only guards starting the warm-up thread
+        self._value: Optional[T] = None
+        self._state = "idle"  # idle, loading, ready, failed
+        self._error: Optional[str] = None
+        self._load_seconds: Optional[float] = None
+        self._warm_up_thread: Optional[threading.Thread] = None
+
+    def get(self) -> T:
+        value = self._value
+        if value is not None:
+            return value
+        with self._lock:
+            if self._value is not None:
+                return self._value
+            self._state = "loading"
+            started = time.perf_counter()
+            try:
+                value = self.factory()
+            except Exception as e:
+                self._state = "failed"
+                self._error = str(e)
+                logger.error(f"Building {self.name} failed: {e}")
+                raise
+            self._load_seconds = time.perf_counter() - started
+            self._value = value
+            self._state = "ready"
+            self._error = None
+            logger.info(f"Built {self.name} in {self._load_seconds:.2f}s")
+            return value
+
+    def peek(self) -> Optional[T]:
+        """The value if it has been built, without building it"""
+        return self._value
+
+    @property
+    def ready(self) -> bool:
+        return self._value is not None
+
+    def warm_up(self) -> bool:
+        """Build on a background thread unless built or already building; True if started"""
+        with self._start_lock:
+            if self._value is not None or self._state == "loading":
+                return False
+            if self._warm_up_thread is not None and self._warm_up_thread.is_alive():
+                return False
+            self._warm_up_thread = threading.Thread(target=self._warm_up, name=f"warm-up-{self.name}", daemon=True)
+            self._warm_up_thread.start()
+            return True
+
+    def _warm_up(self):
+        try:
+            self.get()
+        except Exception:
+            pass  # already logged and kept in status
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "state": self._state,
+            "load_seconds": round(self._load_seconds, 3) if self._load_seconds is not None else None,
+            "error": self._error,
+        }
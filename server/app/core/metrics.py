@@ -0,0 +1,334 @@
+"""
+Minimal in-process metrics registry rendered in the Prometheus text format.
+
+Only what the API needs is implemented: counters, gauges (optionally backed by
+a callback) and histograms, each with an optional set of labels.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + "}"
+
+
+class _Metric:
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.metric_type}",
+        ]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing value"""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, or is read from a callback at scrape time"""
+
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._callbacks: Dict[LabelValues, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, fn: Callable[[], float], **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._callbacks[key] = fn
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+            callbacks = dict(self._callbacks)
+        for key, fn in callbacks.items():
+            values[key] = fn()
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in sorted(values.items())
+        ]
+
+
+class Histogram(_Metric):
+    """Cumulative bucketed distribution of observed values"""
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                # One slot per bucket plus the implicit +Inf bucket
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            snapshot = [(key, list(counts), self._sums[key]) for key, counts in sorted(self._counts.items())]
+        lines = []
+        for key, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together for a scrape"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+class StageTimer:
+    """
+    Records how long each named stage of a request took.
+
+    Durations are kept per instance in milliseconds (for the response) and
+    observed in seconds on the given histogram, labelled by ``stage``.
+    """
+
+    def __init__(self, histogram: Optional[Histogram] = None):
+        self.histogram = histogram
+        self.timings_ms: Dict[str, float] = {}
+
+    def record(self, stage: str, seconds: float):
+        self.timings_ms[stage] = round(seconds * 1000, 3)
+        if self.histogram is not None:
+            self.histogram.observe(seconds, stage=stage)
+
+    @contextmanager
+    def stage(self, stage: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started)
+
+
+registry = MetricsRegistry()
+
+# HTTP layer
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status"),
+)
+
+# RAG pipeline
+RAG_STAGE_SECONDS = registry.histogram(
+    "rag_stage_duration_seconds",
+    "Latency of each RAG pipeline stage",
+    ("stage",),
+)
+RAG_AGENT_SECONDS = registry.histogram(
+    "rag_agent_request_duration_seconds",
+    "End-to-end RAG latency by the agent that handled the query",
+    ("agent",),
+)
+
+RAG_ANSWER_PATHS = registry.counter(
+    "rag_answers_total",
+    "Chat answers by the path that produced them (structured, cache, llm, no_context, raw_context)",
+    ("path",),
+)
+RAG_SPECIALIST_OUTCOMES = registry.counter(
+    "rag_specialist_runs_total",
+    "Specialist retrieval/analysis runs by outcome (completed, failed, timed_out)",
+    ("specialist", "outcome"),
+)
+
+RAG_LLM_CALLS = registry.histogram(
+    "rag_llm_calls_per_turn",
+    "LLM round trips made to answer one chat turn, by execution mode (crew, direct)",
+    ("mode",),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21),
+)
+
+# RAG executor
+RAG_EXECUTOR_WAIT_SECONDS = registry.histogram(
+    "rag_executor_wait_seconds",
+    "Time RAG jobs spend queued before a worker picks them up",
+)
+RAG_SYSTEM_LOAD_SECONDS = registry.gauge(
+    "rag_system_load_seconds", "Time taken to import and build the RAG system; 0 until it is loaded"
+)
+RAG_EXECUTOR_QUEUED = registry.gauge("rag_executor_queued", "RAG jobs waiting for a worker")
+RAG_EXECUTOR_ACTIVE = registry.gauge("rag_executor_active", "RAG jobs currently running")
+RAG_EXECUTOR_REJECTED = registry.counter("rag_executor_rejected_total", "RAG jobs rejected because the queue was full")
+
+# Answer cache
+ANSWER_CACHE_LOOKUPS = registry.counter(
+    "rag_answer_cache_lookups_total",
+    "Answer cache lookups by result (exact_hit, semantic_hit, miss)",
+    ("result",),
+)
+ANSWER_CACHE_EVICTIONS = registry.counter("rag_answer_cache_evictions_total", "Answers evicted by the LRU bound")
+ANSWER_CACHE_ENTRIES = registry.gauge("rag_answer_cache_entries", "Answers currently cached")
+
+# Single-flight coalescing of identical LLM generations
+SINGLE_FLIGHT_CALLS = registry.counter(
+    "rag_llm_single_flight_calls_total",
+    "LLM synthesis calls by role: leader (ran the generation) or coalesced (shared a leader's result)",
+    ("role",),
+)
+
+# Document ingestion
+INGESTED_CHUNKS = registry.counter(
+    "rag_ingested_chunks_total",
+    "Document chunks processed by ingestion, by outcome (written, failed)",
+    ("outcome",),
+)
+
+PROMPT_TOKENS = registry.histogram(
+    "rag_prompt_tokens",
+    "Estimated prompt tokens per component (instructions, question, history, context_<source>, total), by agent",
+    ("agent", "component"),
+    buckets=(16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192),
+)
+
+# Conversation store
+CONVERSATION_EVICTIONS = registry.counter(
+    "rag_conversation_evictions_total",
+    "Conversation sessions evicted, by store and reason: ttl (idle too long) or capacity (over the session limit)",
+    ("store", "reason"),
+)
+CONVERSATION_MESSAGES_TRIMMED = registry.counter(
+    "rag_conversation_messages_trimmed_total",
+    "Oldest messages dropped from sessions over the per-session message limit",
+    ("store",),
+)
+CONVERSATION_SUMMARIES = registry.counter(
+    "rag_conversation_summaries_total",
+    "Background folds of older turns into a session's rolling summary, by result (ok or error)",
+    ("result",),
+)
+CONVERSATION_SESSIONS = registry.gauge("rag_conversation_sessions", "Conversation sessions currently stored")
+
+# Embedding cache
+EMBEDDING_CACHE_LOOKUPS = registry.counter(
+    "rag_embedding_cache_lookups_total",
+    "Embedding cache lookups per text by result (memory_hit, disk_hit, miss)",
+    ("result",),
+)
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
@@ -0,0 +1,297 @@
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from ..core.metrics import ANSWER_CACHE_LOOKUPS, ANSWER_CACHE_EVICTIONS
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+# Generated files (caches, half-written temp files) that do not change the data
+_GENERATED_SUFFIXES = (".chunks.json", ".tmp")
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so trivial variants share a key"""
+    return _WHITESPACE.sub(" ", _NON_WORD.sub(" ", query.lower())).strip()
+
+
+def fingerprint(text: str) -> str:
+    """Short stable hash of arbitrary text"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def data_version(directory: str) -> str:
+    """
+    Version of a data directory derived from file names, sizes and mtimes.
+
+    Only ``stat`` is used, so this is cheap enough to call on every request.
+    """
+    digest = hashlib.sha256()
+    try:
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if name.endswith(_GENERATED_SUFFIXES):
+                continue
+            if os.path.isfile(path):
+                stat = os.stat(path)
+                digest.update(f"{name}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode("utf-8"))
+    except FileNotFoundError:
+        pass
+    return digest.hexdigest()[:16]
+
+
+@dataclass
+class _Entry:
+    normalized_query: str
+    context_fingerprint: str
+    response: str
+    created_at: float
+    embedding: Optional[np.ndarray] = None
+
+
+class AnswerCache:
+    """
+    LRU/TTL cache of synthesized answers.
+
+    Entries are keyed by the normalized query, a fingerprint of the retrieved
+    context and the current data version, so an answer is only reused when the
+    model would have seen exactly the same inputs. An optional embedding tier
+    also matches paraphrased queries over the same context. When the data
+    version changes every entry is dropped, in memory and on disk.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 2048,
+        ttl_seconds: float = 3600.0,
+        version_fn: Optional[Callable[[], str]] = None,
+        version_check_interval: float = 5.0,
+        persist_path: Optional[str] = None,
+        embed_fn: Optional[Callable[[str], List[float]]] = None,
+        similarity_threshold: float = 0.92
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version_fn = version_fn
+        self.version_check_interval = version_check_interval
+        self.persist_path = persist_path
+        self.embed_fn = embed_fn
+        self.similarity_threshold = similarity_threshold
+
+        self._lock = threading.RLock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._version = version_fn() if version_fn else ""
+        self._version_checked_at = time.monotonic()
+        self._stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+
+        self._db: Optional[sqlite3.Connection] = None
+        if persist_path:
+            self._open_store(persist_path)
+
+    # Persistence
+
+    def _open_store(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS answers (
+                key TEXT PRIMARY KEY,
+                normalized_query TEXT NOT NULL,
+                context_fingerprint TEXT NOT NULL,
+                data_version TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                embedding BLOB
+            )
+            """
+        )
+        # Anything written against older data is stale
+        self._db.execute("DELETE FROM answers WHERE data_version != ?", (self._version,))
+        self._db.execute("DELETE FROM answers WHERE created_at < ?", (time.time() - self.ttl_seconds,))
+        self._db.commit()
+
+        rows = self._db.execute(
+            "SELECT key, normalized_query, context_fingerprint, response, created_at, embedding "
+            "FROM answers ORDER BY created_at DESC LIMIT ?",
+            (self.max_entries,)
+        ).fetchall()
+        for key, normalized, context_fp, response, created_at, embedding in reversed(rows):
+            self._entries[key] = _Entry(
+                normalized_query=normalized,
+                context_fingerprint=context_fp,
+                response=response,
+                created_at=created_at,
+                embedding=np.frombuffer(embedding, dtype=np.float32) if embedding else None
+            )
+        logger.info(f"Loaded {len(rows)} cached answers from {path}")
+
+    def _persist(self, key: str, entry: _Entry):
+        if self._db is None:
+            return
+        self._db.execute(
+            "INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                key,
+                entry.normalized_query,
+                entry.context_fingerprint,
+                self._version,
+                entry.response,
+                entry.created_at,
+                entry.embedding.tobytes() if entry.embedding is not None else None
+            )
+        )
+        self._db.commit()
+
+    def _delete_persisted(self, keys: List[str]):
+        if self._db is None or not keys:
+            return
+        self._db.executemany("DELETE FROM answers WHERE key = ?", [(key,) for key in keys])
+        self._db.commit()
+
+    # Invalidation
+
+    def _check_version(self):
+        if not self.version_fn:
+            return
+        now = time.monotonic()
+        if now - self._version_checked_at < self.version_check_interval:
+            return
+        self._version_checked_at = now
+        version = self.version_fn()
+        if version != self._version:
+            logger.info(f"Data version changed ({self._version} -> {version}); clearing answer cache")
+            self._version = version
+            self._stats["invalidations"] += 1
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM answers")
+                self._db.commit()
+
+    def _key(self, normalized: str, context_fp: str) -> str:
+        return fingerprint(f"{normalized}\0{context_fp}\0{self._version}")
+
+    def _is_expired(self, entry: _Entry) -> bool:
+        return time.time() - entry.created_at > self.ttl_seconds
+
+    def _embed(self, normalized: str) -> Optional[np.ndarray]:
+        if not self.embed_fn:
+            return None
+        try:
+            vector = np.asarray(self.embed_fn(normalized), dtype=np.float32)
+        except Exception as e:
+            logger.warning(f"Answer cache embedding failed: {e}")
+            return None
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    # Public API
+
+    def get(self, query: str, context: str) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Look up a cached answer for a query over a given retrieved context.
+
+        Returns ``(response, tier)`` where tier is ``"exact"`` or ``"semantic"``,
+        or ``(None, None)`` on a miss.
+        """
+        normalized = normalize_query(query)
+        context_fp = fingerprint(context)
+
+        with self._lock:
+            self._check_version()
+            key = self._key(normalized, context_fp)
+            entry = self._entries.get(key)
+            if entry is not None and self._is_expired(entry):
+                del self._entries[key]
+                self._delete_persisted([key])
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats["exact_hits"] += 1
+                ANSWER_CACHE_LOOKUPS.inc(result="exact_hit")
+                return entry.response, "exact"
+
+            candidates = [
+                (candidate_key, candidate)
+                for candidate_key, candidate in self._entries.items()
+                if candidate.embedding is not None
+                and candidate.context_fingerprint == context_fp
+                and not self._is_expired(candidate)
+            ]
+
+        # Embedding happens outside the lock; it is a network call
+        if candidates:
+            query_vector = self._embed(normalized)
+            if query_vector is not None:
+                matrix = np.stack([candidate.embedding for _, candidate in candidates])
+                similarities = matrix @ query_vector
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.similarity_threshold:
+                    best_key, best_entry = candidates[best]
+                    with self._lock:
+                        if best_key in self._entries:
+                            self._entries.move_to_end(best_key)
+                        self._stats["semantic_hits"] += 1
+                    ANSWER_CACHE_LOOKUPS.inc(result="semantic_hit")
+                    return best_entry.response, "semantic"
+
+        with self._lock:
+            self._stats["misses"] += 1
+        ANSWER_CACHE_LOOKUPS.inc(result="miss")
+        return None, None
+
+    def put(self, query: str, context: str, response: str):
+        """Store an answer synthesized from the given context"""
+        normalized = normalize_query(query)
+        context_fp = fingerprint(context)
+        entry = _Entry(
+            normalized_query=normalized,
+            context_fingerprint=context_fp,
+            response=response,
+            created_at=time.time(),
+            embedding=self._embed(normalized)
+        )
+
+        with self._lock:
+            self._check_version()
+            key = self._key(normalized, context_fp)
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted_key, _ = self._entries.popitem(last=False)
+                evicted.append(evicted_key)
+            self._stats["evictions"] += len(evicted)
+            if evicted:
+                ANSWER_CACHE_EVICTIONS.inc(len(evicted))
+            self._persist(key, entry)
+            self._delete_persisted(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM answers")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["data_version"] = self._version
+        lookups = stats["exact_hits"] + stats["semantic_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["exact_hits"] + stats["semantic_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
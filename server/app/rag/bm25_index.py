@@ -0,0 +1,201 @@
+import logging
+import math
+import re
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from has have how i in is it its me my of on or "
+    "our should that the their there this to us was we what when where which who why will with "
+    "you your".split()
+)
+
+DEFAULT_FIELD_BOOSTS = {"title": 3.0, "name": 3.0, "category": 1.5, "body": 1.0}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords"""
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+@dataclass
+class SearchRecord:
+    """
+    One searchable unit: a CSV row, a JSON entry or a PDF chunk.
+
+    ``fields`` are what gets indexed (boosted per field name); ``text`` is what
+    is handed to the LLM when the record matches.
+    """
+
+    source: str
+    text: str
+    fields: Dict[str, str]
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class SearchHit:
+    record: SearchRecord
+    score: float
+
+
+class BM25Index:
+    """
+    In-memory BM25F inverted index over ``SearchRecord``s.
+
+    Term frequencies are weighted by field boost, so a match in a title counts
+    more than one in the body. Each posting list stores the precomputed BM25
+    weight of the term in every record containing it, so a query only gathers
+    and sums a few arrays before a partial sort for the top k.
+    
+    Terms found in more than ``common_term_ratio`` of records (e.g. "project"
+    in a projects table) are stored as dense per-record weights instead. When
+    a query also has rarer terms in the requested sources, only records
+    matching those are candidates and common terms just add to their scores,
+    which keeps queries far below a millisecond at 100k records. Common terms carry little IDF weight, so this
+    rarely changes the top k.
+    """
+
+    def __init__(
+        self,
+        records: Iterable[SearchRecord],
+        field_boosts: Optional[Dict[str, float]] = None,
+        k1: float = 1.2,
+        b: float = 0.75,
+        common_term_ratio: float = 0.125
+    ):
+        self.records: List[SearchRecord] = list(records)
+        self.field_boosts = dict(DEFAULT_FIELD_BOOSTS if field_boosts is None else field_boosts)
+        self.k1 = k1
+        self.b = b
+        self.common_term_ratio = common_term_ratio
+
+        self._source_codes: Dict[str, int] = {}
+        self._sources = np.array(
+            [self._source_codes.setdefault(record.source, len(self._source_codes)) for record in self.records],
+            dtype=np.int32
+        )
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._common: Dict[str, np.ndarray] = {}
+        self._source_masks = {source: self._sources == code for source, code in self._source_codes.items()}
+        self._build()
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _build(self):
+        postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+        lengths = np.zeros(len(self.records), dtype=np.float32)
+
+        for doc_id, record in enumerate(self.records):
+            weighted: Counter = Counter()
+            for name, value in record.fields.items():
+                boost = self.field_boosts.get(name, 1.0)
+                tokens = tokenize(value)
+                lengths[doc_id] += boost * len(tokens)
+                for token in tokens:
+                    weighted[token] += boost
+            for token, frequency in weighted.items():
+                postings[token].append((doc_id, frequency))
+
+        total = len(self.records)
+        average_length = float(lengths.mean()) if total and lengths.mean() > 0 else 1.0
+        length_norm = self.k1 * (1 - self.b + self.b * lengths / average_length)
+
+        for token, entries in postings.items():
+            doc_ids = np.fromiter((doc_id for doc_id, _ in entries), dtype=np.int32, count=len(entries))
+            frequencies = np.fromiter((frequency for _, frequency in entries), dtype=np.float32, count=len(entries))
+            idf = math.log(1 + (total - len(entries) + 0.5) / (len(entries) + 0.5))
+            weights = (idf * frequencies * (self.k1 + 1) / (frequencies + length_norm[doc_ids])).astype(np.float32)
+            if len(entries) > self.common_term_ratio * total:
+                dense = np.zeros(total, dtype=np.float32)
+                dense[doc_ids] = weights
+                self._common[token] = dense
+            else:
+                self._postings[token] = (doc_ids, weights)
+
+        logger.info(
+            f"Built BM25 index: {total} records, {len(self._postings) + len(self._common)} terms "
+            f"({len(self._common)} common)"
+        )
+
+    def _source_mask(self, sources: Sequence[str]) -> np.ndarray:
+        masks = [self._source_masks[source] for source in sources if source in self._source_masks]
+        if not masks:
+            return np.zeros(len(self.records), dtype=bool)
+        return masks[0] if len(masks) == 1 else np.logical_or.reduce(masks)
+
+    def search(self, query: str, top_k: int = 5, sources: Optional[Sequence[str]] = None) -> List[SearchHit]:
+        """Top-k records for the query, optionally restricted to some sources"""
+        query_terms = set(tokenize(query))
+        mask = self._source_mask(sources) if sources is not None else None
+        # Rare terms are restricted to the requested sources first, so a term that
+        # only occurs elsewhere cannot leave the candidate set empty
+        postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for term in query_terms:
+            if term not in self._postings:
+                continue
+            doc_ids, weights = self._postings[term]
+            if mask is not None:
+                keep = mask[doc_ids]
+                if not keep.any():
+                    continue
+                doc_ids, weights = doc_ids[keep], weights[keep]
+            postings[term] = (doc_ids, weights)
+        terms = list(postings)
+        common = [term for term in query_terms if term in self._common]
+        if not (terms or common) or top_k <= 0:
+            return []
+
+        if terms:
+            # Candidates are the concatenated posting lists of the rare terms; a
+            # record matching several terms appears once per term, with its total
+            if len(terms) == 1:
+                candidates, scores = postings[terms[0]]
+            else:
+                totals = np.zeros(len(self.records), dtype=np.float32)
+                for term in terms:
+                    doc_ids, weights = postings[term]
+                    totals[doc_ids] += weights  # doc ids are unique within a posting list
+                candidates = np.concatenate([postings[term][0] for term in terms])
+                scores = totals[candidates]
+            for term in common:
+                scores = scores + self._common[term][candidates]
+        else:
+            # Only common terms: score every record
+            scores = self._common[common[0]].copy()
+            for term in common[1:]:
+                scores += self._common[term]
+            if mask is not None:
+                scores = np.where(mask, scores, 0)
+            candidates = None
+
+        # Enough slots that duplicates of the same record cannot crowd out the top k
+        needed = min(len(scores), top_k * max(len(terms), 1))
+        if needed == 0:
+            return []
+        if len(scores) > needed:
+            best = np.argpartition(-scores, needed - 1)[:needed]
+        else:
+            best = np.arange(len(scores))
+        best = best[np.argsort(-scores[best], kind="stable")]
+
+        hits: List[SearchHit] = []
+        seen = set()
+        for position in best:
+            doc_id = int(candidates[position]) if candidates is not None else int(position)
+            score = float(scores[position])
+            if score <= 0 or doc_id in seen:
+                continue
+            seen.add(doc_id)
+            hits.append(SearchHit(self.records[doc_id], score))
+            if len(hits) == top_k:
+                break
+        return hits
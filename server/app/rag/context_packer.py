@@ -0,0 +1,157 @@
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from ..core.config import settings
+from ..core.metrics import PROMPT_TOKENS
+
+logger = logging.getLogger(__name__)
+
+# Roughly four characters per token for English text with Llama-family tokenizers
+CHARS_PER_TOKEN = 4
+
+_ELLIPSIS = " ..."
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate; no tokenizer is loaded"""
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def truncate_to_tokens(text: str, tokens: int) -> str:
+    """Cut text to about ``tokens`` tokens, at a word boundary"""
+    limit = tokens * CHARS_PER_TOKEN
+    if len(text) <= limit:
+        return text
+    cut = text.rfind(" ", 0, max(0, limit - len(_ELLIPSIS)))
+    return text[:cut if cut > 0 else max(0, limit - len(_ELLIPSIS))].rstrip() + _ELLIPSIS
+
+
+def prompt_budget(model: str, agent: Optional[str] = None) -> int:
+    """Prompt token budget for an agent, else for the model, else the default"""
+    if agent and agent in settings.agent_prompt_token_budgets:
+        return settings.agent_prompt_token_budgets[agent]
+    return settings.model_prompt_token_budgets.get(model, settings.prompt_token_budget)
+
+
+@dataclass
+class Snippet:
+    """A retrieved piece of context and its relevance score"""
+
+    source: str
+    text: str
+    score: float = 0.0
+
+
+@dataclass
+class PackedContext:
+    """What fit into the budget, and how many tokens each prompt component used"""
+
+    budget: int
+    sections: Dict[str, List[str]] = field(default_factory=dict)  # source -> kept snippets, best first
+    history: str = ""
+    usage: Dict[str, int] = field(default_factory=dict)
+    dropped: int = 0  # snippets left out entirely
+    truncated: int = 0  # snippets or messages cut short
+
+    def section(self, source: str, separator: str = "\n") -> str:
+        return separator.join(self.sections.get(source, []))
+
+    @property
+    def empty(self) -> bool:
+        return not any(self.sections.values())
+
+
+class ContextPacker:
+    """
+    Fits retrieved snippets and conversation history into a prompt token budget.
+
+    Fixed components (the prompt template, the question) are counted first.
+    History then gets at most ``history_share`` of what is left: the most
+    recent messages first, each capped at ``max_message_tokens`` so an earlier
+    long answer cannot crowd out everything else. Snippets fill the rest in
+    score order, across sources; the first one that does not fit is trimmed if
+    at least ``min_snippet_tokens`` remain, and lower-ranked ones are dropped.
+
+    ``headers`` are the labels the caller puts in front of each section
+    (keyed by source, or ``"history"``); a header is charged once, when its
+    section gets its first line. When the fixed text alone exceeds the budget
+    nothing else is packed.
+    """
+
+    def __init__(
+        self,
+        budget_tokens: int,
+        history_share: float = 0.25,
+        max_message_tokens: int = 120,
+        min_snippet_tokens: int = 32,
+        agent: str = "default"
+    ):
+        self.budget_tokens = budget_tokens
+        self.history_share = history_share
+        self.max_message_tokens = max_message_tokens
+        self.min_snippet_tokens = min_snippet_tokens
+        self.agent = agent
+
+    def pack(
+        self,
+        fixed: Dict[str, str],
+        snippets: Sequence[Snippet] = (),
+        history: Sequence[Dict[str, str]] = (),
+        headers: Optional[Dict[str, str]] = None
+    ) -> PackedContext:
+        packed = PackedContext(budget=self.budget_tokens)
+        headers = headers or {}
+        usage = {name: estimate_tokens(text) for name, text in fixed.items()}
+        remaining = self.budget_tokens - sum(usage.values())
+        if remaining <= 0:
+            logger.warning(
+                f"Fixed text of the {self.agent} prompt ({sum(usage.values())} tokens) "
+                f"leaves nothing of the {self.budget_tokens} token budget"
+            )
+
+        if history and remaining > 0:
+            history_header = estimate_tokens(headers.get("history", ""))
+            history_budget = max(0, int(remaining * self.history_share)) - history_header
+            lines: List[str] = []
+            used = 0
+            for message in reversed(history):
+                line = f"{message['role']}: {message['content']}"
+                if estimate_tokens(line) > self.max_message_tokens:
+                    line = truncate_to_tokens(line, self.max_message_tokens)
+                    packed.truncated += 1
+                cost = estimate_tokens(line) + 1
+                if used + cost > history_budget:
+                    break
+                lines.append(line)
+                used += cost
+            packed.history = "\n".join(reversed(lines))
+            usage["history"] = estimate_tokens(packed.history) + (history_header if lines else 0)
+            remaining -= usage["history"]
+
+        for snippet in sorted(snippets, key=lambda item: item.score, reverse=True):
+            text = snippet.text
+            header = 0 if snippet.source in packed.sections else estimate_tokens(headers.get(snippet.source, ""))
+            available = remaining - header
+            cost = estimate_tokens(text) + 1
+            if cost > available:
+                if available - 1 < self.min_snippet_tokens:
+                    packed.dropped += 1
+                    continue
+                text = truncate_to_tokens(text, available - 1)
+                cost = estimate_tokens(text) + 1
+                packed.truncated += 1
+            packed.sections.setdefault(snippet.source, []).append(text)
+            usage[f"context_{snippet.source}"] = usage.get(f"context_{snippet.source}", 0) + header + cost
+            remaining -= header + cost
+
+        usage["total"] = sum(usage.values())
+        packed.usage = usage
+        for component, tokens in usage.items():
+            PROMPT_TOKENS.observe(tokens, agent=self.agent, component=component)
+        if packed.dropped or packed.truncated:
+            logger.debug(
+                f"Packed {self.agent} prompt into {usage['total']}/{self.budget_tokens} tokens "
+                f"({packed.dropped} snippets dropped, {packed.truncated} trimmed)"
+            )
+        return packed
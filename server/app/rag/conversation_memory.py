@@ -0,0 +1,221 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from ..core.config import settings
+from ..core.metrics import CONVERSATION_SUMMARIES
+
+logger = logging.getLogger(__name__)
+
+# Wait before summarizing a session again after a failure; doubles per
+# consecutive failure up to the maximum
+SUMMARY_RETRY_SECONDS = 30.0
+SUMMARY_RETRY_MAX_SECONDS = 600.0
+
+# (previous summary, messages to fold in) -> new summary
+Summarizer = Callable[[str, List[Dict[str, str]]], str]
+
+SUMMARY_PROMPT = """Update the running summary of a conversation between a user and an HR assistant.
+Keep names, numbers, dates, policies and open questions; drop pleasantries. Reply with the summary only, in at most {max_words} words.
+
+Current summary:
+{summary}
+
+New messages:
+{transcript}
+
+Updated summary:"""
+
+
+def render_message(message: Dict[str, str]) -> str:
+    return f"{message['role'].title()}: {message['content']}\n"
+
+
+def llm_summarizer(llm, max_words: int = 150) -> Summarizer:
+    """Summarizer that asks the chat LLM (anything with ``invoke(prompt)``) to fold turns in"""
+    def summarize(summary: str, messages: List[Dict[str, str]]) -> str:
+        prompt = SUMMARY_PROMPT.format(
+            max_words=max_words,
+            summary=summary or "(none yet)",
+            transcript="".join(render_message(message) for message in messages)
+        )
+        return str(llm.invoke(prompt)).strip()
+    return summarize
+
+
+@dataclass
+class _Session:
+    messages: List[Dict[str, str]] = field(default_factory=list)  # not yet folded into the summary
+    lines: List[str] = field(default_factory=list)  # messages[i], rendered once
+    summary: str = ""
+    rendered: Optional[str] = None  # cached context string; None when it must be rebuilt
+    summarizing: bool = False
+    dropped: int = 0  # oldest messages cut by the hard cap while a summary was in flight
+    touched_at: float = 0.0
+    failures: int = 0  # consecutive failed summaries
+    retry_at: float = 0.0  # no summary is submitted before this time
+
+
+class ConversationMemory:
+    """
+    Conversation history per session, with a rolling summary of older turns.
+
+    Each message is rendered once when it is added and the context string is
+    cached per session, so building the prompt context does not re-render the
+    whole history every turn. Once a session holds more than
+    ``summarize_after`` messages, all but the latest ``keep_recent`` are
+    handed to a background summarizer and replaced by its summary, so the
+    context stays about the same size however long the session runs. Chat
+    turns never wait for it; if it falls behind or fails, the oldest messages
+    past twice the threshold are dropped instead, and the session is not
+    summarized again until an exponential backoff has passed. Without a
+    summarizer the memory keeps the latest ``summarize_after`` messages.
+
+    Sessions are bounded like the conversation store: kept in last-use
+    order, idle ones expire after ``ttl_seconds`` and the least recently used
+    go once there are more than ``max_sessions``.
+    """
+
+    def __init__(
+        self,
+        summarize_fn: Optional[Summarizer] = None,
+        summarize_after: Optional[int] = None,
+        keep_recent: Optional[int] = None,
+        max_summary_chars: Optional[int] = None,
+        max_sessions: Optional[int] = None,
+        ttl_seconds: Optional[float] = None,
+        executor: Optional[Executor] = None
+    ):
+        self.summarize_fn = summarize_fn
+        self.summarize_after = summarize_after or settings.conversation_summarize_after
+        self.keep_recent = min(keep_recent or settings.conversation_keep_recent, self.summarize_after)
+        self.max_summary_chars = max_summary_chars or settings.conversation_summary_max_chars
+        self.max_message_chars = settings.conversation_max_message_chars
+        self.max_sessions = max_sessions or settings.conversation_max_sessions
+        self.ttl_seconds = ttl_seconds or settings.conversation_ttl_seconds
+        self._executor = executor
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+
+    def _submit(self, fn, *args):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="summarizer")
+        self._executor.submit(fn, *args)
+
+    def _expire(self, now: float):
+        """Drop idle sessions; they are oldest first, so this stops at the first live one"""
+        cutoff = now - self.ttl_seconds
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.touched_at >= cutoff:
+                break
+            del self._sessions[session_id]
+
+    def _session(self, session_id: str) -> Optional[_Session]:
+        """Live session, or None; only adding a message counts as use"""
+        self._expire(time.time())
+        return self._sessions.get(session_id)
+
+    def add_message(self, session_id: str, role: str, content: str):
+        """Add message to conversation history"""
+        message = {
+            "role": role,
+            "content": content[:self.max_message_chars],
+            "timestamp": datetime.now().isoformat()
+        }
+        line = render_message(message)
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = _Session()
+            self._sessions.move_to_end(session_id)
+            session.touched_at = now
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+            session.messages.append(message)
+            session.lines.append(line)
+            if session.rendered is not None:
+                session.rendered += line
+
+            hard_cap = self.summarize_after * 2 if self.summarize_fn else self.summarize_after
+            overflow = len(session.messages) - hard_cap
+            if overflow > 0:
+                del session.messages[:overflow]
+                del session.lines[:overflow]
+                session.rendered = None
+                if session.summarizing:
+                    session.dropped += overflow
+
+            if (
+                self.summarize_fn and not session.summarizing and now >= session.retry_at
+                and len(session.messages) > self.summarize_after
+            ):
+                count = len(session.messages) - self.keep_recent
+                session.summarizing = True
+                session.dropped = 0
+                self._submit(self._summarize, session_id, session, session.summary, session.messages[:count])
+
+    def _summarize(self, session_id: str, session: _Session, summary: str, messages: List[Dict[str, str]]):
+        started = time.perf_counter()
+        try:
+            new_summary = self.summarize_fn(summary, messages)[:self.max_summary_chars]
+        except Exception as e:
+            CONVERSATION_SUMMARIES.inc(result="error")
+            with self._lock:
+                session.summarizing = False
+                session.failures += 1
+                delay = min(SUMMARY_RETRY_SECONDS * 2 ** (session.failures - 1), SUMMARY_RETRY_MAX_SECONDS)
+                session.retry_at = time.time() + delay
+            logger.warning(f"Summarizing conversation {session_id} failed, retrying in {delay:.0f}s: {e}")
+            return
+
+        with self._lock:
+            session.summarizing = False
+            session.failures = 0
+            # Cleared or evicted while the summary was being written
+            if self._sessions.get(session_id) is not session:
+                return
+            folded = max(0, len(messages) - session.dropped)
+            del session.messages[:folded]
+            del session.lines[:folded]
+            session.summary = new_summary
+            session.rendered = None
+        CONVERSATION_SUMMARIES.inc(result="ok")
+        logger.debug(
+            f"Folded {len(messages)} messages of {session_id} into a {len(new_summary)}-character summary "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+
+    def get_conversation_history(self, session_id: str) -> List[Dict[str, str]]:
+        """Messages not yet folded into the summary"""
+        with self._lock:
+            session = self._session(session_id)
+            return list(session.messages) if session else []
+
+    def get_summary(self, session_id: str) -> str:
+        with self._lock:
+            session = self._session(session_id)
+            return session.summary if session else ""
+
+    def clear_conversation(self, session_id: str):
+        """Clear conversation history for a session"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def get_context_string(self, session_id: str) -> str:
+        """Summary of earlier turns followed by the recent messages"""
+        with self._lock:
+            session = self._session(session_id)
+            if session is None:
+                return ""
+            if session.rendered is None:
+                prefix = f"Summary of earlier conversation: {session.summary}\n" if session.summary else ""
+                session.rendered = prefix + "".join(session.lines)
+            return session.rendered
@@ -0,0 +1,321 @@
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import Column, Float, Index, Integer, MetaData, String, Table, Text, create_engine, event, func, select
+from sqlalchemy.engine import make_url
+
+from ..core.config import settings
+from ..core.metrics import CONVERSATION_EVICTIONS, CONVERSATION_MESSAGES_TRIMMED
+
+logger = logging.getLogger(__name__)
+
+Message = Dict[str, str]
+
+
+class ConversationStore(ABC):
+    """
+    Chat history per session, bounded in sessions, messages and message size.
+
+    Implementations are safe to call from several threads. ``history``
+    returns a copy, oldest message first.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 1000,
+        max_messages: int = 50,
+        max_message_chars: int = 8000,
+        ttl_seconds: float = 86400.0
+    ):
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self.max_message_chars = max_message_chars
+        self.ttl_seconds = ttl_seconds
+
+    def _bounded(self, message: Message) -> Message:
+        content = message["content"]
+        if len(content) > self.max_message_chars:
+            message = {**message, "content": content[:self.max_message_chars]}
+        return message
+
+    @abstractmethod
+    def append(self, session_id: str, messages: Sequence[Message]):
+        """Add messages to a session, dropping its oldest beyond ``max_messages``"""
+
+    @abstractmethod
+    def history(self, session_id: str) -> List[Message]:
+        """Messages of a live session; empty for unknown or expired sessions"""
+
+    @abstractmethod
+    def clear(self, session_id: str):
+        """Forget a session"""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Session count and eviction statistics"""
+
+    @abstractmethod
+    def session_count(self) -> int:
+        """Sessions stored, cheap enough to read at scrape time; may lag ``stats``"""
+
+
+@dataclass
+class _Session:
+    messages: List[Message] = field(default_factory=list)
+    touched_at: float = 0.0
+
+
+class InMemoryConversationStore(ConversationStore):
+    """
+    Per-process LRU/TTL store.
+
+    Sessions are kept in last-use order, so both the least recently used
+    session (when over ``max_sessions``) and expired ones are always at the
+    front and eviction never scans the whole store.
+    """
+
+    store_name = "memory"
+
+    def __init__(self, **limits):
+        super().__init__(**limits)
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._stats = {"capacity_evictions": 0, "ttl_evictions": 0, "trimmed_messages": 0}
+
+    def _expire(self, now: float):
+        cutoff = now - self.ttl_seconds
+        expired = 0
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.touched_at >= cutoff:
+                break
+            del self._sessions[session_id]
+            expired += 1
+        if expired:
+            self._stats["ttl_evictions"] += expired
+            CONVERSATION_EVICTIONS.inc(expired, store=self.store_name, reason="ttl")
+
+    def append(self, session_id: str, messages: Sequence[Message]):
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = self._sessions[session_id] = _Session()
+            self._sessions.move_to_end(session_id)
+            session.touched_at = now
+            session.messages.extend(self._bounded(message) for message in messages)
+
+            trimmed = len(session.messages) - self.max_messages
+            if trimmed > 0:
+                del session.messages[:trimmed]
+                self._stats["trimmed_messages"] += trimmed
+                CONVERSATION_MESSAGES_TRIMMED.inc(trimmed, store=self.store_name)
+
+            evicted = 0
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+                evicted += 1
+            if evicted:
+                self._stats["capacity_evictions"] += evicted
+                CONVERSATION_EVICTIONS.inc(evicted, store=self.store_name, reason="capacity")
+
+    def history(self, session_id: str) -> List[Message]:
+        with self._lock:
+            self._expire(time.time())
+            session = self._sessions.get(session_id)
+            if session is None:
+                return []
+            self._sessions.move_to_end(session_id)
+            return list(session.messages)
+
+    def clear(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"store": self.store_name, "sessions": len(self._sessions), **self._stats}
+
+    def session_count(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+
+class SQLConversationStore(ConversationStore):
+    """
+    Store shared by every worker pointed at the same database.
+
+    Any SQLAlchemy URL works; SQLite suits a single host, PostgreSQL several.
+    Messages live in one table indexed by session. Trimming happens on every
+    append; expired and over-capacity sessions (by last message time) are
+    swept at most every ``sweep_interval`` seconds by whichever worker
+    appends next. Sweeps and ``stats`` also refresh the cached session count
+    that ``session_count`` returns, so scraping it never queries the database.
+    """
+
+    store_name = "sql"
+
+    def __init__(self, url: str, sweep_interval: float = 60.0, **limits):
+        super().__init__(**limits)
+        self.sweep_interval = sweep_interval
+        self._swept_at = 0.0
+        self._stats_lock = threading.Lock()
+        self._stats = {"capacity_evictions": 0, "ttl_evictions": 0, "trimmed_messages": 0}
+        self._sessions = 0
+
+        self.engine = self._create_engine(url)
+        metadata = MetaData()
+        self.messages = Table(
+            "conversation_messages",
+            metadata,
+            Column("id", Integer, primary_key=True, autoincrement=True),
+            Column("session_id", String(128), nullable=False),
+            Column("role", String(32), nullable=False),
+            Column("content", Text, nullable=False),
+            Column("timestamp", String(64), nullable=False),
+            Column("created_at", Float, nullable=False),
+            Index("ix_conversation_messages_session", "session_id", "id"),
+        )
+        metadata.create_all(self.engine)
+        with self.engine.connect() as connection:
+            self._sessions = self._count_sessions(connection)
+        logger.info(f"Conversation store at {self.engine.url.render_as_string(hide_password=True)}")
+
+    @staticmethod
+    def _create_engine(url: str):
+        parsed = make_url(url)
+        if parsed.get_backend_name() != "sqlite":
+            return create_engine(url, pool_pre_ping=True)
+        database = parsed.database
+        # No database (sqlite://) and ":memory:" both mean an in-memory database
+        if database and database != ":memory:":
+            directory = os.path.dirname(database)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        engine = create_engine(url, connect_args={"check_same_thread": False})
+
+        @event.listens_for(engine, "connect")
+        def _configure(connection, _):
+            # Readers do not block the writer, and concurrent writers wait instead of failing
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA busy_timeout=5000")
+
+        return engine
+
+    def _count(self, key: str, amount: int, reason: Optional[str] = None):
+        if amount <= 0:
+            return
+        with self._stats_lock:
+            self._stats[key] += amount
+        if reason:
+            CONVERSATION_EVICTIONS.inc(amount, store=self.store_name, reason=reason)
+        else:
+            CONVERSATION_MESSAGES_TRIMMED.inc(amount, store=self.store_name)
+
+    def append(self, session_id: str, messages: Sequence[Message]):
+        now = time.time()
+        table = self.messages
+        rows = [
+            {
+                "session_id": session_id,
+                "role": message["role"],
+                "content": message["content"],
+                "timestamp": message.get("timestamp", ""),
+                "created_at": now,
+            }
+            for message in map(self._bounded, messages)
+        ]
+        if not rows:
+            return
+        with self.engine.begin() as connection:
+            connection.execute(table.insert(), rows)
+            # Id of the newest message past the cap; it and everything older go
+            boundary = connection.execute(
+                select(table.c.id)
+                .where(table.c.session_id == session_id)
+                .order_by(table.c.id.desc())
+                .offset(self.max_messages)
+                .limit(1)
+            ).scalar()
+            if boundary is not None:
+                result = connection.execute(
+                    table.delete().where(table.c.session_id == session_id, table.c.id <= boundary)
+                )
+                self._count("trimmed_messages", result.rowcount)
+
+        if now - self._swept_at >= self.sweep_interval:
+            self._swept_at = now
+            self.sweep(now)
+
+    def sweep(self, now: Optional[float] = None):
+        """Delete expired sessions, then the least recently active ones over ``max_sessions``"""
+        now = now or time.time()
+        table = self.messages
+        last_active = func.max(table.c.created_at)
+        with self.engine.begin() as connection:
+            expired = connection.execute(
+                select(table.c.session_id).group_by(table.c.session_id).having(last_active < now - self.ttl_seconds)
+            ).scalars().all()
+            overflow = connection.execute(
+                select(table.c.session_id)
+                .group_by(table.c.session_id)
+                .having(last_active >= now - self.ttl_seconds)
+                .order_by(last_active.desc())
+                .offset(self.max_sessions)
+            ).scalars().all()
+            doomed = expired + overflow
+            for start in range(0, len(doomed), 500):
+                connection.execute(table.delete().where(table.c.session_id.in_(doomed[start:start + 500])))
+            self._sessions = self._count_sessions(connection)
+        self._count("ttl_evictions", len(expired), "ttl")
+        self._count("capacity_evictions", len(overflow), "capacity")
+
+    def history(self, session_id: str) -> List[Message]:
+        table = self.messages
+        with self.engine.connect() as connection:
+            rows = connection.execute(
+                select(table.c.role, table.c.content, table.c.timestamp, table.c.created_at)
+                .where(table.c.session_id == session_id)
+                .order_by(table.c.id)
+            ).all()
+        # Expired but not yet swept
+        if not rows or rows[-1].created_at < time.time() - self.ttl_seconds:
+            return []
+        return [{"role": row.role, "content": row.content, "timestamp": row.timestamp} for row in rows]
+
+    def clear(self, session_id: str):
+        with self.engine.begin() as connection:
+            connection.execute(self.messages.delete().where(self.messages.c.session_id == session_id))
+
+    def _count_sessions(self, connection) -> int:
+        return connection.execute(select(func.count(func.distinct(self.messages.c.session_id)))).scalar() or 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self.engine.connect() as connection:
+            self._sessions = self._count_sessions(connection)
+        with self._stats_lock:
+            return {"store": self.store_name, "sessions": self._sessions, **self._stats}
+
+    def session_count(self) -> int:
+        return self._sessions
+
+
+def create_conversation_store(url: Optional[str] = None) -> ConversationStore:
+    """The store configured in settings: SQL when a URL is set, in-memory otherwise"""
+    url = url or settings.conversation_store_url
+    limits = {
+        "max_sessions": settings.conversation_max_sessions,
+        "max_messages": settings.conversation_max_messages,
+        "max_message_chars": settings.conversation_max_message_chars,
+        "ttl_seconds": settings.conversation_ttl_seconds,
+    }
+    if url:
+        return SQLConversationStore(url, **limits)
+    return InMemoryConversationStore(**limits)
@@ -0,0 +1,88 @@
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from crewai import Crew
+
+logger = logging.getLogger(__name__)
+
+
+class _StepCounter:
+    """Agent step callback counting steps; each agent step is one LLM response"""
+
+    def __init__(self):
+        self.steps = 0
+
+    def __call__(self, step: Any):
+        self.steps += 1
+
+
+class CrewTemplate:
+    """
+    A crew built once and reused across requests.
+
+    Task descriptions contain ``{placeholders}`` that CrewAI fills in from the
+    ``inputs`` passed to ``kickoff``, so per-request work is only the
+    interpolation. Kickoff mutates the crew while it runs, so concurrent
+    callers each get their own instance: idle instances are kept in a small
+    pool and another one is built only when all are busy. New instances come
+    from ``build``, never from copying a crew, which may be mid-kickoff with
+    another request's inputs filled in.
+    """
+
+    def __init__(self, name: str, build: Callable[[], Crew], max_idle: int = 4):
+        self.name = name
+        self.max_idle = max_idle
+        self._build = build
+        self._idle: List[Crew] = [build()]
+        self._lock = threading.Lock()
+        self._extra = 0
+
+    def _acquire(self) -> Crew:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+            self._extra += 1
+        logger.info(f"All '{self.name}' crews busy; building another instance")
+        return self._build()
+
+    def _release(self, crew: Crew):
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(crew)
+
+    @contextmanager
+    def checkout(self) -> Iterator[Crew]:
+        """An instance for the caller's exclusive use, returned to the pool afterwards"""
+        crew = self._acquire()
+        try:
+            yield crew
+        finally:
+            self._release(crew)
+
+    def kickoff(self, **inputs: Any) -> Any:
+        """Run the crew with the given placeholder values"""
+        return self.kickoff_with_usage(**inputs)[0]
+    
+    def kickoff_with_usage(self, **inputs: Any) -> Tuple[Any, int]:
+        """
+        Run the crew and also return how many LLM requests it made.
+        
+        Requests are counted through the agents' public ``step_callback``,
+        which CrewAI calls once per agent step, i.e. per LLM response the
+        agent acted on. Responses CrewAI retries internally (e.g. unparsable
+        output) are not counted. An instance is only used by one caller at a
+        time, so each run gets its own counter; the template owns the step
+        callback of its agents.
+        """
+        counter = _StepCounter()
+        with self.checkout() as crew:
+            for agent in crew.agents:
+                agent.step_callback = counter
+            output = crew.kickoff(inputs=inputs)
+        return output, counter.steps
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"idle": len(self._idle), "extra_instances_built": self._extra}
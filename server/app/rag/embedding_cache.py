@@ -0,0 +1,162 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ..core.config import settings
+from ..core.metrics import EMBEDDING_CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+# SQLite caps the number of bound parameters per statement
+_SQL_BATCH = 500
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache of embedding vectors keyed by (model, text hash).
+
+    A bounded in-memory LRU sits in front of an optional SQLite table that
+    stores each vector as a float32 blob, so embeddings survive restarts and
+    are shared by every embedder pointed at the same file. Vectors are
+    returned as float32 NumPy arrays.
+    """
+
+    def __init__(self, max_entries: int = 10000, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.path = path
+
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._open_store(path)
+
+    def _open_store(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            ) WITHOUT ROWID
+            """
+        )
+        self._db.commit()
+        count = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        logger.info(f"Embedding cache at {path} holds {count} vectors")
+
+    def _remember(self, key: Tuple[str, str], vector: np.ndarray):
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[np.ndarray]]:
+        """Cached vectors for the texts, with ``None`` where a text has not been embedded"""
+        hashes = [text_hash(text) for text in texts]
+        results: List[Optional[np.ndarray]] = [None] * len(texts)
+        missing: Dict[str, List[int]] = {}
+        memory_hits = disk_hits = 0
+
+        with self._lock:
+            for position, digest in enumerate(hashes):
+                vector = self._entries.get((model, digest))
+                if vector is not None:
+                    self._entries.move_to_end((model, digest))
+                    results[position] = vector
+                    memory_hits += 1
+                else:
+                    missing.setdefault(digest, []).append(position)
+
+            if missing and self._db is not None:
+                digests = list(missing)
+                for start in range(0, len(digests), _SQL_BATCH):
+                    batch = digests[start:start + _SQL_BATCH]
+                    rows = self._db.execute(
+                        f"SELECT text_hash, vector FROM embeddings WHERE model = ? "
+                        f"AND text_hash IN ({','.join('?' * len(batch))})",
+                        (model, *batch)
+                    ).fetchall()
+                    for digest, blob in rows:
+                        vector = np.frombuffer(blob, dtype=np.float32)
+                        self._remember((model, digest), vector)
+                        for position in missing.pop(digest):
+                            results[position] = vector
+                            disk_hits += 1
+
+            misses = sum(len(positions) for positions in missing.values())
+            self._stats["memory_hits"] += memory_hits
+            self._stats["disk_hits"] += disk_hits
+            self._stats["misses"] += misses
+
+        if memory_hits:
+            EMBEDDING_CACHE_LOOKUPS.inc(memory_hits, result="memory_hit")
+        if disk_hits:
+            EMBEDDING_CACHE_LOOKUPS.inc(disk_hits, result="disk_hit")
+        if misses:
+            EMBEDDING_CACHE_LOOKUPS.inc(misses, result="miss")
+        return results
+
+    def put_many(self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]):
+        rows = []
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                digest = text_hash(text)
+                array = np.asarray(vector, dtype=np.float32)
+                self._remember((model, digest), array)
+                rows.append((model, digest, array.tobytes()))
+            if self._db is not None and rows:
+                self._db.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)", rows)
+                self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM embeddings")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["memory_hits"] + stats["disk_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+
+_default_cache: Optional[EmbeddingCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def default_embedding_cache() -> Optional[EmbeddingCache]:
+    """The process-wide embedding cache configured in settings, or None when disabled"""
+    global _default_cache
+    if not settings.embedding_cache_enabled:
+        return None
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = EmbeddingCache(
+                max_entries=settings.embedding_cache_max_entries,
+                path=settings.embedding_cache_path
+            )
+        return _default_cache
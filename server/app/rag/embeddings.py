@@ -0,0 +1,81 @@
+import threading
+from typing import List, Optional
+
+import requests
+
+from .embedding_cache import EmbeddingCache
+
+
+class OllamaBatchEmbedder:
+    """
+    Ollama embeddings that send a whole batch of texts in one request.
+
+    LangChain's ``OllamaEmbeddings.embed_documents`` makes one HTTP round trip
+    per text; this uses Ollama's ``/api/embed`` endpoint, which accepts a list.
+    The same ``passage: `` / ``query: `` prefixes are applied, so vectors match
+    those produced by ``OllamaEmbeddings`` for the same model.
+
+    With an ``EmbeddingCache`` only texts not embedded before (by this model,
+    with the same prefix) are sent to Ollama.
+    """
+
+    def __init__(
+        self,
+        model: str = "nomic-embed-text",
+        base_url: str = "http://localhost:11434",
+        timeout: float = 120.0,
+        document_prefix: str = "passage: ",
+        query_prefix: str = "query: ",
+        cache: Optional[EmbeddingCache] = None
+    ):
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.document_prefix = document_prefix
+        self.query_prefix = query_prefix
+        self.cache = cache
+        # One pooled HTTP session per thread; sessions are not thread-safe
+        self._local = threading.local()
+
+    def _session(self) -> requests.Session:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def _request(self, inputs: List[str]) -> List[List[float]]:
+        response = self._session().post(
+            f"{self.base_url}/api/embed",
+            json={"model": self.model, "input": inputs},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        embeddings = response.json()["embeddings"]
+        if len(embeddings) != len(inputs):
+            raise ValueError(f"Ollama returned {len(embeddings)} embeddings for {len(inputs)} inputs")
+        return embeddings
+
+    def _embed(self, inputs: List[str]) -> List[List[float]]:
+        if not inputs:
+            return []
+        if self.cache is None:
+            return self._request(inputs)
+
+        cached = self.cache.get_many(self.model, inputs)
+        # Each distinct uncached input is embedded once, even if repeated in the batch
+        missing = list(dict.fromkeys(text for text, vector in zip(inputs, cached) if vector is None))
+        if missing:
+            fresh = dict(zip(missing, self._request(missing)))
+            self.cache.put_many(self.model, missing, [fresh[text] for text in missing])
+        else:
+            fresh = {}
+        return [
+            vector.tolist() if vector is not None else fresh[text]
+            for text, vector in zip(inputs, cached)
+        ]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._embed([f"{self.document_prefix}{text}" for text in texts])
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed([f"{self.query_prefix}{text}"])[0]
@@ -0,0 +1,55 @@
+import logging
+import time
+from concurrent.futures import Executor, wait
+from typing import Any, Callable, Dict, List, Tuple
+
+from ..core.metrics import RAG_SPECIALIST_OUTCOMES
+
+logger = logging.getLogger(__name__)
+
+
+def run_with_deadline(
+    executor: Executor,
+    jobs: Dict[str, Callable[[], Any]],
+    timeout: float
+) -> Tuple[Dict[str, Any], Dict[str, float], List[str]]:
+    """
+    Run named jobs concurrently and collect whatever finishes before the deadline.
+
+    Returns ``(results, durations, timed_out)``: results of the jobs that
+    completed successfully, how long each completed job took in seconds, and
+    the names of jobs still running at the deadline. Failed jobs are logged
+    and left out of the results. Timed-out jobs cannot be interrupted; they
+    finish in the background and their results are discarded.
+    """
+    if not jobs:
+        return {}, {}, []
+
+    def timed(job: Callable[[], Any]) -> Tuple[Any, float]:
+        started = time.perf_counter()
+        result = job()
+        return result, time.perf_counter() - started
+
+    futures = {executor.submit(timed, job): name for name, job in jobs.items()}
+    done, pending = wait(futures, timeout=timeout)
+
+    results: Dict[str, Any] = {}
+    durations: Dict[str, float] = {}
+    for future in done:
+        name = futures[future]
+        try:
+            results[name], durations[name] = future.result()
+            RAG_SPECIALIST_OUTCOMES.inc(specialist=name, outcome="completed")
+        except Exception as e:
+            logger.error(f"Specialist '{name}' failed: {e}")
+            RAG_SPECIALIST_OUTCOMES.inc(specialist=name, outcome="failed")
+
+    timed_out = []
+    for future in pending:
+        name = futures[future]
+        future.cancel()
+        timed_out.append(name)
+        RAG_SPECIALIST_OUTCOMES.inc(specialist=name, outcome="timed_out")
+        logger.warning(f"Specialist '{name}' missed the {timeout}s deadline; continuing without it")
+
+    return results, durations, timed_out
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class OllamaHealthProbe:
+    """
+    Cheap, cached reachability checks for the Ollama server.
+
+    ``ping`` hits the model listing endpoint at most once per ``ttl`` seconds no
+    matter how often probes arrive; concurrent callers share the cached answer.
+    ``deep_check`` runs a one-token generation and is meant to be scheduled in
+    the background with ``run_deep_checks`` so probes only read its last result.
+    ``warm_up`` loads the model ahead of the first chat. Generations send
+    ``keep_alive`` so they also keep the model loaded.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        ttl: float = 10.0,
+        timeout: float = 2.0,
+        deep_check_timeout: float = 60.0,
+        keep_alive: Optional[str] = None
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.ttl = ttl
+        self.timeout = timeout
+        self.deep_check_timeout = deep_check_timeout
+        self.keep_alive = keep_alive
+        self._lock = threading.Lock()
+        self._last_ping: Optional[Dict[str, Any]] = None
+        self._last_ping_at = 0.0
+        self._last_deep_check: Optional[Dict[str, Any]] = None
+        self._last_warm_up: Optional[Dict[str, Any]] = None
+
+    def ping(self) -> Dict[str, Any]:
+        """Return whether Ollama is reachable and serving the configured model"""
+        now = time.monotonic()
+        if self._last_ping is not None and now - self._last_ping_at < self.ttl:
+            return self._last_ping
+
+        # Only one caller refreshes; the rest keep getting the cached result
+        if not self._lock.acquire(blocking=False):
+            return self._last_ping or {"reachable": False, "detail": "check in progress"}
+        try:
+            started = time.perf_counter()
+            try:
+                response = requests.get(f"{self.base_url}/api/tags", timeout=self.timeout)
+                response.raise_for_status()
+                models = [model.get("name", "") for model in response.json().get("models", [])]
+                result = {
+                    "reachable": True,
+                    "model_available": self.model in models or f"{self.model}:latest" in models,
+                    "latency_ms": round((time.perf_counter() - started) * 1000, 2)
+                }
+            except Exception as e:
+                result = {"reachable": False, "detail": str(e)}
+            result["checked_at"] = time.time()
+            self._last_ping = result
+            self._last_ping_at = time.monotonic()
+            return result
+        finally:
+            self._lock.release()
+
+    def _generate_one_token(self, prompt: str) -> Dict[str, Any]:
+        payload = {"model": self.model, "prompt": prompt, "stream": False, "options": {"num_predict": 1}}
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        response = requests.post(f"{self.base_url}/api/generate", json=payload, timeout=self.deep_check_timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def warm_up(self, prompt: str = "") -> Dict[str, Any]:
+        """
+        Load the model into Ollama before the first chat needs it. A ``prompt``
+        (the static start of the chat prompts) also primes Ollama's prompt
+        cache, so the first real request only evaluates what follows it.
+        """
+        started = time.perf_counter()
+        try:
+            body = self._generate_one_token(prompt)
+            result = {
+                "ok": True,
+                "load_ms": round(body.get("load_duration", 0) / 1e6, 2),
+                "prompt_tokens": body.get("prompt_eval_count", 0)
+            }
+            logger.info(f"Warmed up Ollama model {self.model} (load {result['load_ms']} ms)")
+        except Exception as e:
+            logger.warning(f"Ollama warm-up failed: {e}")
+            result = {"ok": False, "detail": str(e)}
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        result["checked_at"] = time.time()
+        self._last_warm_up = result
+        return result
+
+    @property
+    def last_warm_up(self) -> Optional[Dict[str, Any]]:
+        return self._last_warm_up
+
+    def deep_check(self) -> Dict[str, Any]:
+        """Run a tiny generation to prove the model can actually answer"""
+        started = time.perf_counter()
+        try:
+            self._generate_one_token("ping")
+            result = {"ok": True}
+        except Exception as e:
+            logger.warning(f"Ollama deep health check failed: {e}")
+            result = {"ok": False, "detail": str(e)}
+        result["latency_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        result["checked_at"] = time.time()
+        self._last_deep_check = result
+        return result
+
+    @property
+    def last_deep_check(self) -> Optional[Dict[str, Any]]:
+        return self._last_deep_check
+
+    async def run_deep_checks(self, interval: float):
+        """Periodically refresh the deep check result until cancelled"""
+        while True:
+            await asyncio.to_thread(self.deep_check)
+            await asyncio.sleep(interval)
@@ -0,0 +1,213 @@
+import hashlib
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from ..core.metrics import INGESTED_CHUNKS
+from .vector_store import VectorStore, save_store
+
+logger = logging.getLogger(__name__)
+
+
+def chunk_id(source: str, index: int, text: str) -> str:
+    """Deterministic chunk id, so re-ingesting or retrying overwrites instead of duplicating"""
+    return hashlib.sha256(f"{source}\0{index}\0{text}".encode("utf-8")).hexdigest()[:32]
+
+
+@dataclass
+class IngestionReport:
+    """Outcome of one ingestion run"""
+
+    chunks: int
+    written: int
+    batches: int
+    failed_batches: int
+    retries: int
+    seconds: float
+
+    @property
+    def chunks_per_second(self) -> float:
+        return self.written / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.failed_batches == 0 and self.written == self.chunks
+
+    def __str__(self) -> str:
+        return (
+            f"{self.written}/{self.chunks} chunks in {self.seconds:.2f}s "
+            f"({self.chunks_per_second:.1f} chunks/s, {self.batches} batches, "
+            f"{self.retries} retries, {self.failed_batches} failed)"
+        )
+
+
+class BatchIngestor:
+    """
+    Embeds chunks in batches with bounded concurrency and writes them in bulk.
+
+    Up to ``max_concurrency`` embedding requests of ``batch_size`` texts are in
+    flight at once. Embedded batches are buffered and written to the vector
+    store ``flush_size`` chunks at a time. Failed embedding calls and writes
+    are retried with exponential backoff; chunk ids are deterministic and the
+    store replaces existing ids, so a retried write never duplicates rows.
+    """
+
+    def __init__(
+        self,
+        vector_store: VectorStore,
+        embedder: Any,
+        batch_size: int = 32,
+        max_concurrency: int = 4,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+        flush_size: int = 1024
+    ):
+        self.vector_store = vector_store
+        self.embedder = embedder
+        self.batch_size = max(1, batch_size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.flush_size = max(1, flush_size)
+
+    def _with_retries(self, description: str, fn, *args) -> Tuple[Any, int]:
+        """Call fn, retrying on failure; returns the result and how many retries it took"""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return fn(*args), attempt
+            except Exception as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = self.retry_backoff * (2 ** attempt)
+                logger.warning(f"{description} failed ({e}); retrying in {delay:.1f}s")
+                time.sleep(delay)
+
+    def ingest(
+        self,
+        texts: Sequence[str],
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+        ids: Optional[Sequence[str]] = None,
+        save: bool = True
+    ) -> IngestionReport:
+        """
+        Embed and store chunks; ids default to a hash of source, position and
+        text. The store is saved once at the end unless ``save`` is False.
+        """
+        started = time.perf_counter()
+        texts = list(texts)
+        metadatas = list(metadatas) if metadatas is not None else [{} for _ in texts]
+        if ids is None:
+            ids = [
+                chunk_id(str(metadata.get("source", "")), index, text)
+                for index, (text, metadata) in enumerate(zip(texts, metadatas))
+            ]
+        ids = list(ids)
+
+        batches = [(start, min(start + self.batch_size, len(texts))) for start in range(0, len(texts), self.batch_size)]
+        written = failed_batches = retries = 0
+        buffer: List[Tuple[int, int, List[List[float]]]] = []
+
+        def flush():
+            nonlocal written, retries, failed_batches
+            if not buffer:
+                return
+            rows = [(row, embedding) for start, _, embeddings in buffer for row, embedding in enumerate(embeddings, start)]
+            try:
+                _, attempts = self._with_retries(
+                    "Vector store write",
+                    self.vector_store.add,
+                    [embedding for _, embedding in rows],
+                    [texts[row] for row, _ in rows],
+                    [metadatas[row] for row, _ in rows],
+                    [ids[row] for row, _ in rows]
+                )
+                retries += attempts
+                written += len(rows)
+            except Exception as e:
+                logger.error(f"Giving up on writing {len(rows)} chunks to the vector store: {e}")
+                failed_batches += len(buffer)
+            buffer.clear()
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="embed") as executor:
+            futures = {
+                executor.submit(
+                    self._with_retries, f"Embedding batch {start}-{end}", self.embedder.embed_documents, texts[start:end]
+                ): (start, end)
+                for start, end in batches
+            }
+            for future in as_completed(futures):
+                start, end = futures[future]
+                try:
+                    embeddings, attempts = future.result()
+                except Exception as e:
+                    logger.error(f"Giving up on embedding batch {start}-{end}: {e}")
+                    failed_batches += 1
+                    continue
+                retries += attempts
+                buffer.append((start, end, embeddings))
+                if sum(end - start for start, end, _ in buffer) >= self.flush_size:
+                    flush()
+            flush()
+
+        report = IngestionReport(
+            chunks=len(texts),
+            written=written,
+            batches=len(batches),
+            failed_batches=failed_batches,
+            retries=retries,
+            seconds=time.perf_counter() - started
+        )
+        if save and written:
+            save_store(self.vector_store)
+        INGESTED_CHUNKS.inc(written, outcome="written")
+        if written < len(texts):
+            INGESTED_CHUNKS.inc(len(texts) - written, outcome="failed")
+        logger.info(f"Ingested {report}")
+        return report
+
+    def ingest_stream(
+        self,
+        chunks: Iterable[Tuple[str, Dict[str, Any]]],
+        window: int = 1024,
+        save: bool = True
+    ) -> IngestionReport:
+        """
+        Ingest ``(text, metadata)`` pairs from an iterator ``window`` chunks at a
+        time, so a long document never has to be fully chunked in memory. The
+        store is saved once after the last window, not after each one.
+        """
+        started = time.perf_counter()
+        totals = IngestionReport(chunks=0, written=0, batches=0, failed_batches=0, retries=0, seconds=0.0)
+        position = 0
+        texts: List[str] = []
+        metadatas: List[Dict[str, Any]] = []
+        ids: List[str] = []
+
+        def drain():
+            if not texts:
+                return
+            report = self.ingest(texts, metadatas, ids, save=False)
+            totals.chunks += report.chunks
+            totals.written += report.written
+            totals.batches += report.batches
+            totals.failed_batches += report.failed_batches
+            totals.retries += report.retries
+            texts.clear()
+            metadatas.clear()
+            ids.clear()
+
+        for text, metadata in chunks:
+            # Ids use the position in the whole stream, as a single ingest() call would
+            texts.append(text)
+            metadatas.append(metadata)
+            ids.append(chunk_id(str(metadata.get("source", "")), position, text))
+            position += 1
+            if len(texts) >= window:
+                drain()
+        drain()
+        if save and totals.written:
+            save_store(self.vector_store)
+        totals.seconds = time.perf_counter() - started
+        return totals
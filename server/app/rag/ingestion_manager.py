@@ -0,0 +1,249 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from .ingestion import BatchIngestor, IngestionReport
+from .pdf_index import extract_chunks, file_sha256, split_text
+from .vector_store import VectorStore, save_store
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+# A chunker turns a file into (text, metadata) pairs
+Chunk = Tuple[str, Dict[str, Any]]
+Chunker = Callable[[str], List[Chunk]]
+
+
+def content_id(text: str) -> str:
+    """Chunk id derived from the text alone, so identical chunks share one vector"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:32]
+
+
+def default_chunker(path: str) -> List[Chunk]:
+    """PDFs are chunked per page (with page numbers); text files as plain text"""
+    if path.lower().endswith(".pdf"):
+        return [(chunk.text, {"page": chunk.page}) for chunk in extract_chunks(path)]
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return [(chunk, {}) for chunk in split_text(f.read(), chunk_size=1000, overlap=200)]
+
+
+@dataclass
+class SyncReport:
+    """What a directory sync found and did"""
+
+    files: int = 0
+    unchanged: int = 0
+    changed: int = 0
+    duplicates: int = 0
+    removed: int = 0
+    chunks_embedded: int = 0
+    chunks_reused: int = 0
+    chunks_deleted: int = 0
+    seconds: float = 0.0
+    ingestion: Optional[IngestionReport] = None
+    errors: List[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors and (self.ingestion is None or self.ingestion.ok)
+
+
+class IngestionManager:
+    """
+    Keeps a vector store in sync with a directory of documents.
+
+    A JSON manifest records each file's size, mtime, content hash and the ids of
+    its chunks. Chunk ids are hashes of the chunk text, so:
+
+    - files whose size and mtime are unchanged are skipped without hashing,
+      and a touched file whose content hash is unchanged is not re-chunked;
+    - byte-identical files (and identical chunks across files) are embedded once;
+    - a changed file only has its new chunks embedded, since unchanged chunks
+      keep their ids;
+    - chunks no longer referenced by any file, e.g. from deleted files, are
+      deleted from the store;
+    - a changed file whose new chunks were not all embedded keeps its previous
+      entry and chunks until a later sync embeds the new version.
+
+    A restart with no changes therefore does no chunking and no embedding.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        vector_store: VectorStore,
+        ingestor: BatchIngestor,
+        manifest_path: str,
+        extensions: Tuple[str, ...] = (".pdf", ".txt", ".md"),
+        chunker: Chunker = default_chunker
+    ):
+        self.directory = directory
+        self.vector_store = vector_store
+        self.ingestor = ingestor
+        self.manifest_path = manifest_path
+        self.extensions = tuple(extension.lower() for extension in extensions)
+        self.chunker = chunker
+        self._lock = threading.Lock()
+        self.manifest = self._load_manifest()
+
+    # Manifest
+
+    def _empty_manifest(self) -> Dict[str, Any]:
+        return {"version": MANIFEST_VERSION, "files": {}, "pending": []}
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return self._empty_manifest()
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable ingestion manifest {self.manifest_path}: {e}")
+            return self._empty_manifest()
+        if manifest.get("version") != MANIFEST_VERSION:
+            return self._empty_manifest()
+        # A manifest describing chunks the store no longer has would skip work that is needed
+        if manifest["files"] and self.vector_store.count() == 0:
+            logger.warning("Vector store is empty but the manifest is not; re-ingesting everything")
+            return self._empty_manifest()
+        return manifest
+
+    def _save_manifest(self):
+        directory = os.path.dirname(self.manifest_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{self.manifest_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=1)
+        os.replace(temp_path, self.manifest_path)
+
+    # Sync
+
+    def _scan(self) -> Dict[str, os.stat_result]:
+        found = {}
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.lower().endswith(self.extensions):
+                    path = os.path.join(root, name)
+                    found[os.path.relpath(path, self.directory)] = os.stat(path)
+        return found
+
+    def sync(self) -> SyncReport:
+        """Bring the vector store in line with the directory's current contents"""
+        with self._lock:
+            return self._sync()
+
+    def _sync(self) -> SyncReport:
+        started = time.perf_counter()
+        report = SyncReport()
+        previous: Dict[str, Dict[str, Any]] = self.manifest["files"]
+        current: Dict[str, Dict[str, Any]] = {}
+        pending: Dict[str, Tuple[str, Dict[str, Any]]] = {}  # chunk id -> (text, metadata) to embed
+        pending_files: Dict[str, Set[str]] = {}  # file -> chunk ids it is waiting on
+
+        scanned = self._scan()
+        report.files = len(scanned)
+        known_chunks = {chunk for entry in previous.values() for chunk in entry["chunks"]}
+        by_hash = {entry["sha256"]: entry["chunks"] for entry in previous.values()}
+
+        for name in sorted(scanned):
+            stat = scanned[name]
+            entry = previous.get(name)
+            if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+                current[name] = entry
+                report.unchanged += 1
+                continue
+
+            path = os.path.join(self.directory, name)
+            try:
+                digest = file_sha256(path)
+            except OSError as e:
+                report.errors.append(f"{name}: {e}")
+                continue
+            stamp = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+
+            if entry and entry["sha256"] == digest:
+                current[name] = {**stamp, "chunks": entry["chunks"]}
+                report.unchanged += 1
+                continue
+            if digest in by_hash:
+                # Byte-identical to a file already indexed (or seen earlier in this scan)
+                current[name] = {**stamp, "chunks": by_hash[digest]}
+                pending_files[name] = {chunk for chunk in by_hash[digest] if chunk in pending}
+                report.duplicates += 1
+                continue
+
+            try:
+                chunks = self.chunker(path)
+            except Exception as e:
+                report.errors.append(f"{name}: {e}")
+                continue
+            report.changed += 1
+
+            chunk_ids: List[str] = []
+            seen: Set[str] = set()
+            for index, (text, metadata) in enumerate(chunks):
+                chunk = content_id(text)
+                if chunk in seen:
+                    continue
+                seen.add(chunk)
+                chunk_ids.append(chunk)
+                if chunk in known_chunks:
+                    report.chunks_reused += 1
+                elif chunk not in pending:
+                    pending[chunk] = (text, {"source": name, "chunk_id": index, **metadata})
+            current[name] = {**stamp, "chunks": chunk_ids}
+            by_hash[digest] = chunk_ids
+            pending_files[name] = {chunk for chunk in chunk_ids if chunk in pending}
+
+        if pending:
+            ids = list(pending)
+            report.ingestion = self.ingestor.ingest(
+                [pending[chunk][0] for chunk in ids],
+                [pending[chunk][1] for chunk in ids],
+                ids,
+                save=False
+            )
+            report.chunks_embedded = report.ingestion.written
+            if not report.ingestion.ok:
+                # Keep the previous version of files with missing chunks (or leave
+                # new files out) so the next sync retries them
+                for name, waiting in pending_files.items():
+                    if waiting:
+                        if name in previous:
+                            current[name] = previous[name]
+                        else:
+                            current.pop(name, None)
+                        report.errors.append(f"{name}: not all chunks were embedded")
+
+        report.removed = len(set(previous) - set(scanned))
+        referenced = {chunk for entry in current.values() for chunk in entry["chunks"]}
+        # Chunks written for a file whose embedding did not finish belong to no
+        # file yet; they are recorded so a later sync deletes them if still unused
+        unfinished = [chunk for chunk in pending if chunk not in referenced]
+        stale = [
+            chunk for chunk in known_chunks.union(self.manifest.get("pending", []))
+            if chunk not in referenced and chunk not in pending
+        ]
+        if stale:
+            report.chunks_deleted = self.vector_store.delete(stale)
+        # One save for the whole sync, written before the manifest that describes it
+        if report.chunks_embedded or report.chunks_deleted:
+            save_store(self.vector_store)
+
+        self.manifest["files"] = current
+        self.manifest["pending"] = unfinished
+        self._save_manifest()
+        report.seconds = time.perf_counter() - started
+        logger.info(
+            f"Synced {self.directory}: {report.files} files ({report.unchanged} unchanged, {report.changed} changed, "
+            f"{report.duplicates} duplicates, {report.removed} removed), {report.chunks_embedded} chunks embedded, "
+            f"{report.chunks_reused} reused, {report.chunks_deleted} deleted in {report.seconds:.2f}s"
+        )
+        return report
@@ -1,15 +1,18 @@
 import os
 import uuid
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable, Tuple
 from datetime import datetime
 import logging
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 # Set dummy OpenAI API key for CrewAI tools (even when using Ollama)
 os.environ.setdefault("OPENAI_API_KEY", "dummy-key-for-ollama")
 
 # CrewAI imports
-from crewai import Agent, Task, Crew, Process
+from crewai import Agent, Task, Crew, Process, LLM
 from crewai_tools import (
     CSVSearchTool,
     PDFSearchTool,
@@ -24,10 +27,27 @@ from crewai.rag.chromadb.config import ChromaDBConfig
 # LLM imports
 from langchain_community.llms import Ollama
 
+from ..core.config import settings
+from ..core.metrics import RAG_LLM_CALLS
+from .results import ChatResult
+from .fanout import run_with_deadline
+from .crew_templates import CrewTemplate
+from .query_router import QueryRouter
+from .conversation_store import ConversationStore, create_conversation_store
+from .context_packer import ContextPacker, PackedContext, Snippet, prompt_budget
+from .prompts import NO_CONTEXT_RESPONSE, SYNTHESIS_INSTRUCTIONS
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# "crew" lets each agent drive its tools through the ReAct loop; "direct" calls
+# the search tools itself and makes a single synthesis LLM call
+EXECUTION_MODES = ("crew", "direct")
+
+# Label in front of the conversation history in every prompt
+HISTORY_HEADER = "Recent conversation:\n"
+
 
 class MultiAgentRAGSystem:
     """Multi-agent RAG system with specialized agents for different file types"""
@@ -36,11 +56,37 @@ class MultiAgentRAGSystem:
         self,
         ollama_model: str = "llama3.2:1b",
         rag_context_path: str = "./RAG_context",
-        collection_name: str = "multi_agent_rag"
+        collection_name: str = "multi_agent_rag",
+        specialist_timeout: float = 60.0,
+        fanout_workers: int = 6,
+        execution_mode: Optional[str] = None,
+        query_router: Optional[QueryRouter] = None,
+        conversation_store: Optional[ConversationStore] = None
     ):
         self.ollama_model = f"ollama/{ollama_model}"
+        self.model_name = ollama_model
         self.rag_context_path = rag_context_path
         self.collection_name = collection_name
+        self.execution_mode = self._resolve_mode(execution_mode or settings.multi_agent_execution_mode)
+        # Decides which specialist tasks a question needs
+        self.router = query_router or QueryRouter.from_file(settings.query_routes_path)
+        
+        # Used for the single synthesis call in direct mode
+        self.llm = Ollama(
+            model=ollama_model,
+            base_url=settings.ollama_base_url,
+            keep_alive=settings.ollama_keep_alive
+        )
+        # Used by the agents; CrewAI passes keep_alive through to Ollama on every call
+        self.agent_llm = LLM(
+            model=self.ollama_model,
+            base_url=settings.ollama_base_url,
+            keep_alive=settings.ollama_keep_alive
+        )
+        
+        # Specialist crews run in parallel, each bounded by its own deadline
+        self.specialist_timeout = specialist_timeout
+        self.fanout_executor = ThreadPoolExecutor(max_workers=fanout_workers, thread_name_prefix="specialist")
         
         # Initialize ChromaDB for general RAG
         self._setup_chromadb()
@@ -51,8 +97,11 @@ class MultiAgentRAGSystem:
         # Initialize agents
         self._setup_agents()
         
-        # Conversation memory
-        self.conversations: Dict[str, List[Dict]] = {}
+        # Build reusable crews once instead of per request
+        self._setup_crew_templates()
+        
+        # Conversation memory, bounded and optionally shared between workers
+        self.conversation_store = conversation_store or create_conversation_store()
         
         logger.info("Multi-agent RAG system initialized successfully!")
     
@@ -166,7 +215,7 @@ class MultiAgentRAGSystem:
                         You have access to comprehensive project databases and can provide detailed 
                         information about employee roles, project timelines, and departmental structures.""",
             tools=[self.csv_tool],
-            llm=self.ollama_model,
+            llm=self.agent_llm,
             verbose=True,
             allow_delegation=False,
             max_iter=3
@@ -180,7 +229,7 @@ class MultiAgentRAGSystem:
                         procedures and regulatory requirements. You can quickly locate and 
                         interpret policy information from official documents.""",
             tools=[self.pdf_tool],
-            llm=self.ollama_model,
+            llm=self.agent_llm,
             verbose=True,
             allow_delegation=False,
             max_iter=3
@@ -194,7 +243,7 @@ class MultiAgentRAGSystem:
                         structure, employee hierarchies, and organizational data. You can 
                         provide insights into company demographics and organizational patterns.""",
             tools=[self.json_tool],
-            llm=self.ollama_model,
+            llm=self.agent_llm,
             verbose=True,
             allow_delegation=False,
             max_iter=3
@@ -208,7 +257,7 @@ class MultiAgentRAGSystem:
                         information from multiple sources. You coordinate with various specialists 
                         to provide complete, accurate, and well-structured responses to complex queries.""",
             tools=[self.rag_tool],
-            llm=self.ollama_model,
+            llm=self.agent_llm,
             verbose=True,
             allow_delegation=True,
             max_iter=5
@@ -216,181 +265,304 @@ class MultiAgentRAGSystem:
         
         logger.info("All agents initialized successfully!")
     
+    def _setup_crew_templates(self):
+        """
+        Build one crew per specialist and one for synthesis.
+        
+        Every routing combination is served by running the needed specialist
+        crews followed by the synthesis crew, so nothing is rebuilt per request;
+        only the ``{message}``, ``{context}`` and ``{findings}`` inputs change.
+        """
+        # Prompt text each crew always sends besides context and the query, for the token budget
+        self.fixed_prompts: Dict[str, str] = {}
+        
+        def crew_template(name: str, agent: Agent, description: str, expected_output: str) -> CrewTemplate:
+            def build() -> Crew:
+                # Each instance gets its own agent, so concurrent kickoffs share no executor state
+                member = agent.copy()
+                return Crew(
+                    agents=[member],
+                    tasks=[Task(description=description, agent=member, expected_output=expected_output)],
+                    process=Process.sequential,
+                    verbose=False
+                )
+            self.fixed_prompts[name] = "\n".join(
+                [agent.role, agent.goal, agent.backstory, description.format(message="", context="", findings="")]
+            )
+            return CrewTemplate(name, build)
+        
+        self.specialist_templates = {
+            'projects': crew_template(
+                'projects',
+                self.projects_agent,
+                """
+                Search the projects database for relevant information about:
+                - Employee assignments and roles
+                - Project details and timelines  
+                - Department information
+                - Team structures
+                
+                Provide specific data and insights based on your search results.
+                
+                {context}
+                
+                The user's query about projects and employee data: "{message}"
+                """,
+                "Detailed information from projects and employee database"
+            ),
+            'policy': crew_template(
+                'policy',
+                self.policy_agent,
+                """
+                Search company policies and procedures for information related to the user's query.
+                Look for relevant policies, procedures, guidelines, and regulatory information.
+                Provide accurate citations and specific policy details.
+                
+                {context}
+                
+                The user's query: "{message}"
+                """,
+                "Relevant policy and procedure information"
+            ),
+            'organization': crew_template(
+                'organization',
+                self.org_agent,
+                """
+                Analyze organizational data for information related to the user's query. Search for:
+                - Employee details and hierarchies
+                - Organizational structure
+                - Company information
+                - Management relationships
+                
+                {context}
+                
+                The user's query: "{message}"
+                """,
+                "Organizational and employee information"
+            )
+        }
+        
+        self.synthesis_template = crew_template(
+            'synthesis',
+            self.synthesis_agent,
+            """
+            Based on the information gathered by specialist agents, provide a comprehensive 
+            and well-structured response that:
+            1. Directly addresses the user's question
+            2. Integrates information from multiple sources if applicable
+            3. Is clear, accurate, and helpful
+            4. Maintains conversational context
+            
+            If this is a general query not covered by specialists, provide a helpful general response.
+            
+            {context}
+            
+            {findings}
+            
+            User Query: "{message}"
+            """,
+            "A comprehensive, well-structured response to the user's query"
+        )
+        
+        logger.info("Crew templates initialized successfully!")
+    
     def _add_to_conversation(self, session_id: str, role: str, content: str):
         """Add message to conversation history"""
-        if session_id not in self.conversations:
-            self.conversations[session_id] = []
-        
-        self.conversations[session_id].append({
+        self.conversation_store.append(session_id, [{
             "role": role,
             "content": content,
             "timestamp": datetime.now().isoformat()
-        })
+        }])
     
-    def _get_conversation_context(self, session_id: str) -> str:
-        """Get recent conversation context"""
-        if session_id not in self.conversations:
-            return ""
-        
-        recent_messages = self.conversations[session_id][-6:]  # Last 6 messages
-        context = "\n".join([
-            f"{msg['role']}: {msg['content']}" 
-            for msg in recent_messages
-        ])
-        return f"Recent conversation:\n{context}\n" if context else ""
+    def _packer(self, agent: str) -> ContextPacker:
+        return ContextPacker(prompt_budget(self.model_name, agent), agent=agent)
+    
+    def _get_conversation_context(self, history: List[Dict], agent: str, message: str) -> PackedContext:
+        """
+        Recent conversation context for one agent's prompt: the latest messages
+        that fit the agent's history share, each trimmed, newest kept first
+        """
+        fixed = {"instructions": self.fixed_prompts[agent], "question": message}
+        packed = self._packer(agent).pack(fixed, history=history, headers={"history": HISTORY_HEADER})
+        if packed.history:
+            packed.history = f"{HISTORY_HEADER}{packed.history}\n"
+        return packed
     
     def analyze_query_type(self, query: str) -> Dict[str, Any]:
         """Analyze query to determine which agents should be involved"""
-        query_lower = query.lower()
-        
-        # Keywords for different data types
-        project_keywords = ['project', 'employee', 'role', 'department', 'assignment', 'team', 'lead', 'contributor']
-        policy_keywords = ['policy', 'procedure', 'regulation', 'compliance', 'rule', 'guideline', 'manual']
-        org_keywords = ['organization', 'company', 'salary', 'hire', 'manager', 'structure', 'employee details']
-        
-        # Determine relevance scores
-        project_score = sum(1 for keyword in project_keywords if keyword in query_lower)
-        policy_score = sum(1 for keyword in policy_keywords if keyword in query_lower)
-        org_score = sum(1 for keyword in org_keywords if keyword in query_lower)
-        
-        return {
-            'requires_projects': project_score > 0,
-            'requires_policy': policy_score > 0,
-            'requires_org': org_score > 0,
-            'is_general': project_score == 0 and policy_score == 0 and org_score == 0,
-            'scores': {
-                'projects': project_score,
-                'policy': policy_score,
-                'organization': org_score
-            }
-        }
+        return self.router.analyze(query)
+    
+    @staticmethod
+    def _resolve_mode(mode: str) -> str:
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode '{mode}'; expected one of {', '.join(EXECUTION_MODES)}")
+        return mode
+    
+    def _run_specialist(self, name: str, message: str, context: str) -> Tuple[str, int]:
+        """Execute one specialist's crew template; returns its findings and LLM call count"""
+        output, llm_calls = self.specialist_templates[name].kickoff_with_usage(message=message, context=context)
+        return str(output), llm_calls
+    
+    def _search_directly(self, name: str, message: str) -> Tuple[str, int]:
+        """Query a specialist's search tool without an agent in between; no LLM calls"""
+        tools = {'projects': self.csv_tool, 'policy': self.pdf_tool, 'organization': self.json_tool}
+        return str(tools[name].run(message)), 0
     
-    def chat(self, message: str, session_id: str = "default") -> str:
-        """Main chat function with multi-agent coordination"""
+    @staticmethod
+    def _synthesis_prompt(message: str, context: str, findings: str) -> str:
+        # Starts with the same static instructions the startup warm-up primes, so
+        # Ollama reuses the cached prefix and only evaluates the data and question
+        return f"""{SYNTHESIS_INSTRUCTIONS}
+{context}
+
+{findings or "No specialist data was retrieved for this query."}
+
+User Query: "{message}"
+
+Answer:"""
+    
+    def _synthesize_directly(self, message: str, context: str, findings: str) -> Tuple[str, int]:
+        """Answer from the tool results with exactly one LLM call"""
+        return self.llm.invoke(self._synthesis_prompt(message, context, findings)), 1
+    
+    def _pack_synthesis(
+        self,
+        history: List[Dict],
+        message: str,
+        specialists: List[str],
+        specialist_results: Dict[str, Tuple[str, int]],
+        mode: str
+    ) -> PackedContext:
+        """
+        History and specialist findings for the synthesis prompt, within the
+        synthesis budget; findings keep the specialists' order and the last
+        ones are trimmed first
+        """
+        instructions = self._synthesis_prompt("", "", "") if mode == "direct" else self.fixed_prompts['synthesis']
+        fixed = {"instructions": instructions, "question": message}
+        findings = [
+            Snippet(name, f"Findings from the {name} specialist:\n{specialist_results[name][0]}")
+            for name in specialists
+            if name in specialist_results
+        ]
+        packed = self._packer("synthesis").pack(fixed, findings, history, headers={"history": HISTORY_HEADER})
+        if packed.history:
+            packed.history = f"{HISTORY_HEADER}{packed.history}\n"
+        return packed
+    
+    def chat(
+        self,
+        message: str,
+        session_id: str = "default",
+        execution_mode: Optional[str] = None
+    ) -> ChatResult:
+        """
+        Main chat function with multi-agent coordination.
+        
+        ``execution_mode`` overrides the configured mode for this request. The
+        result reports how many LLM round trips the turn took.
+        """
+        mode = self._resolve_mode(execution_mode or self.execution_mode)
+        query_analysis: Dict[str, Any] = {}
+        timings: Dict[str, float] = {}
+        prompt_tokens: Dict[str, int] = {}
+        llm_calls = 0
         try:
             # Add user message to conversation
             self._add_to_conversation(session_id, "user", message)
-            
-            # Get conversation context
-            context = self._get_conversation_context(session_id)
+            # Earlier turns; the current message is already in the prompt as the query
+            history = self.conversation_store.history(session_id)[:-1]
             
             # Analyze query to determine agent involvement
             query_analysis = self.analyze_query_type(message)
             
-            # Create tasks based on query analysis
-            tasks = []
-            agents_involved = []
-            
+            # Pick the specialists this query needs
+            specialists = []
             if query_analysis['requires_projects']:
-                project_task = Task(
-                    description=f"""
-                    Analyze the user's query about projects and employee data: "{message}"
-                    
-                    {context}
-                    
-                    Search the projects database for relevant information about:
-                    - Employee assignments and roles
-                    - Project details and timelines  
-                    - Department information
-                    - Team structures
-                    
-                    Provide specific data and insights based on your search results.
-                    """,
-                    agent=self.projects_agent,
-                    expected_output="Detailed information from projects and employee database"
-                )
-                tasks.append(project_task)
-                agents_involved.append(self.projects_agent)
-            
+                specialists.append('projects')
             if query_analysis['requires_policy']:
-                policy_task = Task(
-                    description=f"""
-                    Search company policies and procedures for information related to: "{message}"
-                    
-                    {context}
-                    
-                    Look for relevant policies, procedures, guidelines, and regulatory information.
-                    Provide accurate citations and specific policy details.
-                    """,
-                    agent=self.policy_agent,
-                    expected_output="Relevant policy and procedure information"
-                )
-                tasks.append(policy_task)
-                agents_involved.append(self.policy_agent)
-            
+                specialists.append('policy')
             if query_analysis['requires_org']:
-                org_task = Task(
-                    description=f"""
-                    Analyze organizational data for information related to: "{message}"
-                    
-                    {context}
-                    
-                    Search for:
-                    - Employee details and hierarchies
-                    - Organizational structure
-                    - Company information
-                    - Management relationships
-                    """,
-                    agent=self.org_agent,
-                    expected_output="Organizational and employee information"
-                )
-                tasks.append(org_task)
-                agents_involved.append(self.org_agent)
-            
-            # Always include synthesis task
-            synthesis_task = Task(
-                description=f"""
-                User Query: "{message}"
-                
-                {context}
-                
-                Based on the information gathered by specialist agents, provide a comprehensive 
-                and well-structured response that:
-                1. Directly addresses the user's question
-                2. Integrates information from multiple sources if applicable
-                3. Is clear, accurate, and helpful
-                4. Maintains conversational context
-                
-                If this is a general query not covered by specialists, provide a helpful general response.
-                """,
-                agent=self.synthesis_agent,
-                expected_output="A comprehensive, well-structured response to the user's query",
-                context=tasks if tasks else None
-            )
-            tasks.append(synthesis_task)
-            agents_involved.append(self.synthesis_agent)
+                specialists.append('organization')
             
-            # Create and execute crew
-            crew = Crew(
-                agents=agents_involved,
-                tasks=tasks,
-                process=Process.sequential,
-                verbose=False
+            # Run the specialists concurrently, so synthesis waits for the slowest
+            # specialist rather than their sum
+            if mode == "direct":
+                jobs = {name: partial(self._search_directly, name, message) for name in specialists}
+            else:
+                # Each specialist gets the conversation context its own budget allows
+                jobs = {
+                    name: partial(
+                        self._run_specialist, name, message,
+                        self._get_conversation_context(history, name, message).history
+                    )
+                    for name in specialists
+                }
+            started = time.perf_counter()
+            specialist_results, durations, timed_out = run_with_deadline(
+                self.fanout_executor, jobs, self.specialist_timeout
             )
+            timings["specialists"] = round((time.perf_counter() - started) * 1000, 2)
+            timings.update({f"specialist_{name}": round(seconds * 1000, 2) for name, seconds in durations.items()})
             
-            # Execute the crew
-            result = crew.kickoff()
-            response = str(result)
+            packed = self._pack_synthesis(history, message, specialists, specialist_results, mode)
+            sources = [name for name in specialists if packed.sections.get(name)]
+            context = packed.history
+            findings = "\n\n".join(packed.section(name) for name in specialists if packed.sections.get(name))
+            prompt_tokens = packed.usage
+            if timed_out:
+                findings += f"\n\n(No findings from: {', '.join(timed_out)} - the specialist did not answer in time.)"
+            # Calls made by specialists that missed the deadline are not counted
+            llm_calls += sum(calls for _, calls in specialist_results.values())
             
-            # Add response to conversation
-            self._add_to_conversation(session_id, "assistant", response)
-            
-            return response
+            if specialist_results and packed.empty:
+                # Findings came back but none fit the synthesis budget
+                response = NO_CONTEXT_RESPONSE
+                answer_path = "no_context"
+            else:
+                # Finish with synthesis
+                started = time.perf_counter()
+                if mode == "direct":
+                    response, synthesis_calls = self._synthesize_directly(message, context, findings)
+                else:
+                    result, synthesis_calls = self.synthesis_template.kickoff_with_usage(
+                        message=message, context=context, findings=findings
+                    )
+                    response = str(result)
+                timings["synthesis"] = round((time.perf_counter() - started) * 1000, 2)
+                llm_calls += synthesis_calls
+                answer_path = mode
             
         except Exception as e:
             logger.error(f"Error in multi-agent chat: {e}")
-            error_response = "I apologize, but I encountered an error while processing your request. Please try again."
-            self._add_to_conversation(session_id, "assistant", error_response)
-            return error_response
+            response = "I apologize, but I encountered an error while processing your request. Please try again."
+            answer_path = "error"
+            specialists = []
+            sources = []
+        
+        # Add response to conversation
+        self._add_to_conversation(session_id, "assistant", response)
+        RAG_LLM_CALLS.observe(llm_calls, mode=mode)
+        
+        return ChatResult(
+            response=response,
+            session_id=session_id,
+            agent_used=" + ".join(specialists) if specialists else "synthesis",
+            query_analysis=query_analysis,
+            sources=sources,
+            timings=timings,
+            answer_path=answer_path,
+            llm_calls=llm_calls,
+            prompt_tokens=prompt_tokens
+        )
     
     def get_conversation_history(self, session_id: str) -> List[Dict]:
         """Get conversation history for a session"""
-        return self.conversations.get(session_id, [])
+        return self.conversation_store.history(session_id)
     
     def clear_conversation(self, session_id: str):
         """Clear conversation history for a session"""
-        if session_id in self.conversations:
-            del self.conversations[session_id]
+        self.conversation_store.clear(session_id)
     
     def add_document_to_rag(self, text: str, metadata: Dict = None) -> bool:
         """Add additional documents to the general RAG system"""
@@ -0,0 +1,157 @@
+import logging
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from .bm25_index import SearchRecord
+from .search_records import organization_records, record_from_mapping
+
+logger = logging.getLogger(__name__)
+
+
+def full_name(employee: Dict[str, Any]) -> str:
+    return f"{employee.get('first_name', '')} {employee.get('last_name', '')}".strip()
+
+
+class OrgModel:
+    """
+    Indexed view of the organizational JSON.
+
+    Everything is computed once at load: employees by id and by name, the
+    manager tree (direct reports, every transitive report and each employee's
+    chain of managers) and headcount rollups per department and location. So
+    reporting-chain and headcount questions are dictionary lookups rather than
+    scans of the employee list.
+    """
+
+    def __init__(self, data: Optional[Dict[str, Any]]):
+        self.data = data or {}
+        self.info: Dict[str, Any] = self.data.get("organization_info", {})
+        self.departments: Dict[str, Dict[str, Any]] = self.data.get("departments", {})
+        self.office_locations: Dict[str, Dict[str, Any]] = self.data.get("office_locations", {})
+        self.employees: List[Dict[str, Any]] = self.data.get("employees", [])
+
+        self._by_id: Dict[str, Dict[str, Any]] = {}
+        self._by_name: Dict[str, List[str]] = defaultdict(list)
+        self._direct_reports: Dict[str, List[str]] = defaultdict(list)
+        self._department_members: Dict[str, List[str]] = defaultdict(list)
+        self._location_members: Dict[str, List[str]] = defaultdict(list)
+
+        for employee in self.employees:
+            employee_id = employee.get("employee_id")
+            if not employee_id:
+                continue
+            self._by_id[employee_id] = employee
+            self._by_name[full_name(employee).lower()].append(employee_id)
+            if employee.get("department"):
+                self._department_members[employee["department"]].append(employee_id)
+            if employee.get("location"):
+                self._location_members[employee["location"]].append(employee_id)
+
+        for employee_id, employee in self._by_id.items():
+            manager_id = employee.get("manager_id")
+            if manager_id in self._by_id and manager_id != employee_id:
+                self._direct_reports[manager_id].append(employee_id)
+
+        self._chains = {employee_id: self._build_chain(employee_id) for employee_id in self._by_id}
+        self._all_reports: Dict[str, List[str]] = defaultdict(list)
+        for employee_id, chain in self._chains.items():
+            for manager_id in chain:
+                self._all_reports[manager_id].append(employee_id)
+
+        logger.info(
+            f"Loaded org model: {len(self._by_id)} employees, {len(self._direct_reports)} managers, "
+            f"{len(self._department_members)} departments, {len(self._location_members)} locations"
+        )
+
+    def _build_chain(self, employee_id: str) -> List[str]:
+        """Managers from the direct manager up to the top; stops on a cycle"""
+        chain: List[str] = []
+        seen = {employee_id}
+        manager_id = self._by_id[employee_id].get("manager_id")
+        while manager_id in self._by_id and manager_id not in seen:
+            chain.append(manager_id)
+            seen.add(manager_id)
+            manager_id = self._by_id[manager_id].get("manager_id")
+        return chain
+
+    # Employees
+
+    def employee(self, employee_id: str) -> Optional[Dict[str, Any]]:
+        return self._by_id.get(employee_id)
+
+    def find_by_name(self, name: str) -> List[Dict[str, Any]]:
+        return [self._by_id[employee_id] for employee_id in self._by_name.get(name.lower(), [])]
+
+    def names(self) -> List[str]:
+        return [full_name(employee) for employee in self._by_id.values()]
+
+    def describe(self, employee_id: str) -> str:
+        """'First Last (EMP0001)'"""
+        employee = self._by_id.get(employee_id)
+        return f"{full_name(employee)} ({employee_id})" if employee else employee_id
+
+    # Manager tree
+
+    def manager(self, employee_id: str) -> Optional[Dict[str, Any]]:
+        chain = self._chains.get(employee_id)
+        return self._by_id[chain[0]] if chain else None
+
+    def reporting_chain(self, employee_id: str) -> List[str]:
+        """Ids of the employee's managers, nearest first"""
+        return list(self._chains.get(employee_id, []))
+
+    def direct_reports(self, employee_id: str) -> List[str]:
+        return list(self._direct_reports.get(employee_id, []))
+
+    def all_reports(self, employee_id: str) -> List[str]:
+        """Everyone below the employee in the manager tree"""
+        return list(self._all_reports.get(employee_id, []))
+
+    # Rollups
+
+    def department_headcount(self, department: str) -> int:
+        return len(self._department_members.get(department, []))
+
+    def department_members(self, department: str) -> List[str]:
+        return list(self._department_members.get(department, []))
+
+    def location_headcount(self, location: str) -> int:
+        return len(self._location_members.get(location, []))
+
+    def location_members(self, location: str) -> List[str]:
+        return list(self._location_members.get(location, []))
+
+    def locations(self) -> List[str]:
+        return sorted(set(self._location_members) | set(self.office_locations))
+
+    # Search
+
+    def records(self, source: str = "organization") -> List[SearchRecord]:
+        """Records for every JSON section plus a rollup record per department and location"""
+        records = organization_records(self.data, source)
+        for department in sorted(set(self._department_members) | set(self.departments)):
+            members = self._department_members.get(department, [])
+            records.append(record_from_mapping(
+                source,
+                "Department roster",
+                {
+                    "department": department,
+                    "headcount": len(members),
+                    "head": self.departments.get(department, {}).get("head"),
+                    "employees": [self.describe(employee_id) for employee_id in members],
+                },
+                {"title": ["department"]}
+            ))
+        for location in self.locations():
+            members = self._location_members.get(location, [])
+            records.append(record_from_mapping(
+                source,
+                "Location roster",
+                {
+                    "location": location,
+                    "headcount": len(members),
+                    "employees": [self.describe(employee_id) for employee_id in members],
+                },
+                {"title": ["location"]}
+            ))
+        return records
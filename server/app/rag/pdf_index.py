@@ -0,0 +1,209 @@
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import Iterator, List, Optional, Tuple
+
+import PyPDF2
+
+logger = logging.getLogger(__name__)
+
+# Bump when extraction or chunking changes so stale cached indexes are rebuilt
+INDEX_FORMAT = 1
+
+# Kept out of the data directory, which is tracked and versioned by file mtimes
+DEFAULT_CACHE_DIR = "./cache/pdf_index"
+
+_DOT_LEADERS = re.compile(r"(?:\.\s*){4,}")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class PdfChunk:
+    """A span of text from one page of a PDF"""
+
+    page: int  # 1-based
+    text: str
+
+
+def split_text(text: str, chunk_size: int = 800, overlap: int = 150) -> List[str]:
+    """Split text into overlapping chunks that start and end on word boundaries"""
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        if end < len(text):
+            # Break on a space so words are not cut in half
+            space = text.rfind(" ", start + chunk_size // 2, end)
+            end = space if space != -1 else end
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        # Start the overlap on a word boundary too
+        space = text.find(" ", end - overlap, end)
+        start = space + 1 if space != -1 else end
+    return chunks
+
+
+def clean_page_text(text: str) -> str:
+    """Drop table-of-contents dot leaders and collapse whitespace"""
+    return _WHITESPACE.sub(" ", _DOT_LEADERS.sub(" ", text)).strip()
+
+
+def page_count(pdf_path: str) -> int:
+    with open(pdf_path, "rb") as f:
+        return len(PyPDF2.PdfReader(f).pages)
+
+
+def _extract_page_range(pdf_path: str, start: int, stop: int) -> List[Tuple[int, str]]:
+    """Cleaned text of pages [start, stop), 0-based; runs in a worker process"""
+    with open(pdf_path, "rb") as f:
+        reader = PyPDF2.PdfReader(f)
+        return [
+            (index + 1, clean_page_text(reader.pages[index].extract_text() or ""))
+            for index in range(start, min(stop, len(reader.pages)))
+        ]
+
+
+def iter_page_texts(
+    pdf_path: str,
+    pages_per_task: int = 16,
+    max_workers: Optional[int] = None,
+    min_pool_pages: int = 200
+) -> Iterator[Tuple[int, str]]:
+    """
+    Yield ``(page_number, text)`` in page order, extracting page ranges in a
+    process pool.
+
+    Only ``2 * max_workers`` ranges are submitted ahead of the page being
+    yielded, so at most that many ranges of text are held in memory however
+    long the document is. Workers are spawned rather than forked: the server
+    calls this from a thread, and forking a multi-threaded process can
+    deadlock the child. Each spawned worker re-imports the launching script
+    (``main.py`` and the app state it builds), so documents under
+    ``min_pool_pages`` pages, or ``max_workers=1``, are extracted in-process;
+    for a manual of a few dozen pages that is cheaper than starting a pool.
+    """
+    total = page_count(pdf_path)
+    workers = max_workers or os.cpu_count() or 1
+    ranges = [(start, start + pages_per_task) for start in range(0, total, pages_per_task)]
+    if workers <= 1 or len(ranges) <= 1 or total < min_pool_pages:
+        for start, stop in ranges:
+            yield from _extract_page_range(pdf_path, start, stop)
+        return
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges)), mp_context=context) as pool:
+        pending = deque()
+        next_range = iter(ranges)
+        for start, stop in next_range:
+            pending.append(pool.submit(_extract_page_range, pdf_path, start, stop))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            pages = pending.popleft().result()
+            range_ = next(next_range, None)
+            if range_ is not None:
+                pending.append(pool.submit(_extract_page_range, pdf_path, *range_))
+            yield from pages
+
+
+def iter_chunks(
+    pdf_path: str,
+    chunk_size: int = 800,
+    overlap: int = 150,
+    max_workers: Optional[int] = None
+) -> Iterator[PdfChunk]:
+    """Overlapping word-aligned chunks of each page, yielded as pages are extracted"""
+    for page_number, text in iter_page_texts(pdf_path, max_workers=max_workers):
+        for chunk in split_text(text, chunk_size, overlap):
+            yield PdfChunk(page=page_number, text=chunk)
+
+
+def extract_chunks(pdf_path: str, chunk_size: int = 800, overlap: int = 150) -> List[PdfChunk]:
+    """Extract page text and split each page into overlapping word-aligned chunks"""
+    return list(iter_chunks(pdf_path, chunk_size, overlap))
+
+
+class PdfChunkIndex:
+    """
+    Chunks of a PDF, cached on disk.
+
+    Parsing a large PDF takes seconds, so the chunks are written to
+    ``<cache_dir>/<pdf name>.chunks.json`` keyed by the PDF's content hash and
+    the chunking parameters. Later loads read the cache instead of re-parsing,
+    and any change to the PDF invalidates it.
+    """
+
+    def __init__(self, chunks: List[PdfChunk]):
+        self.chunks = chunks
+
+    @staticmethod
+    def index_path(pdf_path: str, cache_dir: str = DEFAULT_CACHE_DIR) -> str:
+        return os.path.join(cache_dir, f"{os.path.basename(pdf_path)}.chunks.json")
+
+    @classmethod
+    def load(
+        cls,
+        pdf_path: str,
+        chunk_size: int = 800,
+        overlap: int = 150,
+        cache_dir: str = DEFAULT_CACHE_DIR
+    ) -> "PdfChunkIndex":
+        """Load the cached chunk index for a PDF, building and saving it if missing or stale"""
+        key = {
+            "format": INDEX_FORMAT,
+            "sha256": file_sha256(pdf_path),
+            "chunk_size": chunk_size,
+            "overlap": overlap,
+        }
+        index_path = cls.index_path(pdf_path, cache_dir)
+
+        cached = cls._read(index_path)
+        if cached is not None and cached.get("key") == key:
+            chunks = [PdfChunk(**chunk) for chunk in cached["chunks"]]
+            logger.info(f"Loaded {len(chunks)} PDF chunks from {index_path}")
+            return cls(chunks)
+
+        chunks = extract_chunks(pdf_path, chunk_size, overlap)
+        logger.info(f"Extracted {len(chunks)} chunks from {pdf_path}")
+        cls._write(index_path, {"key": key, "chunks": [asdict(chunk) for chunk in chunks]})
+        return cls(chunks)
+
+    @staticmethod
+    def _read(index_path: str) -> Optional[dict]:
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable PDF index {index_path}: {e}")
+            return None
+
+    @staticmethod
+    def _write(index_path: str, payload: dict):
+        # Write then rename so a crash never leaves a truncated index behind
+        temp_path = f"{index_path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(index_path) or ".", exist_ok=True)
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f)
+            os.replace(temp_path, index_path)
+        except OSError as e:
+            logger.warning(f"Could not cache PDF index at {index_path}: {e}")
@@ -0,0 +1,176 @@
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+INDEXED_COLUMNS = ("department", "employee_id", "employee_name", "project_id", "project_name", "role_in_project")
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+class ProjectsIndex:
+    """
+    Read-only column indexes over the project-assignment table.
+
+    At load every indexed column is factorized into sorted categories and
+    integer codes, and each value gets a posting array of the rows holding it.
+    Lookups and filters then touch only the rows of the smallest posting
+    involved, instead of scanning the whole frame. Per-group aggregates
+    (e.g. distinct employees per department) are computed for all groups in
+    one pass the first time they are asked for and cached after that.
+    """
+
+    def __init__(self, frame: pd.DataFrame, indexed_columns: Sequence[str] = INDEXED_COLUMNS):
+        started = time.perf_counter()
+        self.frame = frame.reset_index(drop=True)
+        self._values: Dict[str, np.ndarray] = {
+            column: self.frame[column].to_numpy(dtype=object) for column in self.frame.columns
+        }
+        self._codes: Dict[str, np.ndarray] = {}
+        self._categories: Dict[str, np.ndarray] = {}
+        self._lookup: Dict[str, Dict[str, int]] = {}
+        self._postings: Dict[str, List[np.ndarray]] = {}
+        self._cache: Dict[Tuple[str, ...], object] = {}
+        self._cache_lock = threading.Lock()
+
+        for column in indexed_columns:
+            if column in self.frame.columns:
+                self._build(column)
+        logger.info(
+            f"Indexed {len(self.frame)} project rows on {len(self._codes)} columns "
+            f"in {time.perf_counter() - started:.2f}s"
+        )
+
+    def _build(self, column: str):
+        codes, categories = pd.factorize(self.frame[column], sort=True)
+        categories = np.asarray(categories, dtype=object)
+        order = np.argsort(codes, kind="stable")
+        counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+        # Null rows (code -1) sort first; skip them
+        offsets = np.concatenate(([0], np.cumsum(counts))) + int((codes < 0).sum())
+        self._codes[column] = codes.astype(np.int32)
+        self._categories[column] = categories
+        self._lookup[column] = {value: code for code, value in enumerate(categories)}
+        self._postings[column] = [order[offsets[code]:offsets[code + 1]] for code in range(len(categories))]
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    @property
+    def indexed_columns(self) -> List[str]:
+        return list(self._codes)
+
+    def distinct(self, column: str, rows: Optional[np.ndarray] = None) -> List[str]:
+        """Sorted distinct values of an indexed column, over all rows or the given ones"""
+        if rows is None:
+            return self._categories[column].tolist()
+        codes = self._codes[column][rows]
+        return self._categories[column][np.unique(codes[codes >= 0])].tolist()
+
+    def count_distinct(self, column: str, rows: Optional[np.ndarray] = None) -> int:
+        if rows is None:
+            return len(self._categories[column])
+        codes = self._codes[column][rows]
+        return len(np.unique(codes[codes >= 0]))
+
+    def rows(self, **filters: str) -> np.ndarray:
+        """
+        Row positions matching every ``column=value`` filter, in table order.
+
+        Work is proportional to the smallest matching posting, not to the table.
+        """
+        postings = []
+        for column, value in filters.items():
+            code = self._lookup[column].get(value)
+            if code is None:
+                return _EMPTY
+            postings.append((column, code, self._postings[column][code]))
+        if not postings:
+            return np.arange(len(self.frame))
+
+        postings.sort(key=lambda posting: len(posting[2]))
+        rows = postings[0][2]
+        for column, code, _ in postings[1:]:
+            rows = rows[self._codes[column][rows] == code]
+        return rows
+
+    def take(self, column: str, rows: np.ndarray) -> np.ndarray:
+        """Values of any column at the given rows"""
+        return self._values[column][rows]
+
+    def group_counts(self, by: str, distinct: Optional[str] = None) -> Dict[str, int]:
+        """Rows (or distinct values of another indexed column) per value of ``by``, cached"""
+        key = ("group_counts", by, distinct or "")
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        by_codes = self._codes[by]
+        valid = by_codes >= 0
+        if distinct is None:
+            counts = np.bincount(by_codes[valid], minlength=len(self._categories[by]))
+        else:
+            other = self._codes[distinct]
+            valid &= other >= 0
+            # Unique (group, value) pairs, then count pairs per group
+            pairs = np.unique(by_codes[valid].astype(np.int64) * len(self._categories[distinct]) + other[valid])
+            counts = np.bincount(pairs // len(self._categories[distinct]), minlength=len(self._categories[by]))
+        result = dict(zip(self._categories[by].tolist(), counts.tolist()))
+        with self._cache_lock:
+            self._cache[key] = result
+        return result
+
+    def group_values(self, by: str, column: str) -> Dict[str, List[str]]:
+        """Sorted distinct values of ``column`` per value of ``by``, cached"""
+        key = ("group_values", by, column)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        by_codes, other = self._codes[by], self._codes[column]
+        valid = (by_codes >= 0) & (other >= 0)
+        width = len(self._categories[column])
+        pairs = np.unique(by_codes[valid].astype(np.int64) * width + other[valid])
+        groups = pairs // width
+        bounds = np.searchsorted(groups, np.arange(len(self._categories[by]) + 1))
+        values = self._categories[column][pairs % width]
+        result = {
+            category: values[bounds[code]:bounds[code + 1]].tolist()
+            for code, category in enumerate(self._categories[by].tolist())
+        }
+        with self._cache_lock:
+            self._cache[key] = result
+        return result
+
+    def first_values(self, key_column: str, value_column: str, rows: Optional[np.ndarray] = None) -> Dict[str, str]:
+        """
+        Value of ``value_column`` on the first row (of all rows, or of the given
+        ones) for each value of ``key_column``; the all-rows mapping is cached
+        """
+        values = self._values[value_column]
+        categories = self._categories[key_column]
+        if rows is not None:
+            codes = self._codes[key_column][rows]
+            unique, first = np.unique(codes, return_index=True)
+            return {
+                categories[code]: values[rows[position]]
+                for code, position in zip(unique.tolist(), first.tolist())
+                if code >= 0
+            }
+
+        key = ("first_values", key_column, value_column)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        result = {
+            category: values[posting[0]]
+            for category, posting in zip(categories.tolist(), self._postings[key_column])
+        }
+        with self._cache_lock:
+            self._cache[key] = result
+        return result
@@ -0,0 +1,35 @@
+"""
+Prompt text shared by the chat systems.
+
+Ollama reuses its KV cache for the longest prefix a new prompt shares with
+the previous one, so every template starts with its static text and ends with
+what changes per request: retrieved context, conversation and the question,
+in that order. Only the tail is evaluated again on each turn. This module has
+no heavy imports, so the server can prime Ollama with ``SYNTHESIS_INSTRUCTIONS``
+before the RAG system is loaded.
+"""
+
+# Answer given when no retrieved data fits into the prompt
+NO_CONTEXT_RESPONSE = "I don't have specific information about that topic in our current knowledge base. Please contact HR directly for more detailed information."
+
+SYNTHESIS_INSTRUCTIONS = """You answer employees' questions using only the company data provided below.
+
+Instructions:
+- Give a direct, helpful answer based only on the provided data
+- Include specific numbers, names, dates, and details when available
+- If the question asks for counts or statistics, provide exact numbers
+- Be conversational and helpful, not just a data dump
+- If the data doesn't fully answer the question, acknowledge what information is available
+"""
+
+
+def synthesis_prompt(message: str, context: str) -> str:
+    """The single-call answer prompt: static instructions, then the data, then the question"""
+    return f"""{SYNTHESIS_INSTRUCTIONS}
+Company data:
+{context}
+
+Question: {message}
+
+Answer:"""
+
@@ -0,0 +1,136 @@
+import json
+import logging
+import re
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Route name -> keywords and phrases; overridable with a JSON file of the same shape.
+# A term is a string or a list of aliases, the first being the term reported in
+# matches; single words also match their regular plural ("policy" -> "policies").
+DEFAULT_ROUTES: Dict[str, List[Union[str, List[str]]]] = {
+    "projects": [
+        "project", ["assignment", "assigned"], "team", "employee", "role", "department", "working on",
+        ["lead", "leads", "leading", "led"], "contributor",
+    ],
+    "policy": [
+        "policy", "procedure", "rule", "guideline", "handbook", "regulation", ["hiring", "hire", "hired"],
+        "leave", "vacation", "compliance", "manual",
+    ],
+    "organization": [
+        ["organization", "organisation", "organizational"], "company", "structure", "hierarchy",
+        ["manager", "management", "managing", "managed"], "salary", ["hire", "hired", "hiring"], "employee details",
+    ],
+}
+
+# Keys of the analysis dict callers read for each route
+REQUIREMENT_KEYS = {"projects": "requires_projects", "policy": "requires_policy", "organization": "requires_org"}
+
+_WORD = re.compile(r"\w+")
+
+
+def plural(word: str) -> Optional[str]:
+    """Regular English plural of a noun, or None for forms that do not take one"""
+    if word.endswith(("ing", "ed", "s")):
+        return None
+    if word.endswith("y") and len(word) > 1 and word[-2] not in "aeiou":
+        return word[:-1] + "ies"
+    if word.endswith(("x", "z", "ch", "sh")):
+        return word + "es"
+    return word + "s"
+
+
+def surface_forms(term: Union[str, Sequence[str]]) -> Tuple[str, List[Tuple[str, ...]]]:
+    """A term's reported name and every word sequence that matches it"""
+    aliases = [term] if isinstance(term, str) else list(term)
+    forms = []
+    for alias in aliases:
+        words = tuple(word.lower() for word in _WORD.findall(alias))
+        if not words:
+            continue
+        forms.append(words)
+        if len(words) == 1 and plural(words[0]):
+            forms.append((plural(words[0]),))
+    return aliases[0], forms
+
+
+@dataclass
+class RouteMatch:
+    """A keyword match: the route it votes for, the configured term and where it matched"""
+
+    route: str
+    term: str
+    text: str
+    start: int
+    end: int
+
+
+class QueryRouter:
+    """
+    Decides which data sources a query needs from keyword tables.
+
+    Every term and alias is expanded into the exact word sequences that match
+    it when the router is built, and the table is compiled into one lookup
+    keyed by a sequence's first word. Matching is a single pass over the
+    query's words, so terms only match whole words ("role" does not match
+    "enrollment", "department" does not match "departure" or "departing").
+    Inflections match only when listed as aliases or regular plurals. Each
+    match carries its character span in the query.
+    """
+
+    def __init__(self, routes: Dict[str, Sequence[Union[str, Sequence[str]]]]):
+        self.routes = {route: list(terms) for route, terms in routes.items()}
+        # first word -> [(words of the whole form, route, term)], longest forms first
+        self._table: Dict[str, List[Tuple[Tuple[str, ...], str, str]]] = {}
+        seen = set()
+        for route, terms in self.routes.items():
+            for term in terms:
+                name, forms = surface_forms(term)
+                for words in forms:
+                    if (words, route) not in seen:
+                        seen.add((words, route))
+                        self._table.setdefault(words[0], []).append((words, route, name))
+        for entries in self._table.values():
+            entries.sort(key=lambda entry: len(entry[0]), reverse=True)
+
+    @classmethod
+    def from_file(cls, path: Optional[str] = None) -> "QueryRouter":
+        """Router over the tables in a JSON file, or the defaults when no path is given"""
+        if not path:
+            return cls(DEFAULT_ROUTES)
+        with open(path, "r", encoding="utf-8") as f:
+            routes = json.load(f)
+        logger.info(f"Loaded query routes from {path}: {', '.join(routes)}")
+        return cls(routes)
+
+    def match(self, query: str) -> List[RouteMatch]:
+        """Every term occurrence in the query, in order"""
+        words = list(_WORD.finditer(query))
+        lowered = [word.group(0).lower() for word in words]
+        matches = []
+        for position, first in enumerate(lowered):
+            for term_words, route, term in self._table.get(first, ()):
+                end = position + len(term_words)
+                if tuple(lowered[position:end]) == term_words:
+                    start_char, end_char = words[position].start(), words[end - 1].end()
+                    matches.append(RouteMatch(route, term, query[start_char:end_char], start_char, end_char))
+        return matches
+
+    def analyze(self, query: str) -> Dict[str, Any]:
+        """
+        Route requirements for a query: ``requires_*`` flags, per-route scores
+        (distinct terms matched), ``is_general`` when nothing matched and the
+        matches with their spans.
+        """
+        matches = self.match(query)
+        scores = {route: len({match.term for match in matches if match.route == route}) for route in self.routes}
+        analysis: Dict[str, Any] = {
+            REQUIREMENT_KEYS.get(route, f"requires_{route}"): score > 0 for route, score in scores.items()
+        }
+        for key in REQUIREMENT_KEYS.values():
+            analysis.setdefault(key, False)
+        analysis["is_general"] = not matches
+        analysis["scores"] = scores
+        analysis["matches"] = [asdict(match) for match in matches]
+        return analysis
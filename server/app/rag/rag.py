@@ -1,28 +1,26 @@
-import os
-import uuid
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from typing import List, Dict, Optional, Iterator
 import logging
 
 # PDF and text processing
-import PyPDF2
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 
-# CrewAI RAG imports
-from crewai.rag.config.utils import set_rag_config, get_rag_client, clear_rag_config
-from crewai.rag.chromadb.config import ChromaDBConfig
-
-# Embeddings
-from langchain_community.embeddings import OllamaEmbeddings
-
 # CrewAI
 from crewai import Agent, Task, Crew
-from langchain_core.tools import BaseTool
+from crewai.tools import BaseTool
 
 # Ollama
 from langchain_community.llms import Ollama
 
+from .vector_store import VectorStore, NumpyVectorStore
+from .crew_templates import CrewTemplate
+from .embeddings import OllamaBatchEmbedder
+from .embedding_cache import default_embedding_cache
+from .ingestion import BatchIngestor
+from .pdf_index import iter_page_texts
+from ..core.config import settings
+from .conversation_memory import ConversationMemory, llm_summarizer
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -37,67 +35,33 @@ class PDFProcessor:
             chunk_overlap=200,
             length_function=len,
         )
-        )
     
     def extract_text_from_pdf(self, pdf_path: str) -> str:
         """Extract text from PDF file"""
         try:
-            text = ""
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-            return text
+            return "\n".join(text for _, text in iter_page_texts(pdf_path))
         except Exception as e:
             logger.error(f"Error extracting text from PDF: {e}")
             return ""
     
+    def iter_pdf_documents(self, pdf_path: str) -> Iterator[Document]:
+        """
+        Yield chunks page by page as pages are extracted (long PDFs are spread
+        over a process pool), each tagged with its page number
+        """
+        for page_number, text in iter_page_texts(pdf_path):
+            yield from self.text_splitter.create_documents(
+                [text],
+                metadatas=[{"source": pdf_path, "type": "pdf", "page": page_number}]
+            )
+    
     def process_pdf(self, pdf_path: str) -> List[Document]:
         """Process PDF and return document chunks"""
-        text = self.extract_text_from_pdf(pdf_path)
-        if not text:
+        try:
+            return list(self.iter_pdf_documents(pdf_path))
+        except Exception as e:
+            logger.error(f"Error extracting text from PDF: {e}")
             return []
-        
-        documents = self.text_splitter.create_documents(
-            [text],
-            metadatas=[{"source": pdf_path, "type": "pdf"}]
-        )
-        return documents
-
-
-class ConversationMemory:
-    """Manages conversation history and memory"""
-    
-    def __init__(self, max_history: int = 10):
-        self.max_history = max_history
-        self.conversations: Dict[str, List[Dict]] = {}
-    
-    def add_message(self, session_id: str, role: str, content: str):
-        """Add message to conversation history"""
-        if session_id not in self.conversations:
-            self.conversations[session_id] = []
-        
-        self.conversations[session_id].append({
-            "role": role,
-            "content": content,
-            "timestamp": datetime.now().isoformat()
-        })
-        
-        # Keep only recent messages
-        if len(self.conversations[session_id]) > self.max_history:
-            self.conversations[session_id] = self.conversations[session_id][-self.max_history:]
-    
-    def get_conversation_history(self, session_id: str) -> List[Dict]:
-        """Get conversation history for a session"""
-        return self.conversations.get(session_id, [])
-    
-    def get_context_string(self, session_id: str) -> str:
-        """Get conversation history as formatted string"""
-        history = self.get_conversation_history(session_id)
-        context = ""
-        for msg in history:
-            context += f"{msg['role'].title()}: {msg['content']}\n"
-        return context
 
 
 class VectorSearchTool(BaseTool):
@@ -106,7 +70,7 @@ class VectorSearchTool(BaseTool):
     name: str = "vector_search"
     description: str = "Search through the document vector database for relevant information"
     
-    def __init__(self, vector_store: QdrantVectorStore, embeddings: OllamaEmbeddings):
+    def __init__(self, vector_store: VectorStore, embeddings: OllamaBatchEmbedder):
         super().__init__()
         self._vector_store = vector_store
         self._embeddings = embeddings
@@ -137,15 +101,29 @@ class RAGChatbot:
         self,
         ollama_model: str = "llama3.2:1b",
         embedding_model: str = "nomic-embed-text",
-        qdrant_host: str = "localhost",
-        qdrant_port: int = 6333
+        vector_store: Optional[VectorStore] = None,
+        vector_store_path: str = "./vector_store",
+        embedding_batch_size: int = 32,
+        embedding_concurrency: int = 4
     ):
         # Initialize components
-        self.llm = Ollama(model=ollama_model)
-        self.embeddings = OllamaEmbeddings(model=embedding_model)
-        self.vector_store = QdrantVectorStore(host=qdrant_host, port=qdrant_port)
+        self.llm = Ollama(
+            model=ollama_model,
+            base_url=settings.ollama_base_url,
+            keep_alive=settings.ollama_keep_alive
+        )
+        self.embeddings = OllamaBatchEmbedder(model=embedding_model, cache=default_embedding_cache())
+        # In-process flat index persisted under vector_store_path unless another backend is given
+        self.vector_store = vector_store if vector_store is not None else NumpyVectorStore(path=vector_store_path)
+        self.ingestor = BatchIngestor(
+            self.vector_store,
+            self.embeddings,
+            batch_size=embedding_batch_size,
+            max_concurrency=embedding_concurrency
+        )
         self.pdf_processor = PDFProcessor()
-        self.memory = ConversationMemory()
+        # Older turns are summarized in the background so the prompt stays flat
+        self.memory = ConversationMemory(summarize_fn=llm_summarizer(self.llm))
         
         # Initialize CrewAI components
         self.vector_tool = VectorSearchTool(self.vector_store, self.embeddings)
@@ -168,28 +146,43 @@ class RAGChatbot:
             verbose=True
         )
         
-        self.crew = Crew(
-            agents=[self.agent],
-            verbose=True
-        )
+        def build_chat_crew() -> Crew:
+            task = Task(
+                description="""
+            Conversation History:
+            {context}
+            
+            Current Question: {message}
+            
+            Please provide a helpful response based on the available documents and conversation context.
+            If you need to search for information, use the vector_search tool.
+            """,
+                agent=self.agent,
+                expected_output="A helpful and contextual response to the user's question"
+            )
+            return Crew(
+                agents=[self.agent],
+                tasks=[task],
+                verbose=True
+            )
+        
+        self.chat_template = CrewTemplate("vector_chat", build_chat_crew)
     
     def add_pdf(self, pdf_path: str) -> bool:
         """Add a PDF to the vector database"""
         try:
             logger.info(f"Processing PDF: {pdf_path}")
-            documents = self.pdf_processor.process_pdf(pdf_path)
+            documents = self.pdf_processor.iter_pdf_documents(pdf_path)
             
-            if not documents:
+            # Embed in concurrent batches while later pages are still being extracted
+            report = self.ingestor.ingest_stream((doc.page_content, doc.metadata) for doc in documents)
+            if report.chunks == 0:
                 logger.error("No content extracted from PDF")
                 return False
-            
-            # Generate embeddings
-            texts = [doc.page_content for doc in documents]
-            embeddings = self.embeddings.embed_documents(texts)
-            
-            # Add to vector store
-            self.vector_store.add_documents(documents, embeddings)
-            logger.info(f"Successfully added PDF with {len(documents)} chunks")
+            if not report.ok:
+                logger.error(f"Ingestion incomplete: {report}")
+                return False
+            logger.info(f"Successfully added PDF with {report.chunks} chunks")
             return True
             
         except Exception as e:
@@ -205,26 +198,8 @@ class RAGChatbot:
             # Get conversation context
             context = self.memory.get_context_string(session_id)
             
-            # Create enhanced prompt with context
-            enhanced_message = f"""
-            Conversation History:
-            {context}
-            
-            Current Question: {message}
-            
-            Please provide a helpful response based on the available documents and conversation context.
-            If you need to search for information, use the vector_search tool.
-            """
-            
-            # Create task
-            task = Task(
-                description=enhanced_message,
-                agent=self.agent,
-                expected_output="A helpful and contextual response to the user's question"
-            )
-            
-            # Execute task
-            result = self.crew.kickoff(tasks=[task])
+            # Execute the prebuilt crew with this turn's inputs
+            result = self.chat_template.kickoff(message=message, context=context)
             response = str(result)
             
             # Add response to memory
@@ -243,8 +218,7 @@ class RAGChatbot:
     
     def clear_conversation(self, session_id: str = "default"):
         """Clear conversation history for a session"""
-        if session_id in self.memory.conversations:
-            del self.memory.conversations[session_id]
+        self.memory.clear_conversation(session_id)
 
 
 # Example usage
@@ -1,28 +1,28 @@
 import os
-import uuid
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterable, Iterator
 import logging
 
 # PDF and text processing
-import PyPDF2
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.schema import Document
 
-# CrewAI RAG imports
-from crewai.rag.config.utils import set_rag_config, get_rag_client, clear_rag_config
-from crewai.rag.chromadb.config import ChromaDBConfig
-
-# Embeddings
-from langchain_community.embeddings import OllamaEmbeddings
-
 # CrewAI
 from crewai import Agent, Task, Crew
-from langchain_core.tools import BaseTool
+from crewai.tools import BaseTool
 
 # Ollama
 from langchain_community.llms import Ollama
 
+from .crew_templates import CrewTemplate
+from .vector_store import VectorStore, NumpyVectorStore, ChromaVectorStore
+from .embeddings import OllamaBatchEmbedder
+from .embedding_cache import default_embedding_cache
+from .ingestion import BatchIngestor, IngestionReport
+from .ingestion_manager import IngestionManager, SyncReport
+from .pdf_index import iter_page_texts
+from ..core.config import settings
+from .conversation_memory import ConversationMemory, llm_summarizer
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -41,16 +41,30 @@ class PDFProcessor:
     def extract_text_from_pdf(self, pdf_path: str) -> str:
         """Extract text from PDF file"""
         try:
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                for page in pdf_reader.pages:
-                    text += page.extract_text() + "\n"
-                return text
+            return "\n".join(text for _, text in iter_page_texts(pdf_path))
         except Exception as e:
             logger.error(f"Error extracting text from PDF: {e}")
             return ""
     
+    def iter_pdf_documents(self, pdf_path: str) -> Iterator[Document]:
+        """
+        Yield chunks page by page as pages are extracted (long PDFs are spread
+        over a process pool), each tagged with its page number
+        """
+        chunk_index = 0
+        for page_number, text in iter_page_texts(pdf_path):
+            for chunk in self.text_splitter.split_text(text):
+                yield Document(
+                    page_content=chunk,
+                    metadata={
+                        "source": pdf_path,
+                        "chunk_id": chunk_index,
+                        "chunk_size": len(chunk),
+                        "page": page_number
+                    }
+                )
+                chunk_index += 1
+    
     def process_text(self, text: str, source: str = "unknown") -> List[Document]:
         """Split text into chunks and create Document objects"""
         chunks = self.text_splitter.split_text(text)
@@ -71,77 +85,40 @@ class PDFProcessor:
     
     def process_pdf(self, pdf_path: str) -> List[Document]:
         """Process PDF file and return Document objects"""
-        text = self.extract_text_from_pdf(pdf_path)
-        if text:
-            return self.process_text(text, source=pdf_path)
-        return []
-
-
-class ConversationMemory:
-    """Manages conversation history for different sessions"""
-    
-    def __init__(self):
-        self.conversations: Dict[str, List[Dict[str, str]]] = {}
-    
-    def add_message(self, session_id: str, role: str, content: str):
-        """Add a message to conversation history"""
-        if session_id not in self.conversations:
-            self.conversations[session_id] = []
-        
-        self.conversations[session_id].append({
-            "role": role,
-            "content": content,
-            "timestamp": datetime.now().isoformat()
-        })
-    
-    def get_conversation_history(self, session_id: str) -> List[Dict[str, str]]:
-        """Get conversation history for a session"""
-        return self.conversations.get(session_id, [])
-    
-    def clear_conversation(self, session_id: str):
-        """Clear conversation history for a session"""
-        if session_id in self.conversations:
-            del self.conversations[session_id]
-    
-    def get_context_string(self, session_id: str) -> str:
-        """Get conversation history as formatted string"""
-        history = self.get_conversation_history(session_id)
-        context = ""
-        for msg in history:
-            context += f"{msg['role'].title()}: {msg['content']}\n"
-        return context
+        try:
+            return list(self.iter_pdf_documents(pdf_path))
+        except Exception as e:
+            logger.error(f"Error extracting text from PDF: {e}")
+            return []
 
 
 class DocumentSearchTool(BaseTool):
-    """CrewAI tool for document search using ChromaDB"""
+    """CrewAI tool for document search over a VectorStore"""
     
     name: str = "document_search"
     description: str = "Search through uploaded documents for relevant information based on user queries"
-    rag_client: Any = None
+    vector_store: Any = None
+    embeddings: Any = None
     
-    def __init__(self, rag_client, **kwargs):
+    def __init__(self, vector_store: VectorStore, embeddings: OllamaBatchEmbedder, **kwargs):
         super().__init__(**kwargs)
-        self.rag_client = rag_client
+        self.vector_store = vector_store
+        self.embeddings = embeddings
     
     def _run(self, query: str) -> str:
         """Execute document search"""
         try:
-            # Use CrewAI's built-in RAG client to search
-            results = self.rag_client.search(query, n_results=3)
+            query_embedding = self.embeddings.embed_query(query)
+            results = self.vector_store.search(query_embedding, limit=3)
             
-            if not results or not results.get('documents'):
+            if not results:
                 return "No relevant information found in the document database."
             
             context = "Relevant information from documents:\n\n"
             
-            # Process results from ChromaDB
-            documents = results['documents'][0] if results['documents'] else []
-            metadatas = results['metadatas'][0] if results.get('metadatas') else []
-            
-            for i, doc in enumerate(documents):
-                metadata = metadatas[i] if i < len(metadatas) else {}
-                source = metadata.get('source', 'Unknown source')
-                context += f"From {source}:\n{doc}\n\n"
+            for result in results:
+                source = result['metadata'].get('source', 'Unknown source')
+                context += f"From {source}:\n{result['content']}\n\n"
             
             return context
             
@@ -157,43 +134,61 @@ class RAGChatbot:
         self,
         ollama_model: str = "llama3.2:1b",
         embedding_model: str = "nomic-embed-text",
-        collection_name: str = "documents"
+        collection_name: str = "documents",
+        vector_backend: str = "chromadb",
+        persist_directory: str = "./chromadb_data",
+        embedding_batch_size: int = 32,
+        embedding_concurrency: int = 4
     ):
         # Initialize components
-        self.llm = Ollama(model=ollama_model)
-        self.embeddings = OllamaEmbeddings(model=embedding_model)
+        self.llm = Ollama(
+            model=ollama_model,
+            base_url=settings.ollama_base_url,
+            keep_alive=settings.ollama_keep_alive
+        )
+        self.embeddings = OllamaBatchEmbedder(model=embedding_model, cache=default_embedding_cache())
+        
+        # Setup the vector store
+        self.collection_name = collection_name
+        self.persist_directory = persist_directory
+        self._setup_vector_store(vector_backend, collection_name, persist_directory)
         
-        # Setup CrewAI ChromaDB configuration
-        self._setup_chromadb(collection_name)
+        # Chunks are embedded in concurrent batches and written in bulk
+        self.ingestor = BatchIngestor(
+            self.vector_store,
+            self.embeddings,
+            batch_size=embedding_batch_size,
+            max_concurrency=embedding_concurrency
+        )
+        self.last_ingestion: Optional[IngestionReport] = None
+        self._sync_managers: Dict[str, IngestionManager] = {}
         
         # Initialize other components
         self.pdf_processor = PDFProcessor()
-        self.memory = ConversationMemory()
+        # Older turns are summarized in the background so the prompt stays flat
+        self.memory = ConversationMemory(summarize_fn=llm_summarizer(self.llm))
         
         # Initialize CrewAI components
-        self.document_tool = DocumentSearchTool(self.rag_client)
+        self.document_tool = DocumentSearchTool(self.vector_store, self.embeddings)
         self._setup_crew()
     
-    def _setup_chromadb(self, collection_name: str):
-        """Setup ChromaDB using CrewAI's RAG configuration"""
+    def _setup_vector_store(self, backend: str, collection_name: str, persist_directory: str):
+        """
+        Setup the vector store: a ChromaDB collection, or the in-process
+        NumPy index (``backend="numpy"``) when no ChromaDB is wanted.
+        """
         try:
-            # Clear any existing RAG config
-            clear_rag_config()
-            
-            # Set up ChromaDB configuration
-            config = ChromaDBConfig(
-                collection_name=collection_name,
-                persist_directory="./chromadb_data"
-            )
-            set_rag_config(config)
+            if backend == "chromadb":
+                self.vector_store: VectorStore = ChromaVectorStore(collection_name, persist_directory)
+            elif backend == "numpy":
+                self.vector_store = NumpyVectorStore(path=os.path.join(persist_directory, collection_name))
+            else:
+                raise ValueError(f"Unknown vector backend '{backend}'; expected 'chromadb' or 'numpy'")
             
-            # Get the RAG client
-            self.rag_client = get_rag_client()
-            
-            logger.info(f"ChromaDB initialized with collection: {collection_name}")
+            logger.info(f"Vector store initialized: {backend} ({collection_name}, {self.vector_store.count()} chunks)")
             
         except Exception as e:
-            logger.error(f"Error setting up ChromaDB: {e}")
+            logger.error(f"Error setting up vector store: {e}")
             raise
     
     def _setup_crew(self):
@@ -212,26 +207,58 @@ class RAGChatbot:
             llm=crewai_model,
             verbose=True
         )
+        
+        def build_chat_crew() -> Crew:
+            task = Task(
+                description="""
+            User Query: {message}
+            
+            Conversation Context:
+            {conversation_context}
+            
+            Please help the user by:
+            1. Using the document_search tool to find relevant information if the query relates to document content
+            2. Maintaining conversation context and referencing previous messages when relevant
+            3. Providing a helpful, accurate response based on available information
+            4. If no relevant documents are found, provide a general helpful response
+            """,
+                agent=self.agent,
+                expected_output="A helpful response that addresses the user's query using available document information and conversation context"
+            )
+            return Crew(
+                agents=[self.agent],
+                tasks=[task],
+                verbose=False
+            )
+        
+        # Built once; each chat turn only supplies the placeholder values
+        self.chat_template = CrewTemplate("document_chat", build_chat_crew)
+    
+    def _ingest(self, documents: Iterable[Document]) -> IngestionReport:
+        """
+        Embed and store document chunks as they are produced; the report is
+        also kept in ``last_ingestion``
+        """
+        report = self.ingestor.ingest_stream((doc.page_content, doc.metadata) for doc in documents)
+        self.last_ingestion = report
+        if not report.ok:
+            logger.error(f"Ingestion incomplete: {report}")
+        return report
     
     def add_document_from_path(self, pdf_path: str) -> bool:
         """Add a PDF document to the knowledge base"""
         try:
-            # Process PDF
-            documents = self.pdf_processor.process_pdf(pdf_path)
+            # Chunks are embedded while later pages are still being extracted
+            report = self._ingest(self.pdf_processor.iter_pdf_documents(pdf_path))
             
-            if not documents:
+            if report.chunks == 0:
                 logger.warning(f"No content extracted from {pdf_path}")
                 return False
             
-            # Add documents to ChromaDB via CrewAI
-            for doc in documents:
-                self.rag_client.add(
-                    texts=[doc.page_content],
-                    metadatas=[doc.metadata],
-                    ids=[str(uuid.uuid4())]
-                )
+            if not report.ok:
+                return False
             
-            logger.info(f"Added {len(documents)} chunks from {pdf_path} to knowledge base")
+            logger.info(f"Added {report.chunks} chunks from {pdf_path} to knowledge base")
             return True
             
         except Exception as e:
@@ -248,13 +275,8 @@ class RAGChatbot:
                 logger.warning("No content to add")
                 return False
             
-            # Add documents to ChromaDB via CrewAI
-            for doc in documents:
-                self.rag_client.add(
-                    texts=[doc.page_content],
-                    metadatas=[doc.metadata],
-                    ids=[str(uuid.uuid4())]
-                )
+            if not self._ingest(documents).ok:
+                return False
             
             logger.info(f"Added {len(documents)} chunks from text to knowledge base")
             return True
@@ -263,6 +285,25 @@ class RAGChatbot:
             logger.error(f"Error adding text: {e}")
             return False
     
+    def sync_directory(self, directory: str) -> SyncReport:
+        """
+        Incrementally sync a directory of documents (e.g. RAG_context) into the
+        knowledge base: only new or changed content is embedded, identical files
+        are stored once and chunks of removed files are deleted.
+        """
+        directory = os.path.abspath(directory)
+        manager = self._sync_managers.get(directory)
+        if manager is None:
+            name = os.path.basename(directory.rstrip(os.sep)) or "root"
+            manifest_path = os.path.join(self.persist_directory, f"{self.collection_name}.{name}.manifest.json")
+            manager = IngestionManager(directory, self.vector_store, self.ingestor, manifest_path)
+            self._sync_managers[directory] = manager
+        report = manager.sync()
+        self.last_ingestion = report.ingestion or self.last_ingestion
+        if not report.ok:
+            logger.error(f"Sync of {directory} incomplete: {report.errors}")
+        return report
+    
     def chat(self, message: str, session_id: str) -> str:
         """Main chat function"""
         try:
@@ -272,34 +313,11 @@ class RAGChatbot:
             # Get conversation context
             conversation_context = self.memory.get_context_string(session_id)
             
-            # Create task for the agent
-            task_description = f"""
-            User Query: {message}
-            
-            Conversation Context:
-            {conversation_context}
-            
-            Please help the user by:
-            1. Using the document_search tool to find relevant information if the query relates to document content
-            2. Maintaining conversation context and referencing previous messages when relevant
-            3. Providing a helpful, accurate response based on available information
-            4. If no relevant documents are found, provide a general helpful response
-            """
-            
-            task = Task(
-                description=task_description,
-                agent=self.agent,
-                expected_output="A helpful response that addresses the user's query using available document information and conversation context"
+            # Execute the prebuilt crew with this turn's inputs
+            result = self.chat_template.kickoff(
+                message=message,
+                conversation_context=conversation_context
             )
-            
-            crew = Crew(
-                agents=[self.agent],
-                tasks=[task],
-                verbose=False
-            )
-            
-            # Execute the task
-            result = crew.kickoff()
             response = str(result)
             
             # Add assistant response to conversation memory
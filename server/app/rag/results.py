@@ -0,0 +1,19 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class ChatResult:
+    """Structured outcome of a single chat turn"""
+    
+    response: str
+    session_id: str
+    agent_used: str
+    query_analysis: Dict[str, Any] = field(default_factory=dict)
+    sources: List[str] = field(default_factory=list)
+    timings: Dict[str, float] = field(default_factory=dict)  # milliseconds per stage
+    answer_path: str = "llm"  # structured, cache, llm, no_context, raw_context; crew or direct for MultiAgentRAGSystem
+    cache_hit: Optional[str] = None  # "exact" or "semantic" when served from the answer cache
+    coalesced: bool = False  # True when the answer came from another request's in-flight generation
+    llm_calls: Optional[int] = None  # LLM round trips made for this turn, when tracked
+    prompt_tokens: Dict[str, int] = field(default_factory=dict)  # estimated tokens per prompt component, and total
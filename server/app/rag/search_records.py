@@ -0,0 +1,119 @@
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from .bm25_index import SearchRecord
+from .pdf_index import PdfChunkIndex
+
+# Contact details and compensation are never indexed, so they can never end up
+# in a prompt. The company-wide benefits section is its own record and stays.
+PRIVATE_FIELDS = frozenset({
+    "email", "phone", "emergency_contact",
+    "salary", "performance_rating", "benefits",
+})
+
+# Which columns feed the boosted fields for each kind of row; every column
+# also goes into the body
+PROJECT_FIELDS = {
+    "name": ["employee_name", "employee_id"],
+    "title": ["project_name", "project_id"],
+    "category": ["department", "role_in_project"],
+}
+POLICY_FIELDS = {"title": ["title", "policy_id"], "category": ["category"]}
+EMPLOYEE_FIELDS = {"name": ["first_name", "last_name", "employee_id"], "category": ["department", "role", "location"]}
+TRAINING_FIELDS = {"title": ["title", "program_id"], "category": ["category"]}
+
+
+def _format_value(value: Any) -> str:
+    if isinstance(value, dict):
+        return ", ".join(f"{key}: {_format_value(item)}" for key, item in value.items())
+    if isinstance(value, (list, tuple)):
+        return ", ".join(_format_value(item) for item in value)
+    return str(value)
+
+
+def _labelled(key: str) -> str:
+    return key.replace("_", " ")
+
+
+def record_from_mapping(
+    source: str,
+    kind: str,
+    data: Dict[str, Any],
+    field_columns: Dict[str, List[str]],
+    metadata: Optional[Dict[str, Any]] = None
+) -> SearchRecord:
+    """Build a record from a flat-ish mapping such as a CSV row or a JSON object"""
+    data = {
+        key: value for key, value in data.items()
+        if key not in PRIVATE_FIELDS and value is not None and not (isinstance(value, float) and pd.isna(value))
+    }
+    body = "; ".join(f"{_labelled(key)}: {_format_value(value)}" for key, value in data.items())
+    fields = {
+        name: " ".join(_format_value(data[column]) for column in columns if column in data)
+        for name, columns in field_columns.items()
+    }
+    # Index values only; column labels occur in every row and would only add noise
+    fields["body"] = " ".join(_format_value(value) for value in data.values())
+    return SearchRecord(source=source, text=f"{kind} - {body}", fields=fields, metadata=metadata or {})
+
+
+def project_records(projects: pd.DataFrame, source: str = "projects") -> List[SearchRecord]:
+    return [
+        record_from_mapping(source, "Project assignment", row, PROJECT_FIELDS)
+        for row in projects.to_dict("records")
+    ]
+
+
+def policy_records(policies: pd.DataFrame, source: str = "policies") -> List[SearchRecord]:
+    return [record_from_mapping(source, "Policy", row, POLICY_FIELDS) for row in policies.to_dict("records")]
+
+
+def table_records(table: pd.DataFrame, source: str) -> List[SearchRecord]:
+    """Generic CSV rows: every column searchable as body text"""
+    return [record_from_mapping(source, "Record", row, {}) for row in table.to_dict("records")]
+
+
+def organization_records(data: Dict[str, Any], source: str = "organization") -> List[SearchRecord]:
+    """One record per entry in every section of the organizational JSON"""
+    records = []
+    for section, value in data.items():
+        kind = _labelled(section).capitalize()
+        if section == "employees":
+            records.extend(record_from_mapping(source, "Employee", item, EMPLOYEE_FIELDS) for item in value)
+        elif section == "policies":
+            records.extend(record_from_mapping(source, "Policy", item, POLICY_FIELDS) for item in value)
+        elif section == "training_programs":
+            records.extend(record_from_mapping(source, "Training program", item, TRAINING_FIELDS) for item in value)
+        elif isinstance(value, list):
+            records.extend(
+                record_from_mapping(source, kind, item if isinstance(item, dict) else {"value": item}, {})
+                for item in value
+            )
+        elif isinstance(value, dict) and value and all(isinstance(item, dict) for item in value.values()):
+            # Keyed sections such as departments or office locations: the key is the title
+            records.extend(
+                record_from_mapping(source, kind, {"name": key, **item}, {"title": ["name"]})
+                for key, item in value.items()
+            )
+        elif isinstance(value, dict):
+            title_column = "company_name" if "company_name" in value else None
+            records.append(record_from_mapping(
+                source, kind, value, {"title": [title_column]} if title_column else {}
+            ))
+        else:
+            records.append(record_from_mapping(source, kind, {section: value}, {}))
+    return records
+
+
+def pdf_records(index: PdfChunkIndex, source: str = "policy_manual") -> List[SearchRecord]:
+    return [
+        SearchRecord(
+            source=source,
+            text=f"[Page {chunk.page}] {chunk.text}",
+            fields={"body": chunk.text},
+            metadata={"page": chunk.page}
+        )
+        for chunk in index.chunks
+    ]
+
@@ -1,10 +1,13 @@
 import os
+import time
 import uuid
 import json
 import pandas as pd
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Tuple
 from datetime import datetime
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 # Set dummy OpenAI API key for CrewAI tools
 os.environ.setdefault("OPENAI_API_KEY", "dummy-key-for-ollama")
@@ -15,18 +18,55 @@ from crewai import Agent, Task, Crew, Process
 # LLM imports
 from langchain_community.llms import Ollama
 
+from .results import ChatResult
+from .answer_cache import AnswerCache, normalize_query, fingerprint
+from .single_flight import SingleFlight
+from .fanout import run_with_deadline
+from .structured_answers import StructuredAnswerEngine
+from .pdf_index import DEFAULT_CACHE_DIR, PdfChunkIndex
+from .bm25_index import BM25Index, SearchHit, SearchRecord
+from .org_model import OrgModel
+from .query_router import QueryRouter
+from .conversation_store import ConversationStore, create_conversation_store
+from .context_packer import ContextPacker, PackedContext, Snippet, prompt_budget
+from .prompts import NO_CONTEXT_RESPONSE, synthesis_prompt
+from .search_records import pdf_records, policy_records, project_records, table_records
+from ..core.metrics import StageTimer, RAG_STAGE_SECONDS, RAG_AGENT_SECONDS, RAG_ANSWER_PATHS
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Label in front of each source's section of the synthesis prompt
+SECTION_HEADERS = {
+    'organization': "Organizational Data:\n",
+    'projects': "Project Data:\n",
+    'policy': "Policy Data:\n",
+}
+
+
 
 class SimpleFileSearchTool:
     """Simple tool to search files without complex RAG dependencies"""
     
-    def __init__(self, file_path: str, file_type: str):
+    def __init__(
+        self,
+        file_path: str,
+        file_type: str,
+        source: Optional[str] = None,
+        cache_dir: str = DEFAULT_CACHE_DIR
+    ):
         self.file_path = file_path
         self.file_type = file_type
+        self.source = source or file_type
+        self.cache_dir = cache_dir
         self.content = self._load_content()
+        # Organizational JSON is also loaded into an indexed model
+        self.org_model: Optional[OrgModel] = (
+            OrgModel(self.content) if file_type == "json" and self.content is not None else None
+        )
+        # Shared BM25 index; a private one is built on first search if none is attached
+        self.index: Optional[BM25Index] = None
     
     def _load_content(self):
         """Load and parse file content"""
@@ -37,8 +77,7 @@ class SimpleFileSearchTool:
             elif self.file_type == "csv":
                 return pd.read_csv(self.file_path)
             elif self.file_type == "pdf":
-                # For now, return a placeholder - PDF processing would need PyPDF2
-                return "PDF content processing not implemented in simple version"
+                return PdfChunkIndex.load(self.file_path, cache_dir=self.cache_dir)
             else:
                 with open(self.file_path, 'r') as f:
                     return f.read()
@@ -46,90 +85,38 @@ class SimpleFileSearchTool:
             logger.error(f"Error loading {self.file_type} file: {e}")
             return None
     
-    def search(self, query: str) -> str:
-        """Search content based on query"""
-        query_lower = query.lower()
-        
-        if self.file_type == "json" and self.content:
-            # Search JSON structure
-            return self._search_json(query_lower)
-        elif self.file_type == "csv" and self.content is not None:
-            # Search CSV data
-            return self._search_csv(query_lower)
-        elif self.file_type == "pdf":
-            return f"PDF search for '{query}' - PDF processing needs to be implemented"
-        else:
-            return f"No results found for '{query}'"
+    def records(self) -> List[SearchRecord]:
+        """Every record of this file, in searchable form"""
+        if self.content is None:
+            return []
+        if self.file_type == "json":
+            return self.org_model.records(self.source)
+        if self.file_type == "csv":
+            if self.source == "projects":
+                return project_records(self.content, self.source)
+            if self.source == "policies":
+                return policy_records(self.content, self.source)
+            return table_records(self.content, self.source)
+        if self.file_type == "pdf":
+            return pdf_records(self.content, self.source)
+        return [SearchRecord(source=self.source, text=self.content, fields={"body": self.content})]
     
-    def _search_json(self, query: str) -> str:
-        """Search JSON data"""
-        results = []
-        
-        # Search in policies
-        if "policy" in query or "policies" in query:
-            if "policies" in self.content:
-                for policy in self.content["policies"]:
-                    policy_text = f"Policy: {policy.get('title', 'N/A')} - {policy.get('description', 'N/A')}"
-                    if any(term in policy_text.lower() for term in query.split()):
-                        results.append(policy_text)
-        
-        # Search in company info
-        if "company" in query or "organization" in query:
-            if "organization_info" in self.content:
-                org_info = self.content["organization_info"]
-                results.append(f"Company: {org_info.get('company_name', 'N/A')} - {org_info.get('mission', 'N/A')}")
-        
-        # Search in employees
-        if "employee" in query or "employees" in query:
-            if "employees" in self.content:
-                employee_count = len(self.content["employees"])
-                results.append(f"Total employees: {employee_count}")
-                # Add sample employee info
-                for emp in self.content["employees"][:3]:  # First 3 employees
-                    results.append(f"Employee: {emp.get('first_name', '')} {emp.get('last_name', '')} - {emp.get('role', 'N/A')} in {emp.get('department', 'N/A')}")
-        
-        return "\n".join(results) if results else f"No specific information found for '{query}' in organizational data"
+    def search_hits(self, query: str, top_k: int = 5) -> List[SearchHit]:
+        """Best-matching records from this file"""
+        if self.content is None:
+            return []
+        if self.index is None:
+            self.index = BM25Index(self.records())
+        return self.index.search(query, top_k=top_k, sources=[self.source])
     
-    def _search_csv(self, query: str) -> str:
-        """Search CSV data"""
-        results = []
+    def search(self, query: str, top_k: int = 5) -> str:
+        """
+        Search content based on query.
         
-        # Check for department-specific queries
-        if "department" in query:
-            dept_keywords = ['engineering', 'finance', 'marketing', 'sales', 'operations', 'it support', 'legal']
-            found_dept = None
-            for dept in dept_keywords:
-                if dept in query:
-                    found_dept = dept
-                    break
-            
-            if found_dept and 'department' in self.content.columns:
-                # Filter by department (case-insensitive)
-                dept_mask = self.content['department'].str.lower().str.contains(found_dept, na=False)
-                if dept_mask.any():
-                    dept_data = self.content[dept_mask]
-                    unique_employees = dept_data['employee_name'].nunique() if 'employee_name' in dept_data.columns else 0
-                    results.append(f"Department Analysis: {unique_employees} unique employees work in the {found_dept.title()} department")
-                    
-                    # Add sample employee info from this department
-                    for _, row in dept_data.head(5).iterrows():
-                        results.append(f"Employee {row.get('employee_name', 'N/A')} (ID: {row.get('employee_id', 'N/A')}) working on {row.get('project_name', 'N/A')} as {row.get('role_in_project', 'N/A')}")
-                    
-                    return "\n".join(results)
-        
-        # General search for projects and employees
-        if "project" in query or "employee" in query:
-            # Get basic stats
-            total_projects = len(self.content['project_id'].unique()) if 'project_id' in self.content.columns else 0
-            total_employees = len(self.content['employee_id'].unique()) if 'employee_id' in self.content.columns else 0
-            
-            results.append(f"Project Database: {total_employees} employees working on {total_projects} projects")
-            
-            # Add sample data
-            for _, row in self.content.head(3).iterrows():
-                results.append(f"Employee {row.get('employee_name', 'N/A')} working on {row.get('project_name', 'N/A')} as {row.get('role_in_project', 'N/A')}")
-        
-        return "\n".join(results) if results else f"No project data found for '{query}'"
+        Returns an empty string when nothing matches, so no irrelevant rows
+        reach the prompt.
+        """
+        return "\n".join(hit.record.text for hit in self.search_hits(query, top_k))
 
 
 class SimplifiedMultiAgentRAGSystem:
@@ -138,13 +125,34 @@ class SimplifiedMultiAgentRAGSystem:
     def __init__(
         self,
         ollama_model: str = "llama3.2:1b",
-        rag_context_path: str = "./RAG_context"
+        rag_context_path: str = "./RAG_context",
+        ollama_base_url: str = "http://localhost:11434",
+        answer_cache: Optional[AnswerCache] = None,
+        specialist_timeout: float = 15.0,
+        fanout_workers: int = 8,
+        query_router: Optional[QueryRouter] = None,
+        conversation_store: Optional[ConversationStore] = None,
+        keep_alive: Optional[str] = None,
+        pdf_index_cache_dir: str = DEFAULT_CACHE_DIR
     ):
         self.ollama_model = ollama_model
         self.rag_context_path = rag_context_path
+        self.pdf_index_cache_dir = pdf_index_cache_dir
+        self.ollama_base_url = ollama_base_url
+        self.answer_cache = answer_cache
+        # Decides which specialists a question needs
+        self.router = query_router or QueryRouter.from_file()
+        
+        # Identical concurrent questions share one in-flight LLM generation
+        self.single_flight = SingleFlight()
         
-        # Initialize LLM
-        self.llm = Ollama(model=ollama_model, base_url="http://localhost:11434")
+        # Specialist searches run in parallel; synthesis waits for the slowest
+        # one or the deadline, whichever comes first
+        self.specialist_timeout = specialist_timeout
+        self.fanout_executor = ThreadPoolExecutor(max_workers=fanout_workers, thread_name_prefix="specialist")
+        
+        # Initialize LLM; keep_alive keeps the model loaded in Ollama between requests
+        self.llm = Ollama(model=ollama_model, base_url=ollama_base_url, keep_alive=keep_alive)
         
         # Initialize file tools
         self._setup_file_tools()
@@ -152,8 +160,8 @@ class SimplifiedMultiAgentRAGSystem:
         # Initialize agents
         self._setup_agents()
         
-        # Conversation memory
-        self.conversations: Dict[str, List[Dict]] = {}
+        # Conversation memory, bounded and optionally shared between workers
+        self.conversation_store = conversation_store or create_conversation_store()
         
         logger.info("Simplified multi-agent RAG system initialized successfully!")
     
@@ -163,21 +171,41 @@ class SimplifiedMultiAgentRAGSystem:
             # JSON tool for organizational data
             self.json_tool = SimpleFileSearchTool(
                 os.path.join(self.rag_context_path, "rag_context_organizational_data.json"),
-                "json"
+                "json",
+                source="organization"
             )
             
             # CSV tool for projects data
             self.csv_tool = SimpleFileSearchTool(
                 os.path.join(self.rag_context_path, "projects.csv"),
-                "csv"
+                "csv",
+                source="projects"
             )
             
-            # PDF tool placeholder
+            # CSV tool for the policy summaries
+            self.policies_tool = SimpleFileSearchTool(
+                os.path.join(self.rag_context_path, "policies.csv"),
+                "csv",
+                source="policies"
+            )
+            
+            # PDF tool for the policy manual
             self.pdf_tool = SimpleFileSearchTool(
                 os.path.join(self.rag_context_path, "sample_policy_and_procedures_manual (1).pdf"),
-                "pdf"
+                "pdf",
+                source="policy_manual",
+                cache_dir=self.pdf_index_cache_dir
             )
             
+            # One BM25 index over every record; the tools search their own slice of it
+            tools = [self.json_tool, self.csv_tool, self.policies_tool, self.pdf_tool]
+            self.search_index = BM25Index(record for tool in tools for record in tool.records())
+            for tool in tools:
+                tool.index = self.search_index
+            
+            # Deterministic answers for count/list/lookup questions
+            self.structured_engine = StructuredAnswerEngine(self.csv_tool.content, self.json_tool.org_model)
+            
             logger.info("File processing tools initialized successfully!")
             
         except Exception as e:
@@ -233,135 +261,357 @@ class SimplifiedMultiAgentRAGSystem:
             logger.error(f"Error setting up agents: {e}")
             raise
     
+    def data_status(self) -> Dict[str, bool]:
+        """Report which data sources loaded successfully"""
+        return {
+            "organization": self.json_tool.content is not None,
+            "projects": self.csv_tool.content is not None,
+            "policy": self.pdf_tool.content is not None
+        }
+    
     def analyze_query_type(self, query: str) -> Dict[str, Any]:
         """Analyze query to determine which agents should handle it"""
-        query_lower = query.lower()
+        return self.router.analyze(query)
+    
+    def get_primary_agent(self, query_analysis: Dict[str, Any]) -> str:
+        """Return the role of the agent that primarily handles a query"""
+        if query_analysis.get('requires_projects'):
+            return self.projects_agent.role
+        elif query_analysis.get('requires_policy'):
+            return self.policy_agent.role
+        elif query_analysis.get('requires_org'):
+            return self.org_agent.role
+        return self.synthesis_agent.role
+    
+    def _structured_answer(self, message: str, query_analysis: Dict[str, Any]):
+        """Answer count/list/lookup questions directly when the data answers them exactly"""
+        # Policy questions need the document text, never a templated answer
+        if query_analysis['requires_policy']:
+            return None
+        return self.structured_engine.answer(message)
+    
+    def _search(self, message: str, query_analysis: Dict[str, Any], timer: StageTimer) -> Dict[str, List[Snippet]]:
+        """Search the data sources the query was routed to"""
+        # Search the relevant data sources concurrently, each under its own deadline
+        jobs = {}
         
-        analysis = {
-            'requires_projects': False,
-            'requires_policy': False,
-            'requires_org': False,
-            'is_general': False,
-            'scores': {
-                'projects': 0,
-                'policy': 0,
-                'organization': 0
-            }
-        }
+        if query_analysis['requires_projects']:
+            jobs['projects'] = partial(self._search_snippets, self.csv_tool, 'projects', message)
+        
+        if query_analysis['requires_policy']:
+            jobs['policy'] = partial(self._search_policy, message)
+        
+        if query_analysis['requires_org']:
+            jobs['organization'] = partial(self._search_snippets, self.json_tool, 'organization', message)
+        
+        with timer.stage("search"):
+            search_results, durations, timed_out = run_with_deadline(
+                self.fanout_executor, jobs, self.specialist_timeout
+            )
+        for source, seconds in durations.items():
+            timer.record(f"search_{source}", seconds)
+        query_analysis['timed_out'] = timed_out
+        
+        return search_results
+    
+    @staticmethod
+    def _search_snippets(tool: SimpleFileSearchTool, source: str, message: str, top_k: int = 5) -> List[Snippet]:
+        # All tools share one BM25 index, so scores are comparable across sources
+        return [Snippet(source, hit.record.text, hit.score) for hit in tool.search_hits(message, top_k)]
+    
+    def _search_policy(self, message: str) -> List[Snippet]:
+        """The most relevant policy summaries and manual excerpts"""
+        return (
+            self._search_snippets(self.policies_tool, 'policy', message, top_k=2)
+            + self._search_snippets(self.pdf_tool, 'policy', message, top_k=3)
+        )
+    
+    def _pack(self, message: str, search_results: Dict[str, List[Snippet]]) -> PackedContext:
+        """Rank the retrieved snippets and keep what fits the synthesis prompt budget"""
+        packer = ContextPacker(prompt_budget(self.ollama_model, "synthesis"), agent="synthesis")
+        fixed = {"instructions": self._build_prompt("", []), "question": message}
+        snippets = [snippet for snippets in search_results.values() for snippet in snippets]
+        return packer.pack(fixed, snippets, headers=SECTION_HEADERS)
+    
+    def _build_context_parts(self, packed: PackedContext) -> List[str]:
+        """Combine the packed snippets for LLM processing"""
+        context_parts = []
         
-        # Projects keywords
-        project_keywords = ['project', 'assignment', 'team', 'employee', 'role', 'department', 'working on']
-        for keyword in project_keywords:
-            if keyword in query_lower:
-                analysis['scores']['projects'] += 1
+        if packed.sections.get('organization'):
+            context_parts.append(SECTION_HEADERS['organization'] + packed.section('organization'))
         
-        # Policy keywords  
-        policy_keywords = ['policy', 'procedure', 'rule', 'guideline', 'handbook', 'regulation', 'hiring', 'leave', 'vacation']
-        for keyword in policy_keywords:
-            if keyword in query_lower:
-                analysis['scores']['policy'] += 1
+        if packed.sections.get('projects'):
+            context_parts.append(SECTION_HEADERS['projects'] + packed.section('projects'))
         
-        # Organizational keywords
-        org_keywords = ['organization', 'company', 'structure', 'hierarchy', 'management', 'organizational']
-        for keyword in org_keywords:
-            if keyword in query_lower:
-                analysis['scores']['organization'] += 1
+        if packed.sections.get('policy'):
+            context_parts.append(SECTION_HEADERS['policy'] + packed.section('policy', separator="\n\n"))
         
-        # Determine requirements
-        analysis['requires_projects'] = analysis['scores']['projects'] > 0
-        analysis['requires_policy'] = analysis['scores']['policy'] > 0  
-        analysis['requires_org'] = analysis['scores']['organization'] > 0
-        analysis['is_general'] = sum(analysis['scores'].values()) == 0
+        return context_parts
+    
+    def _build_prompt(self, message: str, context_parts: List[str]) -> str:
+        """Build the synthesis prompt from the retrieved context; the static instructions come first"""
+        return synthesis_prompt(message, "\n\n".join(context_parts))
+    
+    def _cache_get(self, message: str, context_parts: List[str]) -> Tuple[Optional[str], Optional[str]]:
+        """Look up a previously synthesized answer for this query and context"""
+        if self.answer_cache is None:
+            return None, None
+        return self.answer_cache.get(message, "\n\n".join(context_parts))
+    
+    def _cache_put(self, message: str, context_parts: List[str], response: str):
+        """Remember a synthesized answer for this query and context"""
+        if self.answer_cache is not None and response:
+            self.answer_cache.put(message, "\n\n".join(context_parts), response)
+    
+    def _generate(self, message: str, context_parts: List[str], prompt: str) -> Tuple[str, bool]:
+        """
+        Invoke the LLM, sharing the generation with identical concurrent requests.
+        
+        Returns the response and whether it was produced by another caller.
+        """
+        key = (normalize_query(message), fingerprint("\n\n".join(context_parts)))
+        return self.single_flight.do(key, lambda: self.llm.invoke(prompt))
+    
+    def _generate_stream(self, message: str, context_parts: List[str], prompt: str) -> Tuple[Iterator[str], bool]:
+        """
+        Stream the LLM output, sharing it with identical concurrent streams.
         
-        return analysis
+        Returns the chunk iterator and whether it follows another caller's stream.
+        """
+        key = (normalize_query(message), fingerprint("\n\n".join(context_parts)))
+        return self.single_flight.stream(key, lambda: self.llm.stream(prompt))
     
-    def chat(self, message: str, session_id: Optional[str] = None) -> str:
+    def chat(self, message: str, session_id: Optional[str] = None) -> ChatResult:
         """Process a chat message using the multi-agent system"""
+        if not session_id:
+            session_id = str(uuid.uuid4())
+        
+        started = time.perf_counter()
+        timer = StageTimer(RAG_STAGE_SECONDS)
+        query_analysis: Dict[str, Any] = {}
+        sources: List[str] = []
+        cache_hit = None
+        coalesced = False
+        answer_path = "error"
+        prompt_tokens: Dict[str, int] = {}
+        
         try:
-            if not session_id:
-                session_id = str(uuid.uuid4())
-            
-            # Get conversation history
-            conversation_history = self.get_conversation_history(session_id)
-            
-            # Analyze query type
-            query_analysis = self.analyze_query_type(message)
-            
-            # Search relevant data sources
-            search_results = {}
+            with timer.stage("routing"):
+                query_analysis = self.analyze_query_type(message)
             
-            if query_analysis['requires_projects']:
-                search_results['projects'] = self.csv_tool.search(message)
+            with timer.stage("structured_answer"):
+                structured = self._structured_answer(message, query_analysis)
             
-            if query_analysis['requires_policy']:
-                search_results['policy'] = self.pdf_tool.search(message)
+            if structured is not None:
+                final_response = structured.text
+                sources = [structured.source]
+                answer_path = "structured"
+                query_analysis['structured_intent'] = structured.intent
+            else:
+                search_results = self._search(message, query_analysis, timer)
+                
+                with timer.stage("prompt"):
+                    packed = self._pack(message, search_results)
+                    context_parts = self._build_context_parts(packed)
+                    prompt = self._build_prompt(message, context_parts) if context_parts else None
+                prompt_tokens = packed.usage
+                # Only what made it into the prompt counts as a source
+                sources = [source for source, texts in packed.sections.items() if texts]
+                
+                if not context_parts:
+                    final_response = NO_CONTEXT_RESPONSE
+                    answer_path = "no_context"
+                else:
+                    with timer.stage("cache_lookup"):
+                        final_response, cache_hit = self._cache_get(message, context_parts)
+                    answer_path = "cache"
+                    
+                    if final_response is None:
+                        # Use LLM to synthesize a natural response
+                        try:
+                            with timer.stage("llm"):
+                                final_response, coalesced = self._generate(message, context_parts, prompt)
+                            answer_path = "llm"
+                            if not coalesced:
+                                self._cache_put(message, context_parts, final_response)
+                        except Exception as llm_error:
+                            logger.error(f"LLM processing error: {llm_error}")
+                            final_response = "\n\n".join(context_parts)  # Fallback to raw data
+                            answer_path = "raw_context"
             
-            if query_analysis['requires_org']:
-                search_results['organization'] = self.json_tool.search(message)
+            # Store conversation
+            self._store_conversation(session_id, message, final_response)
             
-            # Combine search results for LLM processing
-            context_parts = []
+        except Exception as e:
+            logger.error(f"Error processing chat message: {e}")
+            final_response = f"I apologize, but I encountered an error processing your request. Please try again or contact support."
+        
+        agent_used = self.get_primary_agent(query_analysis)
+        total = time.perf_counter() - started
+        timer.record("total", total)
+        RAG_AGENT_SECONDS.observe(total, agent=agent_used)
+        RAG_ANSWER_PATHS.inc(path=answer_path)
+        
+        return ChatResult(
+            response=final_response,
+            session_id=session_id,
+            agent_used=agent_used,
+            query_analysis=query_analysis,
+            sources=sources,
+            timings=timer.timings_ms,
+            answer_path=answer_path,
+            cache_hit=cache_hit,
+            coalesced=coalesced,
+            prompt_tokens=prompt_tokens
+        )
+    
+    def stream_chat(self, message: str, session_id: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Process a chat message and yield response frames as they become available.
+        
+        Frames are dicts with a ``type`` key: ``routing`` (query analysis),
+        ``sources`` (retrieved context), ``token`` (LLM output chunk),
+        ``error`` and finally ``done`` (session id and per-stage timings).
+        """
+        if not session_id:
+            session_id = str(uuid.uuid4())
+        
+        started = time.perf_counter()
+        timer = StageTimer(RAG_STAGE_SECONDS)
+        first_token_at = None
+        response_parts: List[str] = []
+        completed = False
+        prompt_tokens: Dict[str, int] = {}
+        
+        try:
+            with timer.stage("routing"):
+                query_analysis = self.analyze_query_type(message)
             
-            if search_results.get('organization'):
-                context_parts.append(f"Organizational Data:\n{search_results['organization']}")
+            with timer.stage("structured_answer"):
+                structured = self._structured_answer(message, query_analysis)
+            if structured is not None:
+                query_analysis['structured_intent'] = structured.intent
             
-            if search_results.get('projects'):
-                context_parts.append(f"Project Data:\n{search_results['projects']}")
+            agent_used = self.get_primary_agent(query_analysis)
             
-            if search_results.get('policy'):
-                context_parts.append(f"Policy Data:\n{search_results['policy']}")
+            yield {
+                "type": "routing",
+                "session_id": session_id,
+                "agent_used": agent_used,
+                "query_analysis": query_analysis
+            }
             
-            if not context_parts:
-                final_response = "I don't have specific information about that topic in our current knowledge base. Please contact HR directly for more detailed information."
+            cache_hit = None
+            coalesced = False
+            if structured is not None:
+                answer_path = "structured"
+                yield {"type": "sources", "sources": [{"source": structured.source, "content": structured.text}]}
+                first_token_at = time.perf_counter()
+                response_parts.append(structured.text)
+                yield {"type": "token", "content": structured.text}
             else:
-                # Use LLM to synthesize a natural response
-                context = "\n\n".join(context_parts)
+                search_results = self._search(message, query_analysis, timer)
                 
-                prompt = f"""
-Based on the following company data, provide a clear and specific answer to this question: {message}
-
-Available Company Data:
-{context}
-
-Instructions:
-- Give a direct, helpful answer based only on the provided data
-- Include specific numbers, names, dates, and details when available
-- If the question asks for counts or statistics, provide exact numbers
-- Be conversational and helpful, not just a data dump
-- If the data doesn't fully answer the question, acknowledge what information is available
-
-Answer:"""
-
-                try:
-                    final_response = self.llm.invoke(prompt)
-                except Exception as llm_error:
-                    logger.error(f"LLM processing error: {llm_error}")
-                    final_response = "\n\n".join(context_parts)  # Fallback to raw data
-            
-            # Store conversation
-            self._store_conversation(session_id, message, final_response)
+                with timer.stage("prompt"):
+                    packed = self._pack(message, search_results)
+                    context_parts = self._build_context_parts(packed)
+                    prompt = self._build_prompt(message, context_parts) if context_parts else None
+                prompt_tokens = packed.usage
+                
+                # Only what made it into the prompt counts as a source
+                yield {
+                    "type": "sources",
+                    "sources": [
+                        {"source": source, "content": packed.section(source)}
+                        for source, texts in packed.sections.items()
+                        if texts
+                    ]
+                }
+                
+                if context_parts:
+                    with timer.stage("cache_lookup"):
+                        cached_response, cache_hit = self._cache_get(message, context_parts)
+                
+                if not context_parts:
+                    answer_path = "no_context"
+                    first_token_at = time.perf_counter()
+                    response_parts.append(NO_CONTEXT_RESPONSE)
+                    yield {"type": "token", "content": NO_CONTEXT_RESPONSE}
+                elif cache_hit:
+                    answer_path = "cache"
+                    first_token_at = time.perf_counter()
+                    response_parts.append(cached_response)
+                    yield {"type": "token", "content": cached_response}
+                else:
+                    answer_path = "llm"
+                    llm_started = time.perf_counter()
+                    try:
+                        chunks, coalesced = self._generate_stream(message, context_parts, prompt)
+                        for chunk in chunks:
+                            if first_token_at is None:
+                                first_token_at = time.perf_counter()
+                                timer.record("llm_first_token", first_token_at - llm_started)
+                            response_parts.append(chunk)
+                            yield {"type": "token", "content": chunk}
+                        timer.record("llm", time.perf_counter() - llm_started)
+                        if not coalesced:
+                            self._cache_put(message, context_parts, "".join(response_parts))
+                    except Exception as llm_error:
+                        logger.error(f"LLM streaming error: {llm_error}")
+                        if not response_parts:
+                            # Fallback to raw data, same as the non-streaming path
+                            answer_path = "raw_context"
+                            fallback = "\n\n".join(context_parts)
+                            first_token_at = time.perf_counter()
+                            response_parts.append(fallback)
+                            yield {"type": "token", "content": fallback}
+                        else:
+                            yield {"type": "error", "detail": "Response generation was interrupted"}
             
-            return final_response
+            completed = True
+            total = time.perf_counter() - started
+            timer.record("total", total)
+            RAG_AGENT_SECONDS.observe(total, agent=agent_used)
+            RAG_ANSWER_PATHS.inc(path=answer_path)
+            yield {
+                "type": "done",
+                "session_id": session_id,
+                "answer_path": answer_path,
+                "cache_hit": cache_hit,
+                "coalesced": coalesced,
+                "prompt_tokens": prompt_tokens,
+                "timing": {
+                    "total_ms": timer.timings_ms["total"],
+                    "time_to_first_token_ms": round((first_token_at - started) * 1000, 2) if first_token_at else None,
+                    "stages": timer.timings_ms
+                }
+            }
             
         except Exception as e:
-            logger.error(f"Error processing chat message: {e}")
-            return f"I apologize, but I encountered an error processing your request. Please try again or contact support."
+            logger.error(f"Error streaming chat message: {e}")
+            yield {
+                "type": "error",
+                "detail": "I apologize, but I encountered an error processing your request. Please try again or contact support."
+            }
+        finally:
+            # Store whatever was generated, even if the client disconnected mid-stream
+            if response_parts:
+                final_response = "".join(response_parts)
+                if not completed:
+                    logger.info(f"Stream for session {session_id} ended early after {len(final_response)} characters")
+                self._store_conversation(session_id, message, final_response)
     
     def _store_conversation(self, session_id: str, user_message: str, assistant_response: str):
-        """Store conversation in memory"""
-        if session_id not in self.conversations:
-            self.conversations[session_id] = []
-        
-        self.conversations[session_id].extend([
+        """Store the turn in the conversation store"""
+        self.conversation_store.append(session_id, [
             {"role": "user", "content": user_message, "timestamp": datetime.now().isoformat()},
             {"role": "assistant", "content": assistant_response, "timestamp": datetime.now().isoformat()}
         ])
     
     def get_conversation_history(self, session_id: str) -> List[Dict]:
         """Get conversation history for a session"""
-        return self.conversations.get(session_id, [])
+        return self.conversation_store.history(session_id)
     
     def clear_conversation(self, session_id: str):
         """Clear conversation history for a session"""
-        if session_id in self.conversations:
-            del self.conversations[session_id]
+        self.conversation_store.clear(session_id)
@@ -0,0 +1,130 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Tuple
+
+from ..core.metrics import SINGLE_FLIGHT_CALLS
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: BaseException = None
+
+
+class StreamAbandoned(RuntimeError):
+    """The leader's consumer stopped reading before the stream finished"""
+
+
+class _Stream:
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.chunks: List[Any] = []
+        self.done = False
+        self.error: BaseException = None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls with the same key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it is
+    in flight block until it finishes and receive the same result (or
+    exception). Nothing is cached once the call completes.
+
+    ``stream`` does the same for generators: callers arriving while a stream
+    is in flight replay the chunks produced so far and then follow the
+    leader's output as it arrives.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._streams: Dict[Hashable, _Stream] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Run ``fn`` once per in-flight key; returns ``(result, coalesced)``"""
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                leader = True
+
+        if not leader:
+            SINGLE_FLIGHT_CALLS.inc(role="coalesced")
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        SINGLE_FLIGHT_CALLS.inc(role="leader")
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stream(self, key: Hashable, fn: Callable[[], Iterable[Any]]) -> Tuple[Iterator[Any], bool]:
+        """
+        Run the generator ``fn`` once per in-flight key; returns ``(chunks, coalesced)``.
+
+        The leader's iterator must be consumed: followers wait on it. If the
+        leader stops reading early, followers get the chunks produced so far
+        and then ``StreamAbandoned``.
+        """
+        with self._lock:
+            stream = self._streams.get(key)
+            if stream is not None:
+                SINGLE_FLIGHT_CALLS.inc(role="coalesced")
+                return self._follow(stream), True
+            stream = self._streams[key] = _Stream()
+        SINGLE_FLIGHT_CALLS.inc(role="leader")
+        return self._lead(key, stream, fn), False
+
+    def _lead(self, key: Hashable, stream: _Stream, fn: Callable[[], Iterable[Any]]) -> Iterator[Any]:
+        error = None
+        try:
+            for chunk in fn():
+                with stream.cond:
+                    stream.chunks.append(chunk)
+                    stream.cond.notify_all()
+                yield chunk
+        except GeneratorExit:
+            error = StreamAbandoned("The leading request stopped before the stream finished")
+            raise
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            with self._lock:
+                del self._streams[key]
+            with stream.cond:
+                stream.error = error
+                stream.done = True
+                stream.cond.notify_all()
+
+    @staticmethod
+    def _follow(stream: _Stream) -> Iterator[Any]:
+        position = 0
+        while True:
+            with stream.cond:
+                while position == len(stream.chunks) and not stream.done:
+                    stream.cond.wait()
+                chunks = stream.chunks[position:]
+                position = len(stream.chunks)
+                finished, error = stream.done, stream.error
+            yield from chunks
+            if finished:
+                if error is not None:
+                    raise error
+                return
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls) + len(self._streams)
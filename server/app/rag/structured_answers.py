@@ -0,0 +1,498 @@
+import re
+from dataclasses import dataclass
+from functools import reduce
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .org_model import OrgModel
+from .projects_index import ProjectsIndex
+
+EMPLOYEE_ID_PATTERN = re.compile(r"\bemp\d{4}\b")
+PROJECT_ID_PATTERN = re.compile(r"\bproj\d+\b")
+# Negations, time windows and events change what is being counted or listed;
+# the templates only answer the current, unfiltered state
+QUALIFIER_PATTERN = re.compile(
+    r"\b(?:not|no longer|except|excluding|outside|other than|besides|"
+    r"(?:last|this|next|past|previous) (?:year|quarter|month|week)|since|before|after|during|ago|(?:19|20)\d{2}|"
+    r"left|leav(?:e|es|ing)|quit|resigned|retired|fired|laid off|terminated|"
+    r"hired|hiring|promoted|joined|joining|transferred|moved)\b|n't\b"
+)
+
+# Each template answers only the exact phrasings below. The entities a question
+# names are replaced with DEPT, LOC and EMPLOYEE first, and the whole question
+# must match one phrasing; anything more ("... who know react", "... are
+# active", "... by department") is left to the LLM.
+_PEOPLE = r"(?:employees|people|staff|members|workers|persons)"
+_HOW_MANY = r"(?:how many|(?:what is )?(?:the )?(?:total )?number of|count of)"
+_ALL = r"(?:all (?:of )?)?(?:the )?"
+_LIST = r"(?:list|show(?: me)?|name|give me)"
+_IN = r"(?:in|at|within|of|from)"
+_DEPARTMENT = r"(?:the )?DEPT(?: (?:department|team))?"
+_LOCATION = r"(?:the )?LOC(?: office)?"
+_EMPLOYEE = r"EMPLOYEE(?:'s?)?"
+_COMPANY_PREFIX = r"(?:(?:what(?:'s| is| was| are)|tell me(?: about)?|show(?: me)?) )?(?:the )?"
+
+PHRASES = {
+    "count_department_employees": [
+        rf"{_HOW_MANY} {_PEOPLE}(?: (?:are|is|there|do|does|we|have|work|working|employed))* {_IN} {_DEPARTMENT}",
+        rf"{_HOW_MANY} (?:the )?DEPT(?: department)? {_PEOPLE}(?: (?:are there|do we have))?",
+        rf"how many {_PEOPLE} does {_DEPARTMENT} have",
+        rf"(?:what is )?(?:the )?headcount (?:of|in) {_DEPARTMENT}",
+    ],
+    "list_department_employees": [
+        rf"{_LIST} {_ALL}{_PEOPLE}(?: (?:who|that))?(?: (?:are|work|are working))? {_IN} {_DEPARTMENT}",
+        rf"{_LIST} {_ALL}DEPT(?: department)? {_PEOPLE}",
+        rf"(?:who|which {_PEOPLE}) (?:works?|is working|are working|are|is) {_IN} {_DEPARTMENT}",
+        rf"who are {_ALL}{_PEOPLE} {_IN} {_DEPARTMENT}",
+    ],
+    "count_department_projects": [
+        rf"{_HOW_MANY} projects(?: (?:are there|are|exist|do we have))? (?:in|for|under|of) {_DEPARTMENT}",
+        rf"how many projects (?:does|do) {_DEPARTMENT} (?:have|run)",
+    ],
+    "list_department_projects": [
+        rf"{_LIST} {_ALL}projects (?:in|for|under|of|run by) {_DEPARTMENT}",
+        rf"{_LIST} {_ALL}DEPT(?: department)? projects",
+        rf"(?:what|which) projects (?:(?:does|do) {_DEPARTMENT} (?:have|run)|are (?:in|under|run by) {_DEPARTMENT})",
+        rf"what are {_ALL}projects (?:in|for|under|of) {_DEPARTMENT}",
+    ],
+    "count_projects": [
+        rf"{_HOW_MANY} projects(?: (?:are there|exist|do we have|(?:are there )?in total|(?:does|do) {{company}} (?:have|run)))?",
+        r"(?:what is )?(?:the )?(?:total (?:number of )?projects|project count)",
+    ],
+    "list_projects": [
+        rf"{_LIST} {_ALL}projects",
+        r"(?:what|which) projects (?:are there|exist|do we have)",
+        r"what are (?:all )?(?:the |our )?projects",
+    ],
+    "department_head": [
+        rf"who (?:heads|leads|runs|is in charge of) {_DEPARTMENT}",
+        rf"who is (?:the )?(?:head|leader|lead|director) of {_DEPARTMENT}",
+        rf"who is (?:the )?DEPT(?: department)? (?:head|leader|lead|director)",
+    ],
+    "count_location_employees": [
+        rf"{_HOW_MANY} {_PEOPLE}(?: (?:are|is|there|do|we|have|work|working|employed|based|located))* (?:in|at) {_LOCATION}",
+        rf"{_HOW_MANY} (?:the )?LOC {_PEOPLE}(?: are there)?",
+    ],
+    "list_location_employees": [
+        rf"{_LIST} {_ALL}{_PEOPLE}(?: (?:who|that))?(?: (?:are|work|are working|are based|are located))? (?:in|at) {_LOCATION}",
+        rf"(?:who|which {_PEOPLE}) (?:works?|is working|are working|are|is|is based|are based|is located|are located) (?:in|at) {_LOCATION}",
+        rf"{_LIST} {_ALL}LOC {_PEOPLE}",
+    ],
+    "employee_manager": [
+        rf"who(?: is|'s) {_EMPLOYEE} (?:manager|boss|supervisor)",
+        rf"who(?: is|'s) (?:the )?(?:manager|boss|supervisor) (?:of|for) {_EMPLOYEE}",
+        rf"who (?:does|do) {_EMPLOYEE} report to",
+        rf"who manages {_EMPLOYEE}",
+        rf"who is {_EMPLOYEE} managed by",
+        rf"(?:what is |show(?: me)? )?{_EMPLOYEE} (?:manager|boss|supervisor|reporting (?:chain|line)|chain of command)",
+        rf"(?:what is |show(?: me)? )?(?:the )?(?:reporting (?:chain|line)|chain of command) (?:of|for) {_EMPLOYEE}",
+    ],
+    "employee_reports": [
+        rf"who reports to {_EMPLOYEE}",
+        rf"who (?:does|do) {_EMPLOYEE} manage",
+        rf"who (?:are|is) {_EMPLOYEE} (?:direct reports?|reportees|subordinates|reports)",
+        rf"{_LIST} {_EMPLOYEE} (?:direct reports?|reportees|subordinates|reports)",
+        rf"(?:who are )?(?:the )?(?:direct reports|reportees|subordinates) of {_EMPLOYEE}",
+        rf"how many (?:direct reports|reportees|subordinates|people) (?:does {_EMPLOYEE} have|report to {_EMPLOYEE})",
+    ],
+    "employee_lookup": [
+        rf"(?:tell me about|who is) {_EMPLOYEE}",
+        rf"what does {_EMPLOYEE} (?:do|work on)",
+        rf"(?:what|which) projects? (?:is|does) {_EMPLOYEE} (?:working on|work on|assigned to|on|involved in)",
+        rf"(?:what|which) projects? (?:is|are) assigned to {_EMPLOYEE}",
+        rf"what (?:is|are) {_EMPLOYEE} (?:role|roles|assignments|projects|project assignments|department)",
+        rf"{_LIST} {_EMPLOYEE} (?:projects|assignments|roles|project assignments)",
+        rf"(?:what|which) department (?:is|does) {_EMPLOYEE} (?:in|work in)",
+        rf"where does {_EMPLOYEE} work",
+    ],
+    "company_headcount": [
+        rf"{_HOW_MANY} {_PEOPLE}(?: (?:(?:does|do) {{company}} (?:have|employ)|(?:are there |work |are )?(?:in|at) {{company}}|(?:are there )?in total))",
+        r"(?:what is )?(?:(?:the|our) )?(?:{company}(?:'s)? |total |overall )headcount",
+    ],
+}
+
+# Company facts answerable from organization_info. Each pattern must refer to
+# the company itself; {company} is filled in with the ways to name it
+COMPANY_REFERENCE = r"(?:(?:the|our|this) (?:company|firm|organi[sz]ation|business)|we|{name})"
+COMPANY_FACTS = {
+    "headquarters": (
+        r"(?:where (?:is|are) {company} (?:headquartered|based|located)|"
+        r"{company}(?:'s)? (?:headquarters|hq|head office)|(?:headquarters|hq|head office) of {company})"
+    ),
+    "founded": (
+        r"(?:(?:when|what year) (?:was|were) {company} (?:founded|established)|"
+        r"{company}(?:'s)? founding (?:year|date)|(?:founding (?:year|date)|year) of {company})"
+    ),
+    "mission": r"(?:{company}(?:'s)? mission|mission of {company}|our mission)",
+    "industry": (
+        r"(?:what industry (?:is|are) {company} in|{company}(?:'s)? industry|industry of {company})"
+    ),
+}
+
+DEPARTMENT_ALIASES = {"hr": "human resources"}
+
+_WORD = re.compile(r"\w+(?:['.-]\w+)*")
+_POSSESSIVE = re.compile(r"'s\b")
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING = re.compile(r"[\s?.!]+$")
+_POLITE = re.compile(r"^(?:(?:please|can you|could you) )+|,? please$")
+
+
+@dataclass
+class StructuredAnswer:
+    """Answer computed directly from structured data"""
+
+    intent: str
+    text: str
+    source: str
+
+
+def _alternation(terms: List[str]) -> Optional[re.Pattern]:
+    """Word-bounded alternation, longest terms first so 'it support' beats 'it'"""
+    terms = sorted({term for term in terms if term}, key=len, reverse=True)
+    if not terms:
+        return None
+    return re.compile(r"\b(" + "|".join(re.escape(term) for term in terms) + r")\b")
+
+
+def _join(items: List[str]) -> str:
+    return ", ".join(items)
+
+
+def _concat(*parts) -> np.ndarray:
+    """Element-wise string concatenation of string arrays and literals"""
+    return reduce(np.char.add, parts)
+
+
+class StructuredAnswerEngine:
+    """
+    Deterministic answers for count, list and lookup questions.
+
+    Covers questions that ``projects.csv`` and the organizational JSON answer
+    exactly (department headcounts, project counts and lists, an employee's
+    assignments, managers and reports, department heads, location headcounts,
+    basic company facts), so they skip LLM synthesis entirely. A question is
+    answered only when, with its department, location and employee replaced
+    by placeholders, it matches one of the template's ``PHRASES`` in full;
+    ``answer`` returns ``None`` whenever it asks for more than that. Project
+    questions are answered from a ``ProjectsIndex`` and organizational ones
+    from an ``OrgModel``, both built once.
+    """
+
+    def __init__(
+        self,
+        projects: Optional[pd.DataFrame],
+        org_data: Union[Dict[str, Any], OrgModel, None]
+    ):
+        self.projects = projects if projects is not None else pd.DataFrame()
+        self.org = org_data if isinstance(org_data, OrgModel) else OrgModel(org_data)
+        self.org_info = self.org.info
+        self.index = ProjectsIndex(self.projects) if not self.projects.empty else None
+
+        departments = []
+        names = []
+        project_names = []
+        if self.index is not None:
+            if "department" in self.index.indexed_columns:
+                departments = self.index.distinct("department")
+            if "employee_name" in self.index.indexed_columns:
+                names = self.index.distinct("employee_name")
+            if "project_name" in self.index.indexed_columns:
+                project_names = [name.lower() for name in self.index.distinct("project_name")]
+
+        departments = [*departments, *self.org.departments]
+        names = [*names, *self.org.names()]
+
+        self._departments = {department.lower(): department for department in departments}
+        self._department_pattern = _alternation(list(self._departments) + list(DEPARTMENT_ALIASES))
+        # "Project Phoenix" is also asked about as just "phoenix"
+        self._project_pattern = _alternation(
+            project_names + [re.sub(r"^project\s+", "", name) for name in project_names]
+        )
+        company_name = str(self.org_info.get("company_name") or "the company").lower()
+        company = COMPANY_REFERENCE.format(name=re.escape(company_name))
+        self._company_facts = {
+            fact: re.compile(_COMPANY_PREFIX + pattern.format(company=company))
+            for fact, pattern in COMPANY_FACTS.items()
+        }
+        self._phrases = {
+            intent: [re.compile(pattern.replace("{company}", company)) for pattern in patterns]
+            for intent, patterns in PHRASES.items()
+        }
+        self._locations = {location.lower(): location for location in self.org.locations()}
+        self._location_pattern = _alternation(list(self._locations))
+        # Names are matched by looking up word n-grams, which stays fast with
+        # hundreds of thousands of employees where one big regex would not
+        self._names = {" ".join(_WORD.findall(name.lower())): name for name in names}
+        self._max_name_words = max((len(name.split()) for name in self._names), default=0)
+
+    def _find_department(self, query: str) -> Tuple[Optional[str], Optional[re.Match]]:
+        """Department named in the query, and where it was found"""
+        if not self._department_pattern:
+            return None, None
+        match = self._department_pattern.search(query)
+        if not match:
+            return None, None
+        key = DEPARTMENT_ALIASES.get(match.group(1), match.group(1))
+        return self._departments.get(key), match
+
+    def _names_project(self, query: str) -> bool:
+        if PROJECT_ID_PATTERN.search(query):
+            return True
+        return bool(self._project_pattern and self._project_pattern.search(query))
+
+    def _find_location(self, query: str) -> Tuple[Optional[str], Optional[re.Match]]:
+        match = self._location_pattern.search(query) if self._location_pattern else None
+        return (self._locations[match.group(1)], match) if match else (None, None)
+
+    def _find_name(self, query: str) -> Tuple[Optional[str], Optional[Tuple[int, int]]]:
+        """Leftmost, longest employee name occurring in the query, and its span"""
+        # Blank out possessives ("charles jones's manager") without shifting positions
+        words = list(_WORD.finditer(_POSSESSIVE.sub("  ", query)))
+        for start in range(len(words)):
+            for size in range(min(self._max_name_words, len(words) - start), 0, -1):
+                name = self._names.get(" ".join(word.group(0) for word in words[start:start + size]))
+                if name:
+                    return name, (words[start].start(), words[start + size - 1].end())
+        return None, None
+
+    def _org_employee_id(self, employee_id: Optional[str], name: Optional[str]) -> Optional[str]:
+        if employee_id:
+            return employee_id if self.org.employee(employee_id) else None
+        matches = self.org.find_by_name(name) if name else []
+        # Ambiguous names are left to the LLM
+        return matches[0]["employee_id"] if len(matches) == 1 else None
+
+    @staticmethod
+    def _normalize(query: str) -> str:
+        query = _WHITESPACE.sub(" ", query.lower()).strip()
+        query = _TRAILING.sub("", query)
+        return _POLITE.sub("", query)
+
+    @staticmethod
+    def _placeholders(query: str, spans: List[Tuple[int, int, str]]) -> str:
+        """The query with each entity span replaced by its placeholder; overlapping spans keep the first"""
+        parts = []
+        position = 0
+        for start, end, token in sorted(spans):
+            if start < position:
+                continue
+            parts.append(query[position:start])
+            parts.append(token)
+            position = end
+        parts.append(query[position:])
+        return "".join(parts)
+
+    def _intent(self, text: str) -> Optional[str]:
+        for intent, patterns in self._phrases.items():
+            if any(pattern.fullmatch(text) for pattern in patterns):
+                return intent
+        for fact, pattern in self._company_facts.items():
+            if pattern.fullmatch(text):
+                return f"company_{fact}"
+        return None
+
+    def answer(self, query: str) -> Optional[StructuredAnswer]:
+        """Answer the query from structured data, or return None to fall back to the LLM"""
+        query = self._normalize(query)
+        # Questions about one project ("who leads project phoenix") are not
+        # aggregates; leave them to the LLM, as well as qualified ones
+        if QUALIFIER_PATTERN.search(query) or self._names_project(query):
+            return None
+
+        spans: List[Tuple[int, int, str]] = []
+        employee_match = EMPLOYEE_ID_PATTERN.search(query)
+        employee_id = employee_match.group(0).upper() if employee_match else None
+        name, name_span = (None, None) if employee_match else self._find_name(query)
+        if employee_match:
+            spans.append((employee_match.start(), employee_match.end(), "EMPLOYEE"))
+        elif name_span:
+            spans.append((*name_span, "EMPLOYEE"))
+        department, department_match = self._find_department(query)
+        if department:
+            spans.append((department_match.start(), department_match.end(), "DEPT"))
+        location, location_match = self._find_location(query)
+        if location:
+            spans.append((location_match.start(), location_match.end(), "LOC"))
+
+        intent = self._intent(self._placeholders(query, spans))
+        if intent is None:
+            return None
+
+        if intent in ("employee_manager", "employee_reports"):
+            org_employee_id = self._org_employee_id(employee_id, name) if self.org.employees else None
+            if org_employee_id is None:
+                return None
+            if intent == "employee_reports":
+                return self._direct_reports(org_employee_id)
+            return self._manager(org_employee_id)
+        if intent == "department_head":
+            return self._department_head(department) if department in self.org.departments else None
+        if intent == "count_location_employees":
+            return self._count_location_employees(location)
+        if intent == "list_location_employees":
+            return self._list_location_employees(location)
+        if intent == "company_headcount" or intent.startswith("company_"):
+            if not self.org_info:
+                return None
+            return self._company_headcount() if intent == "company_headcount" else self._company_fact(intent[len("company_"):])
+
+        # The rest are answered from projects.csv
+        if self.index is None:
+            return None
+        if intent == "employee_lookup":
+            return self._employee_lookup(employee_id=employee_id, name=name)
+        if intent == "count_department_employees":
+            return self._count_department_employees(department)
+        if intent == "list_department_employees":
+            return self._list_department_employees(department)
+        if intent == "count_department_projects":
+            return self._count_projects(department)
+        if intent == "list_department_projects":
+            return self._list_projects(department)
+        if intent == "count_projects":
+            return self._count_projects()
+        return self._list_projects()
+
+    # Projects.csv intents
+
+    def _count_department_employees(self, department: str) -> StructuredAnswer:
+        count = self.index.group_counts("department", distinct="employee_id").get(department, 0)
+        return StructuredAnswer(
+            intent="count_department_employees",
+            text=f"There are {count} employees working in the {department} department.",
+            source="projects"
+        )
+
+    def _list_department_employees(self, department: str) -> StructuredAnswer:
+        names = self.index.group_values("department", "employee_name").get(department, [])
+        return StructuredAnswer(
+            intent="list_department_employees",
+            text=f"The {department} department has {len(names)} employees: {_join(names)}.",
+            source="projects"
+        )
+
+    def _count_projects(self, department: Optional[str] = None) -> StructuredAnswer:
+        if department:
+            count = self.index.group_counts("department", distinct="project_id").get(department, 0)
+            names = self.index.group_values("department", "project_name").get(department, [])
+        else:
+            count = self.index.count_distinct("project_id")
+            names = self.index.distinct("project_name")
+        scope = f" in the {department} department" if department else ""
+        return StructuredAnswer(
+            intent="count_projects",
+            text=f"There are {count} projects{scope}, under {len(names)} project names: {_join(names)}.",
+            source="projects"
+        )
+
+    def _list_projects(self, department: Optional[str] = None) -> StructuredAnswer:
+        rows = self.index.rows(department=department) if department else None
+        project_names = self.index.first_values("project_id", "project_name", rows)
+        project_ids = sorted(project_names)
+        scope = f" in the {department} department" if department else ""
+        items = [f"{project_id} ({project_names[project_id]})" for project_id in project_ids]
+        return StructuredAnswer(
+            intent="list_projects",
+            text=f"There are {len(items)} projects{scope}: {_join(items)}.",
+            source="projects"
+        )
+
+    def _employee_lookup(self, employee_id: Optional[str], name: Optional[str]) -> Optional[StructuredAnswer]:
+        if employee_id:
+            rows = self.index.rows(employee_id=employee_id)
+        else:
+            rows = self.index.rows(employee_name=name)
+        if len(rows) == 0:
+            return None
+
+        rows = rows[np.argsort(self.index.take("start_date", rows).astype(str), kind="stable")]
+        first = rows[0]
+        # Formatted column-wise over the matching rows rather than row by row
+        def column(name: str) -> np.ndarray:
+            return self.index.take(name, rows).astype(str)
+
+        assignments = _concat(
+            column("project_name"), " (", column("project_id"), ") as ",
+            column("role_in_project"), " since ", column("start_date")
+        )
+        return StructuredAnswer(
+            intent="employee_lookup",
+            text=(
+                f"{self.index.take('employee_name', first)} ({self.index.take('employee_id', first)}) works in the "
+                f"{self.index.take('department', first)} department and is assigned to {len(assignments)} projects: "
+                f"{'; '.join(assignments)}."
+            ),
+            source="projects"
+        )
+
+    # Organizational JSON intents
+
+    def _manager(self, employee_id: str) -> StructuredAnswer:
+        chain = self.org.reporting_chain(employee_id)
+        employee = self.org.describe(employee_id)
+        if not chain:
+            text = f"{employee} has no manager in the organizational data; they are at the top of their reporting line."
+        else:
+            text = f"{employee} reports to {self.org.describe(chain[0])}."
+            if len(chain) > 1:
+                text += f" Full reporting chain: {' -> '.join(self.org.describe(item) for item in [employee_id, *chain])}."
+        return StructuredAnswer(intent="employee_manager", text=text, source="organization")
+
+    def _direct_reports(self, employee_id: str) -> StructuredAnswer:
+        direct = self.org.direct_reports(employee_id)
+        everyone = self.org.all_reports(employee_id)
+        employee = self.org.describe(employee_id)
+        if not direct:
+            text = f"{employee} has no direct reports."
+        else:
+            text = f"{employee} has {len(direct)} direct reports: {_join([self.org.describe(item) for item in direct])}"
+            if len(everyone) > len(direct):
+                text += f"; {len(everyone)} people report to them directly or indirectly."
+            else:
+                text += "."
+        return StructuredAnswer(intent="employee_reports", text=text, source="organization")
+
+    def _department_head(self, department: str) -> StructuredAnswer:
+        info = self.org.departments[department]
+        text = f"The {department} department is headed by {info.get('head', 'N/A')}."
+        if info.get("team_size") is not None:
+            text += f" It has a team size of {info['team_size']}."
+        if info.get("focus_areas"):
+            text += f" Focus areas: {_join(info['focus_areas'])}."
+        return StructuredAnswer(intent="department_head", text=text, source="organization")
+
+    def _count_location_employees(self, location: str) -> StructuredAnswer:
+        text = f"There are {self.org.location_headcount(location)} employees based in {location}."
+        office = self.org.office_locations.get(location)
+        if office:
+            text += f" The {location} office is at {office.get('address', 'N/A')} (capacity {office.get('capacity', 'N/A')})."
+        return StructuredAnswer(intent="count_location_employees", text=text, source="organization")
+
+    def _list_location_employees(self, location: str) -> StructuredAnswer:
+        members = [self.org.describe(employee_id) for employee_id in self.org.location_members(location)]
+        return StructuredAnswer(
+            intent="list_location_employees",
+            text=f"{len(members)} employees are based in {location}: {_join(members)}.",
+            source="organization"
+        )
+
+    def _company_headcount(self) -> StructuredAnswer:
+        company = self.org_info.get("company_name", "The company")
+        return StructuredAnswer(
+            intent="company_headcount",
+            text=f"{company} has {self.org_info.get('employees_count', 'an unknown number of')} employees.",
+            source="organization"
+        )
+
+    def _company_fact(self, fact: str) -> StructuredAnswer:
+        company = self.org_info.get("company_name", "The company")
+        templates = {
+            "headquarters": f"{company} is headquartered in {self.org_info.get('headquarters', 'N/A')}.",
+            "founded": f"{company} was founded in {self.org_info.get('founded', 'N/A')}.",
+            "mission": f"{company}'s mission is: {self.org_info.get('mission', 'N/A')}.",
+            "industry": f"{company} operates in the {self.org_info.get('industry', 'N/A')} industry.",
+        }
+        return StructuredAnswer(intent=f"company_{fact}", text=templates[fact], source="organization")
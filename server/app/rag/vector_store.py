@@ -0,0 +1,384 @@
+import json
+import logging
+import os
+import threading
+import uuid
+from typing import Any, Dict, List, Optional, Protocol, Sequence, runtime_checkable
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Search results use the same shape as CrewAI's RAG clients: id, content, metadata, score
+SearchResult = Dict[str, Any]
+
+
+@runtime_checkable
+class VectorStore(Protocol):
+    """Storage and similarity search over embedded text chunks"""
+
+    def add(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        texts: Sequence[str],
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+        ids: Optional[Sequence[str]] = None
+    ) -> List[str]:
+        """Store chunks with their embeddings and return their ids"""
+        ...
+
+    def search(
+        self,
+        query_embedding: Sequence[float],
+        limit: int = 5,
+        source: Optional[str] = None
+    ) -> List[SearchResult]:
+        """Most similar chunks, best first, optionally only from one ``source``"""
+        ...
+
+    def search_batch(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        limit: int = 5,
+        source: Optional[str] = None
+    ) -> List[List[SearchResult]]:
+        """``search`` for several queries at once"""
+        ...
+
+    def delete(self, ids: Sequence[str]) -> int:
+        """Remove chunks by id and return how many were removed"""
+        ...
+
+    def count(self) -> int:
+        ...
+
+
+def save_store(store: VectorStore):
+    """Persist a store that buffers writes in memory; stores that write through have no ``save``"""
+    save = getattr(store, "save", None)
+    if callable(save):
+        save()
+
+
+class NumpyVectorStore:
+    """
+    In-process flat vector index.
+
+    Embeddings live in one contiguous, L2-normalized matrix (float32, or
+    float16 to halve memory), so a search is a single matrix product followed
+    by ``argpartition`` for the top k. Capacity grows geometrically, so adding
+    chunks one batch at a time stays amortized O(1) per row. With a ``path``
+    the index is saved as ``vectors.npy`` plus ``records.json`` in that
+    directory and loaded back on construction. Writes stay in memory until
+    ``save()``, since each save rewrites both files; ``autosave=True`` saves
+    after every ``add`` and ``delete`` instead.
+    """
+
+    # Rows scored per block when vectors are float16, to bound temporary memory
+    BLOCK_ROWS = 4096
+
+    def __init__(self, path: Optional[str] = None, dtype: str = "float32", autosave: bool = False):
+        if dtype not in ("float32", "float16"):
+            raise ValueError("dtype must be 'float32' or 'float16'")
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.autosave = autosave
+
+        self._lock = threading.RLock()
+        self._vectors = np.zeros((0, 0), dtype=self.dtype)
+        self._size = 0
+        self._ids: List[str] = []
+        self._texts: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._positions: Dict[str, int] = {}
+        self._source_codes: Dict[str, int] = {}
+        self._sources = np.zeros(0, dtype=np.int32)
+
+        if path and os.path.exists(os.path.join(path, "vectors.npy")):
+            self.load()
+
+    @property
+    def dimension(self) -> int:
+        return self._vectors.shape[1]
+
+    def count(self) -> int:
+        return self._size
+
+    def __len__(self) -> int:
+        return self._size
+
+    # Writes
+
+    def _normalize(self, vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _source_code(self, metadata: Dict[str, Any]) -> int:
+        source = metadata.get("source")
+        if source is None:
+            return -1
+        return self._source_codes.setdefault(str(source), len(self._source_codes))
+
+    def _reserve(self, rows: int, dimension: int):
+        if self._vectors.shape[1] != dimension:
+            if self._size:
+                raise ValueError(f"Embedding dimension {dimension} does not match index dimension {self.dimension}")
+            self._vectors = np.zeros((0, dimension), dtype=self.dtype)
+        needed = self._size + rows
+        if needed <= len(self._vectors):
+            return
+        capacity = max(needed, 2 * len(self._vectors), 1024)
+        vectors = np.zeros((capacity, dimension), dtype=self.dtype)
+        vectors[:self._size] = self._vectors[:self._size]
+        sources = np.full(capacity, -1, dtype=np.int32)
+        sources[:self._size] = self._sources[:self._size]
+        self._vectors, self._sources = vectors, sources
+
+    def add(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        texts: Sequence[str],
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+        ids: Optional[Sequence[str]] = None
+    ) -> List[str]:
+        """Store chunks with their embeddings; existing ids are replaced"""
+        if not texts:
+            return []
+        vectors = self._normalize(np.asarray(embeddings, dtype=np.float32).reshape(len(texts), -1))
+        metadatas = list(metadatas) if metadatas is not None else [{} for _ in texts]
+        ids = [str(id_) for id_ in ids] if ids is not None else [str(uuid.uuid4()) for _ in texts]
+        if not (len(vectors) == len(texts) == len(metadatas) == len(ids)):
+            raise ValueError("embeddings, texts, metadatas and ids must have the same length")
+
+        with self._lock:
+            existing = [id_ for id_ in ids if id_ in self._positions]
+            if existing:
+                self._delete(existing)
+            self._reserve(len(ids), vectors.shape[1])
+            start = self._size
+            self._vectors[start:start + len(ids)] = vectors
+            for offset, (id_, text, metadata) in enumerate(zip(ids, texts, metadatas)):
+                self._sources[start + offset] = self._source_code(metadata)
+                self._positions[id_] = start + offset
+            self._ids.extend(ids)
+            self._texts.extend(texts)
+            self._metadatas.extend(dict(metadata) for metadata in metadatas)
+            self._size += len(ids)
+            if self.autosave:
+                self.save()
+        return ids
+
+    def _delete(self, ids: Sequence[str]) -> int:
+        rows = sorted({self._positions[id_] for id_ in ids if id_ in self._positions})
+        if not rows:
+            return 0
+        keep = np.ones(self._size, dtype=bool)
+        keep[rows] = False
+        remaining = int(keep.sum())
+        self._vectors[:remaining] = self._vectors[:self._size][keep]
+        self._sources[:remaining] = self._sources[:self._size][keep]
+        removed = set(rows)
+        self._ids = [id_ for row, id_ in enumerate(self._ids) if row not in removed]
+        self._texts = [text for row, text in enumerate(self._texts) if row not in removed]
+        self._metadatas = [metadata for row, metadata in enumerate(self._metadatas) if row not in removed]
+        self._positions = {id_: row for row, id_ in enumerate(self._ids)}
+        self._size = remaining
+        return len(rows)
+
+    def delete(self, ids: Sequence[str]) -> int:
+        with self._lock:
+            removed = self._delete(ids)
+            if removed and self.autosave:
+                self.save()
+        return removed
+
+    def delete_where(self, source: str) -> int:
+        """Remove every chunk whose metadata ``source`` matches"""
+        with self._lock:
+            code = self._source_codes.get(source)
+            if code is None:
+                return 0
+            rows = np.flatnonzero(self._sources[:self._size] == code)
+            return self.delete([self._ids[row] for row in rows])
+
+    # Search
+
+    def _scores(self, queries: np.ndarray) -> np.ndarray:
+        """Cosine similarity of each query against every stored vector"""
+        matrix = self._vectors[:self._size]
+        if self.dtype == np.float32:
+            return queries @ matrix.T
+        scores = np.empty((len(queries), self._size), dtype=np.float32)
+        for start in range(0, self._size, self.BLOCK_ROWS):
+            block = matrix[start:start + self.BLOCK_ROWS].astype(np.float32)
+            scores[:, start:start + len(block)] = queries @ block.T
+        return scores
+
+    def search_batch(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        limit: int = 5,
+        source: Optional[str] = None
+    ) -> List[List[SearchResult]]:
+        queries = self._normalize(np.atleast_2d(np.asarray(query_embeddings, dtype=np.float32)))
+        with self._lock:
+            if not self._size or limit <= 0:
+                return [[] for _ in queries]
+            if queries.shape[1] != self.dimension:
+                raise ValueError(f"Query dimension {queries.shape[1]} does not match index dimension {self.dimension}")
+
+            scores = self._scores(queries)
+            if source is not None:
+                code = self._source_codes.get(source)
+                if code is None:
+                    return [[] for _ in queries]
+                scores[:, self._sources[:self._size] != code] = -np.inf
+
+            k = min(limit, self._size)
+            if k < self._size:
+                top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            else:
+                top = np.tile(np.arange(self._size), (len(queries), 1))
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind="stable")
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+
+            return [
+                [
+                    {
+                        "id": self._ids[row],
+                        "content": self._texts[row],
+                        "metadata": self._metadatas[row],
+                        "score": float(score)
+                    }
+                    for row, score in zip(rows, row_scores)
+                    if np.isfinite(score)
+                ]
+                for rows, row_scores in zip(top, top_scores)
+            ]
+
+    def search(
+        self,
+        query_embedding: Sequence[float],
+        limit: int = 5,
+        source: Optional[str] = None
+    ) -> List[SearchResult]:
+        return self.search_batch([query_embedding], limit=limit, source=source)[0]
+
+    # Persistence
+
+    def save(self, path: Optional[str] = None):
+        """Write the index to ``path`` (default: the constructor path)"""
+        path = path or self.path
+        if not path:
+            return
+        os.makedirs(path, exist_ok=True)
+        with self._lock:
+            vectors = self._vectors[:self._size]
+            records = {
+                "dtype": self.dtype.name,
+                "dimension": int(vectors.shape[1]),
+                "ids": self._ids,
+                "texts": self._texts,
+                "metadatas": self._metadatas,
+            }
+            # Write then rename so readers never see a half-written index
+            with open(os.path.join(path, "vectors.tmp.npy"), "wb") as f:
+                np.save(f, vectors)
+            with open(os.path.join(path, "records.tmp.json"), "w", encoding="utf-8") as f:
+                json.dump(records, f)
+            os.replace(os.path.join(path, "vectors.tmp.npy"), os.path.join(path, "vectors.npy"))
+            os.replace(os.path.join(path, "records.tmp.json"), os.path.join(path, "records.json"))
+
+    def load(self, path: Optional[str] = None):
+        path = path or self.path
+        vectors = np.load(os.path.join(path, "vectors.npy"))
+        with open(os.path.join(path, "records.json"), "r", encoding="utf-8") as f:
+            records = json.load(f)
+        if len(vectors) != len(records["ids"]):
+            raise ValueError(f"Vector store at {path} is inconsistent: {len(vectors)} vectors, {len(records['ids'])} records")
+
+        with self._lock:
+            self._vectors = np.ascontiguousarray(vectors.astype(self.dtype, copy=False))
+            self._size = len(vectors)
+            self._ids = records["ids"]
+            self._texts = records["texts"]
+            self._metadatas = records["metadatas"]
+            self._positions = {id_: row for row, id_ in enumerate(self._ids)}
+            self._source_codes = {}
+            self._sources = np.array([self._source_code(metadata) for metadata in self._metadatas], dtype=np.int32)
+        logger.info(f"Loaded {self._size} vectors from {path}")
+
+
+class ChromaVectorStore:
+    """
+    ``VectorStore`` over a persistent ChromaDB collection.
+
+    Uses its own ``chromadb.PersistentClient`` with precomputed embeddings,
+    rather than CrewAI's process-global RAG configuration.
+    """
+
+    def __init__(self, collection_name: str, persist_directory: str = "./chromadb_data"):
+        import chromadb
+
+        self.client = chromadb.PersistentClient(path=persist_directory)
+        self.collection = self.client.get_or_create_collection(
+            name=collection_name,
+            metadata={"hnsw:space": "cosine"}
+        )
+
+    def add(
+        self,
+        embeddings: Sequence[Sequence[float]],
+        texts: Sequence[str],
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+        ids: Optional[Sequence[str]] = None
+    ) -> List[str]:
+        ids = [str(id_) for id_ in ids] if ids is not None else [str(uuid.uuid4()) for _ in texts]
+        self.collection.upsert(
+            ids=ids,
+            embeddings=[list(map(float, embedding)) for embedding in embeddings],
+            documents=list(texts),
+            metadatas=[dict(metadata) or {"source": "unknown"} for metadata in metadatas] if metadatas else None
+        )
+        return ids
+
+    def search_batch(
+        self,
+        query_embeddings: Sequence[Sequence[float]],
+        limit: int = 5,
+        source: Optional[str] = None
+    ) -> List[List[SearchResult]]:
+        results = self.collection.query(
+            query_embeddings=[list(map(float, embedding)) for embedding in query_embeddings],
+            n_results=limit,
+            where={"source": source} if source is not None else None
+        )
+        return [
+            [
+                {"id": id_, "content": text, "metadata": metadata or {}, "score": 1.0 - distance}
+                for id_, text, metadata, distance in zip(ids, texts, metadatas, distances)
+            ]
+            for ids, texts, metadatas, distances in zip(
+                results["ids"], results["documents"], results["metadatas"], results["distances"]
+            )
+        ]
+
+    def search(
+        self,
+        query_embedding: Sequence[float],
+        limit: int = 5,
+        source: Optional[str] = None
+    ) -> List[SearchResult]:
+        return self.search_batch([query_embedding], limit=limit, source=source)[0]
+
+    def delete(self, ids: Sequence[str]) -> int:
+        existing = self.collection.get(ids=list(ids))["ids"]
+        if existing:
+            self.collection.delete(ids=existing)
+        return len(existing)
+
+    def count(self) -> int:
+        return self.collection.count()
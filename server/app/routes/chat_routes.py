@@ -1,18 +1,128 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Optional
+from typing import TYPE_CHECKING, Optional, AsyncIterator, Dict, List
+import asyncio
+import json
 import uuid
-from ..rag.simplified_multi_agent_rag import SimplifiedMultiAgentRAGSystem
+from ..rag.health import OllamaHealthProbe
+from ..rag.answer_cache import AnswerCache, data_version
+from ..rag.embeddings import OllamaBatchEmbedder
+from ..rag.embedding_cache import default_embedding_cache
+from ..rag.query_router import QueryRouter
+from ..rag.conversation_store import create_conversation_store
+from ..rag.prompts import SYNTHESIS_INSTRUCTIONS
+from ..core.config import settings
+from ..core.executor import BoundedExecutor, ExecutorSaturatedError
+from ..core.lazy import LazyResource
+from ..core.metrics import (
+    RAG_EXECUTOR_WAIT_SECONDS,
+    RAG_EXECUTOR_QUEUED,
+    RAG_EXECUTOR_ACTIVE,
+    RAG_EXECUTOR_REJECTED,
+    ANSWER_CACHE_ENTRIES,
+    CONVERSATION_SESSIONS,
+    RAG_SYSTEM_LOAD_SECONDS
+)
 from ..database.database import get_db_connection
 from ..models.chat_models import ChatRequest, ChatResponse
 import logging
 
+if TYPE_CHECKING:
+    from ..rag.simplified_multi_agent_rag import SimplifiedMultiAgentRAGSystem
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/chat", tags=["chat"])
 
 # Initialize the simplified multi-agent RAG system
-rag_system = SimplifiedMultiAgentRAGSystem()
+RAG_CONTEXT_PATH = "./RAG_context"
+
+
+def _build_answer_cache() -> Optional[AnswerCache]:
+    """Create the answer cache configured in settings, if enabled"""
+    if not settings.answer_cache_enabled:
+        return None
+    
+    embed_fn = None
+    if settings.answer_cache_embedding_model:
+        embed_fn = OllamaBatchEmbedder(
+            model=settings.answer_cache_embedding_model,
+            base_url=settings.ollama_base_url,
+            cache=default_embedding_cache()
+        ).embed_query
+    
+    return AnswerCache(
+        max_entries=settings.answer_cache_max_entries,
+        ttl_seconds=settings.answer_cache_ttl_seconds,
+        version_fn=lambda: data_version(RAG_CONTEXT_PATH),
+        persist_path=settings.answer_cache_path,
+        embed_fn=embed_fn,
+        similarity_threshold=settings.answer_cache_similarity_threshold
+    )
+
+
+answer_cache = _build_answer_cache()
+if answer_cache is not None:
+    ANSWER_CACHE_ENTRIES.set_function(lambda: answer_cache.stats()["entries"])
+
+conversation_store = create_conversation_store()
+# Reads a cached count, so scrapes never query the database from the event loop
+CONVERSATION_SESSIONS.set_function(conversation_store.session_count)
+
+
+def _build_rag_system() -> "SimplifiedMultiAgentRAGSystem":
+    # Imported here: crewai, langchain and pandas take seconds to import, and the
+    # data files and agents take more to load; none of it should delay startup
+    from ..rag.simplified_multi_agent_rag import SimplifiedMultiAgentRAGSystem
+    
+    return SimplifiedMultiAgentRAGSystem(
+        ollama_model=settings.ollama_model,
+        rag_context_path=RAG_CONTEXT_PATH,
+        ollama_base_url=settings.ollama_base_url,
+        answer_cache=answer_cache,
+        specialist_timeout=settings.rag_specialist_timeout_seconds,
+        fanout_workers=settings.rag_fanout_workers,
+        query_router=QueryRouter.from_file(settings.query_routes_path),
+        conversation_store=conversation_store,
+        keep_alive=settings.ollama_keep_alive,
+        pdf_index_cache_dir=settings.pdf_index_cache_dir
+    )
+
+
+# Built on first use or by the warm-up started after the server is listening
+rag_system: LazyResource["SimplifiedMultiAgentRAGSystem"] = LazyResource(_build_rag_system, "rag_system")
+RAG_SYSTEM_LOAD_SECONDS.set_function(lambda: rag_system.status()["load_seconds"] or 0.0)
+
+
+async def get_rag_system() -> "SimplifiedMultiAgentRAGSystem":
+    """The RAG system, building it off the event loop if this is the first use"""
+    system = rag_system.peek()
+    if system is None:
+        system = await asyncio.to_thread(rag_system.get)
+    return system
+
+# Probes read cached results so they never trigger an LLM generation
+health_probe = OllamaHealthProbe(
+    base_url=settings.ollama_base_url,
+    model=settings.ollama_model,
+    ttl=settings.health_ping_ttl_seconds,
+    keep_alive=settings.ollama_keep_alive
+)
+_deep_check_task: Optional[asyncio.Task] = None
+_ollama_warm_up_task: Optional[asyncio.Task] = None
+
+# The RAG pipeline blocks (pandas searches, Ollama HTTP calls), so it runs on a
+# dedicated, size-limited pool instead of the event loop
+rag_executor = BoundedExecutor(
+    max_workers=settings.rag_max_concurrency,
+    max_queue_size=settings.rag_max_queue_size,
+    name="rag",
+    on_wait=RAG_EXECUTOR_WAIT_SECONDS.observe,
+    on_reject=RAG_EXECUTOR_REJECTED.inc
+)
+RAG_EXECUTOR_QUEUED.set_function(lambda: rag_executor.stats()["queued"])
+RAG_EXECUTOR_ACTIVE.set_function(lambda: rag_executor.stats()["active"])
 
 class MultiAgentChatRequest(BaseModel):
     message: str
@@ -23,6 +133,12 @@ class MultiAgentChatResponse(BaseModel):
     session_id: str
     agent_used: Optional[str] = None
     query_analysis: Optional[dict] = None
+    sources: Optional[List[str]] = None
+    timings: Optional[Dict[str, float]] = None
+    answer_path: Optional[str] = None
+    cache_hit: Optional[str] = None
+    coalesced: bool = False
+    prompt_tokens: Optional[Dict[str, int]] = None
 
 @router.post("/multi-agent", response_model=MultiAgentChatResponse)
 async def multi_agent_chat(request: MultiAgentChatRequest):
@@ -38,33 +154,66 @@ async def multi_agent_chat(request: MultiAgentChatRequest):
         logger.info(f"Processing multi-agent query: {request.message}")
         
         # Use the multi-agent RAG system
-        response = rag_system.chat(request.message, request.session_id)
-        
-        # Get query analysis for debugging/transparency
-        query_analysis = rag_system.analyze_query_type(request.message)
-        
-        # Determine which agent was primarily used based on analysis
-        agent_used = None
-        if query_analysis.get('requires_projects'):
-            agent_used = "Projects & Employee Data Specialist"
-        elif query_analysis.get('requires_policy'):
-            agent_used = "Policy & Procedures Specialist"
-        elif query_analysis.get('requires_org'):
-            agent_used = "Organizational Data Analyst"
-        else:
-            agent_used = "Knowledge Synthesis Manager"
+        system = await get_rag_system()
+        result = await rag_executor.run(system.chat, request.message, request.session_id)
         
         return MultiAgentChatResponse(
-            response=response,
-            session_id=request.session_id,
-            agent_used=agent_used,
-            query_analysis=query_analysis
+            response=result.response,
+            session_id=result.session_id,
+            agent_used=result.agent_used,
+            query_analysis=result.query_analysis,
+            sources=result.sources,
+            timings=result.timings,
+            answer_path=result.answer_path,
+            cache_hit=result.cache_hit,
+            coalesced=result.coalesced,
+            prompt_tokens=result.prompt_tokens
         )
         
+    except ExecutorSaturatedError as e:
+        logger.warning(f"Rejecting multi-agent chat: {str(e)}")
+        raise HTTPException(status_code=503, detail="Chat service is busy, please retry shortly")
     except Exception as e:
         logger.error(f"Error in multi-agent chat: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Multi-agent RAG error: {str(e)}")
 
+@router.post("/multi-agent/stream")
+async def multi_agent_chat_stream(request: MultiAgentChatRequest):
+    """
+    Streaming variant of the multi-agent chat endpoint.
+    
+    Responds with newline-delimited JSON frames: the routing decision and
+    retrieved sources first, then LLM tokens as they are generated, and a
+    final ``done`` frame with the session id and timing.
+    """
+    if not request.session_id:
+        request.session_id = str(uuid.uuid4())
+    
+    logger.info(f"Processing streaming multi-agent query: {request.message}")
+    
+    try:
+        system = await get_rag_system()
+        stream = rag_executor.stream(system.stream_chat, request.message, request.session_id)
+        # Reserve the worker slot before the response starts so overload is a 503
+        first_frame = await stream.__anext__()
+    except ExecutorSaturatedError as e:
+        logger.warning(f"Rejecting streaming multi-agent chat: {str(e)}")
+        raise HTTPException(status_code=503, detail="Chat service is busy, please retry shortly")
+    except Exception as e:
+        logger.error(f"Error in streaming multi-agent chat: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Multi-agent RAG error: {str(e)}")
+
+    async def frames() -> AsyncIterator[str]:
+        yield json.dumps(first_frame) + "\n"
+        async for frame in stream:
+            yield json.dumps(frame) + "\n"
+    
+    return StreamingResponse(
+        frames(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.post("/", response_model=ChatResponse)
 async def chat(request: ChatRequest, db=Depends(get_db_connection)):
     """
@@ -84,6 +233,8 @@ async def chat(request: ChatRequest, db=Depends(get_db_connection)):
             session_id=result.session_id
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error in chat: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Chat error: {str(e)}")
@@ -94,7 +245,8 @@ async def get_chat_history(session_id: str):
     Get conversation history for a session
     """
     try:
-        history = rag_system.get_conversation_history(session_id)
+        # Straight from the store, so reading history never loads the RAG system
+        history = await asyncio.to_thread(conversation_store.history, session_id)
         return {"session_id": session_id, "history": history}
     except Exception as e:
         logger.error(f"Error getting chat history: {str(e)}")
@@ -106,24 +258,94 @@ async def clear_chat_session(session_id: str):
     Clear conversation history for a session
     """
     try:
-        rag_system.clear_conversation(session_id)
+        await asyncio.to_thread(conversation_store.clear, session_id)
         return {"message": f"Session {session_id} cleared successfully"}
     except Exception as e:
         logger.error(f"Error clearing chat session: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Session clear error: {str(e)}")
 
+@router.get("/sessions")
+async def session_stats():
+    """
+    Conversation store type, live session count and eviction statistics
+    """
+    return await asyncio.to_thread(conversation_store.stats)
+
+@router.get("/queue")
+async def queue_stats():
+    """
+    Concurrency, queue depth and wait-time statistics for the RAG executor
+    """
+    return rag_executor.stats()
+
+async def _readiness() -> dict:
+    """Collect readiness checks without running a chat turn"""
+    system = rag_system.peek()
+    if system is None:
+        # Not ready until loaded; make sure a load is under way
+        rag_system.warm_up()
+        data_sources = {}
+    else:
+        data_sources = system.data_status()
+    ollama = await asyncio.to_thread(health_probe.ping)
+    ready = system is not None and all(data_sources.values()) and ollama.get("reachable", False)
+    
+    checks = {"rag_system": rag_system.status(), "data_sources": data_sources, "ollama": ollama}
+    if health_probe.last_deep_check is not None:
+        checks["deep_check"] = health_probe.last_deep_check
+    if health_probe.last_warm_up is not None:
+        checks["warm_up"] = health_probe.last_warm_up
+    
+    return {"ready": ready, "checks": checks}
+
+@router.get("/cache")
+async def cache_stats():
+    """
+    Answer cache size, hit rate and eviction statistics
+    """
+    if answer_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **answer_cache.stats()}
+
+@router.get("/cache/embeddings")
+async def embedding_cache_stats():
+    """
+    Embedding cache hit/miss counts by tier (memory, disk)
+    """
+    cache = default_embedding_cache()
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+@router.get("/health/live")
+async def liveness():
+    """
+    Liveness probe: the process is up and the event loop is responsive
+    """
+    return {"status": "alive"}
+
+@router.get("/health/ready")
+async def readiness(response: Response):
+    """
+    Readiness probe: data sources are loaded and Ollama is reachable.
+    Returns 503 when not ready so load balancers stop routing traffic here.
+    """
+    result = await _readiness()
+    if not result["ready"]:
+        response.status_code = 503
+    return {"status": "ready" if result["ready"] else "not_ready", **result["checks"]}
+
 @router.get("/health")
 async def health_check():
     """
     Health check endpoint for the multi-agent RAG system
     """
     try:
-        # Simple test query to verify system is working
-        test_response = rag_system.chat("Hello", "health_check")
+        result = await _readiness()
         return {
-            "status": "healthy",
-            "multi_agent_rag": "operational",
-            "test_response_length": len(test_response)
+            "status": "healthy" if result["ready"] else "unhealthy",
+            "multi_agent_rag": "operational" if result["ready"] else "degraded",
+            **result["checks"]
         }
     except Exception as e:
         logger.error(f"Health check failed: {str(e)}")
@@ -131,3 +353,26 @@ async def health_check():
             "status": "unhealthy", 
             "error": str(e)
         }
+
+async def startup():
+    """Start background tasks for the chat subsystem"""
+    global _deep_check_task, _ollama_warm_up_task
+    if settings.ollama_warmup_on_startup:
+        # Loads the model and primes the prompt cache with the static instructions
+        _ollama_warm_up_task = asyncio.create_task(asyncio.to_thread(health_probe.warm_up, SYNTHESIS_INSTRUCTIONS))
+    if settings.rag_warmup_on_startup:
+        # Runs on its own thread, so the server starts listening right away
+        rag_system.warm_up()
+    if settings.health_deep_check_interval_seconds > 0:
+        _deep_check_task = asyncio.create_task(
+            health_probe.run_deep_checks(settings.health_deep_check_interval_seconds)
+        )
+
+async def shutdown():
+    """Stop background tasks and release the RAG worker pool"""
+    tasks = [task for task in (_ollama_warm_up_task, _deep_check_task) if task is not None]
+    for task in tasks:
+        task.cancel()
+    # The warm-up thread cannot be interrupted; cancelling only stops waiting for it
+    await asyncio.gather(*tasks, return_exceptions=True)
+    rag_executor.shutdown(wait=False)
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+BM25 index build time and query latency over synthetic project-assignment rows.
+Before timing it checks that source-filtered searches still find records
+through common terms when the query's rare terms only occur in other sources.
+
+    uv run python benchmarks/bench_bm25_index.py [records]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from app.rag.bm25_index import BM25Index, SearchRecord
+from app.rag.search_records import project_records
+
+FIRST_NAMES = ["Charles", "Linda", "Richard", "Michelle", "Sarah", "Michael", "Emily", "David", "Patricia", "James"]
+LAST_NAMES = ["Jones", "Thomas", "Hernandez", "Johnson", "Brown", "Davis", "Wilson", "Moore", "Taylor", "Anderson"]
+PROJECTS = ["Phoenix", "Atlas", "Orion", "Nebula", "Titan", "Aurora", "Zenith", "Horizon", "Apex", "Vertex"]
+DEPARTMENTS = ["Engineering", "Finance", "Marketing", "Sales", "Operations", "IT Support", "Legal", "Human Resources"]
+ROLES = ["Lead", "Contributor", "Reviewer", "Advisor"]
+
+QUERIES = [
+    "Which projects is Charles Jones working on?",
+    "Who leads Project Phoenix in Engineering?",
+    "legal department reviewers",
+    "EMP04242",
+    "project atlas contributors in sales and marketing",
+]
+
+
+def synthetic_projects(rows: int) -> pd.DataFrame:
+    rng = random.Random(42)
+    data = []
+    for i in range(rows):
+        employee = i // 3
+        data.append({
+            "employee_id": f"EMP{employee:05d}",
+            "employee_name": f"{FIRST_NAMES[employee % 10]} {LAST_NAMES[(employee // 10) % 10]}",
+            "project_id": f"PROJ{rng.randrange(5000):04d}",
+            "project_name": f"Project {rng.choice(PROJECTS)}",
+            "role_in_project": rng.choice(ROLES),
+            "start_date": f"202{rng.randrange(5)}-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}",
+            "department": rng.choice(DEPARTMENTS),
+        })
+    return pd.DataFrame(data)
+
+
+def check_source_filter():
+    """A rare term found only in another source must not hide the filtered source's matches"""
+    records = [SearchRecord("projects", f"row {i}", {"body": f"project {name} assignment"}) for i, name in enumerate(PROJECTS)]
+    records.append(SearchRecord("policy", "leave policy", {"title": "Sabbatical leave", "body": "sabbatical leave policy"}))
+    index = BM25Index(records)
+    hits = index.search("sabbatical project assignment", top_k=3, sources=["projects"])
+    assert len(hits) == 3 and all(hit.record.source == "projects" for hit in hits), hits
+    hits = index.search("sabbatical project assignment", top_k=3)
+    assert hits[0].record.source == "policy", hits
+    assert index.search("sabbatical", sources=["projects"]) == []
+
+
+def main():
+    check_source_filter()
+
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    records = project_records(synthetic_projects(rows))
+
+    started = time.perf_counter()
+    index = BM25Index(records)
+    print(f"built index over {len(index)} records in {time.perf_counter() - started:.2f} s")
+
+    for query in QUERIES:
+        index.search(query)  # warm up
+        samples = []
+        for _ in range(200):
+            started = time.perf_counter()
+            index.search(query, top_k=5)
+            samples.append((time.perf_counter() - started) * 1000)
+        p50, p99 = np.percentile(samples, [50, 99])
+        print(f"{query[:48]:<50} p50 {p50:6.3f} ms  p99 {p99:6.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
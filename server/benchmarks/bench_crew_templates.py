@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Per-request crew setup overhead: rebuilding Task/Crew objects vs reusing templates.
+
+Only setup is measured (no LLM calls), so no Ollama server is needed:
+    uv run python benchmarks/bench_crew_templates.py [iterations]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("OPENAI_API_KEY", "dummy-key-for-ollama")
+os.environ.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+os.environ.setdefault("OTEL_SDK_DISABLED", "true")
+
+from crewai import Agent, Task, Crew, Process
+
+from app.rag.crew_templates import CrewTemplate
+
+LLM = "ollama/llama3.2:1b"
+SPECIALISTS = ["projects", "policy", "organization"]
+DESCRIPTION = """
+Analyze the user's query: "{message}"
+
+{context}
+
+Provide specific data and insights based on your search results.
+"""
+
+
+def make_agents():
+    return {
+        name: Agent(role=f"{name} specialist", goal="Answer questions", backstory="Expert.", llm=LLM, verbose=False)
+        for name in SPECIALISTS + ["synthesis"]
+    }
+
+
+def rebuild_per_request(agents, message, context):
+    """What MultiAgentRAGSystem.chat used to do on every message"""
+    tasks = [
+        Task(
+            description=DESCRIPTION.replace("{message}", message).replace("{context}", context),
+            agent=agents[name],
+            expected_output="Findings"
+        )
+        for name in SPECIALISTS
+    ]
+    tasks.append(Task(
+        description=DESCRIPTION.replace("{message}", message).replace("{context}", context),
+        agent=agents["synthesis"],
+        expected_output="Answer",
+        context=list(tasks)
+    ))
+    return Crew(agents=list(agents.values()), tasks=tasks, process=Process.sequential, verbose=False)
+
+
+def build_templates(agents):
+    def builder(name):
+        def build():
+            task = Task(description=DESCRIPTION, agent=agents[name], expected_output="Findings")
+            return Crew(agents=[agents[name]], tasks=[task], process=Process.sequential, verbose=False)
+        return build
+    return {name: CrewTemplate(name, builder(name)) for name in SPECIALISTS + ["synthesis"]}
+
+
+def reuse_templates(templates, message, context):
+    """Per-request work with templates: check out each crew and fill in its task inputs"""
+    inputs = {"message": message, "context": context}
+    for template in templates.values():
+        with template.checkout() as crew:
+            for task in crew.tasks:
+                task.interpolate_inputs_and_add_conversation_history(inputs)
+
+
+def bench(label, fn, iterations):
+    fn()  # warm up
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    per_call = (time.perf_counter() - started) / iterations
+    print(f"{label:<32} {per_call * 1000:8.3f} ms/request")
+    return per_call
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    agents = make_agents()
+
+    started = time.perf_counter()
+    templates = build_templates(agents)
+    print(f"{'template build (once at startup)':<32} {(time.perf_counter() - started) * 1000:8.3f} ms")
+
+    message = "Which engineers are leading projects and what is the remote work policy?"
+    context = "Recent conversation:\nuser: hello\nassistant: Hi! How can I help?\n"
+
+    before = bench("rebuild Task/Crew per request", lambda: rebuild_per_request(agents, message, context), iterations)
+    after = bench("reuse crew templates", lambda: reuse_templates(templates, message, context), iterations)
+    print(f"speedup: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
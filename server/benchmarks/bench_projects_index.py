@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Structured project queries as the table grows: indexed lookups versus the
+pandas boolean-mask scans they replaced. Before timing it checks that
+qualified questions ("... who know React", "... are active") fall through
+to the LLM instead of being answered by a broader template.
+
+    uv run python benchmarks/bench_projects_index.py [max_rows]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from app.rag.structured_answers import StructuredAnswerEngine
+
+FIRST_NAMES = ["Charles", "Linda", "Richard", "Michelle", "Sarah", "Michael", "Emily", "David", "Patricia", "James"]
+LAST_NAMES = ["Jones", "Thomas", "Hernandez", "Johnson", "Brown", "Davis", "Wilson", "Moore", "Taylor", "Anderson"]
+PROJECTS = ["Phoenix", "Atlas", "Orion", "Nebula", "Titan", "Aurora", "Zenith", "Horizon", "Apex", "Vertex"]
+DEPARTMENTS = ["Engineering", "Finance", "Marketing", "Sales", "Operations", "IT Support", "Legal", "Human Resources"]
+ROLES = ["Lead", "Contributor", "Reviewer", "Advisor"]
+
+QUERIES = [
+    "How many employees work in Engineering?",
+    "How many projects are in Legal?",
+    "What projects is EMP0042 working on?",
+    "Which projects is Sarah Moore 3 assigned to?",
+]
+
+
+def synthetic_projects(rows: int) -> pd.DataFrame:
+    rng = random.Random(42)
+    employees = np.arange(rows) // 3
+    return pd.DataFrame({
+        "employee_id": [f"EMP{employee:04d}" for employee in employees],
+        # Unique names, so a name lookup returns one employee's rows at any size
+        "employee_name": [f"{FIRST_NAMES[e % 10]} {LAST_NAMES[(e // 10) % 10]} {e // 100}" for e in employees],
+        "project_id": [f"PROJ{rng.randrange(5000):04d}" for _ in range(rows)],
+        "project_name": [f"Project {rng.choice(PROJECTS)}" for _ in range(rows)],
+        "role_in_project": [rng.choice(ROLES) for _ in range(rows)],
+        "start_date": [f"202{rng.randrange(5)}-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}" for _ in range(rows)],
+        "department": [DEPARTMENTS[e % len(DEPARTMENTS)] for e in employees],
+    })
+
+
+def scan(frame: pd.DataFrame, query: str):
+    """The pre-index implementation of the same intents, for comparison"""
+    if "employees work in" in query:
+        return frame[frame["department"].str.lower().str.contains("engineering")]["employee_id"].nunique()
+    if "projects are in" in query:
+        return frame[frame["department"].str.lower().str.contains("legal")]["project_id"].nunique()
+    column, value = ("employee_id", "EMP0042") if "EMP" in query else ("employee_name", "Sarah Moore 3")
+    rows = frame[frame[column] == value]
+    return [f"{row['project_name']} ({row['project_id']})" for _, row in rows.iterrows()]
+
+
+def measure(fn, repeats: int) -> float:
+    fn()  # warm up
+    samples = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return float(np.percentile(samples, 50))
+
+
+# Questions with a condition the templates cannot apply must fall through to the LLM
+QUALIFIED = [
+    "List employees in Mumbai who know React",
+    "Which employees are senior engineers in Engineering?",
+    "How many projects are active?",
+    "Total projects by department",
+    "How many projects does Charles Jones 0 lead?",
+    "How many employees in Engineering are remote?",
+]
+ANSWERED = {
+    "List employees in Mumbai": "list_location_employees",
+    "Which employees work in Engineering?": "list_department_employees",
+    "How many projects are there?": "count_projects",
+    "What projects is Charles Jones 0 working on?": "employee_lookup",
+    "Who manages Charles Jones 0?": "employee_manager",
+}
+
+
+def check_phrasings():
+    """Templates answer only the phrasings they were written for"""
+    org = {"employees": [
+        {"employee_id": "EMP0000", "first_name": "Charles", "last_name": "Jones 0", "location": "Mumbai",
+         "department": "Engineering", "manager_id": "EMP0001"},
+        {"employee_id": "EMP0001", "first_name": "Linda", "last_name": "Jones 0", "location": "Mumbai",
+         "department": "Engineering", "manager_id": None},
+    ]}
+    engine = StructuredAnswerEngine(synthetic_projects(300), org)
+    for query in QUALIFIED:
+        answer = engine.answer(query)
+        assert answer is None, (query, answer)
+    for query, intent in ANSWERED.items():
+        answer = engine.answer(query)
+        assert answer is not None and answer.intent == intent, (query, answer)
+
+
+def main():
+    check_phrasings()
+    max_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    sizes = [size for size in (10_000, 100_000, 1_000_000) if size <= max_rows] or [max_rows]
+
+    for rows in sizes:
+        frame = synthetic_projects(rows)
+        started = time.perf_counter()
+        engine = StructuredAnswerEngine(frame, None)
+        print(f"\n{rows:>9,} rows: index built in {time.perf_counter() - started:.2f} s (p50 latency, ms)")
+        for query in QUERIES:
+            assert engine.answer(query) is not None, query
+            indexed = measure(lambda: engine.answer(query), 200)
+            scanned = measure(lambda: scan(frame, query), 3 if rows >= 1_000_000 else 10)
+            print(f"  {query:<46} indexed {indexed:8.3f}   scan {scanned:9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Cold-start profile: import time of the app, by package and by module, and
+whether the heavy RAG dependencies stay out of it; optionally the time to
+build the RAG system afterwards.
+
+Each measurement runs in a fresh interpreter (``python -X importtime``), so
+nothing is cached between runs. Add ``--json`` to get a machine-readable
+report for tracking cold start as dependencies change:
+    uv run python benchmarks/bench_startup.py [--top 15] [--build] [--json]
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Must not be imported until the RAG system is built
+HEAVY_MODULES = ["crewai", "crewai_tools", "langchain", "langchain_community", "pandas", "chromadb"]
+
+_IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _env():
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "dummy-key-for-ollama")
+    env.setdefault("CREWAI_DISABLE_TELEMETRY", "true")
+    env.setdefault("OTEL_SDK_DISABLED", "true")
+    # Warm-up would start building the RAG system while we measure the import
+    env.setdefault("RAG_WARMUP_ON_STARTUP", "false")
+    return env
+
+
+def _run(code, *flags):
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code], cwd=SERVER_DIR, env=_env(), capture_output=True, text=True
+    )
+
+
+def import_profile(module):
+    """Per-module (self, cumulative) microseconds from ``-X importtime``"""
+    result = _run(f"import {module}", "-X", "importtime")
+    if result.returncode != 0:
+        sys.exit(f"import {module} failed:\n{result.stderr[-2000:]}")
+    modules = []
+    for line in result.stderr.splitlines():
+        match = _IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return modules
+
+
+def heavy_modules_loaded(module):
+    code = (
+        f"import json, sys; import {module}; "
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    result = _run(code)
+    return json.loads(result.stdout.strip().splitlines()[-1]) if result.returncode == 0 else None
+
+
+def rag_build_seconds():
+    code = (
+        "import time; from app.routes import chat_routes; started = time.perf_counter(); "
+        "chat_routes.rag_system.get(); print(time.perf_counter() - started)"
+    )
+    result = _run(code)
+    if result.returncode != 0:
+        return None
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def build_report(module, top, build):
+    modules = import_profile(module)
+    by_package = defaultdict(int)
+    for name, self_us, _, _ in modules:
+        by_package[name.split(".")[0]] += self_us
+    total_us = sum(self_us for _, self_us, _, _ in modules)
+
+    report = {
+        "module": module,
+        "python": sys.version.split()[0],
+        "import_seconds": round(total_us / 1e6, 3),
+        "modules_imported": len(modules),
+        "packages": [
+            {"package": package, "seconds": round(us / 1e6, 3)}
+            for package, us in sorted(by_package.items(), key=lambda item: -item[1])[:top]
+        ],
+        "modules": [
+            {"module": name, "cumulative_seconds": round(cumulative / 1e6, 3), "self_seconds": round(self_us / 1e6, 3)}
+            for name, self_us, cumulative, _ in sorted(modules, key=lambda item: -item[2])[:top]
+        ],
+        "heavy_modules_loaded": heavy_modules_loaded(module),
+    }
+    if build:
+        report["rag_build_seconds"] = rag_build_seconds()
+    return report
+
+
+def print_report(report):
+    print(f"import {report['module']}: {report['import_seconds']:.2f} s, "
+          f"{report['modules_imported']} modules (Python {report['python']})")
+    heavy = report["heavy_modules_loaded"]
+    print(f"heavy RAG dependencies imported at startup: {', '.join(heavy) if heavy else 'none'}")
+    if "rag_build_seconds" in report:
+        seconds = report["rag_build_seconds"]
+        print(f"RAG system build (first chat or warm-up): {f'{seconds:.2f} s' if seconds is not None else 'failed'}")
+
+    print("\nself time by top-level package (s)")
+    for row in report["packages"]:
+        print(f"  {row['package']:<32} {row['seconds']:7.3f}")
+    print("\nslowest modules, cumulative (s)")
+    for row in report["modules"]:
+        print(f"  {row['module']:<48} {row['cumulative_seconds']:7.3f}  (self {row['self_seconds']:.3f})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="main", help="module to import (default: main)")
+    parser.add_argument("--top", type=int, default=15, help="rows per table")
+    parser.add_argument("--build", action="store_true", help="also time building the RAG system")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = build_report(args.module, args.top, args.build)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
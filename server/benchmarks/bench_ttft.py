@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Time to first token against a running Ollama server, with and without the
+warm-up, keep_alive and static-prefix-first prompt changes.
+
+Scenarios, each run from a freshly unloaded model:
+  cold          first request after the model was unloaded (no warm-up)
+  warmed        first request after warm_up() loaded the model and primed the prefix
+  legacy_layout a session of questions with the old template (question before instructions)
+  prefix_first  the same session with the current template (instructions first)
+
+Per request it reports TTFT and how many prompt tokens Ollama had to evaluate;
+with the prefix reused that count drops to the part after the shared prefix.
+    uv run python benchmarks/bench_ttft.py [--model llama3.2:1b] [--questions 6] [--json]
+"""
+
+import argparse
+import csv
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from app.core.config import settings
+from app.rag.health import OllamaHealthProbe
+from app.rag.prompts import SYNTHESIS_INSTRUCTIONS, synthesis_prompt
+
+POLICIES_CSV = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "RAG_context", "policies.csv")
+
+QUESTIONS = [
+    "How many vacation days do I get after two years?",
+    "Can I work remotely on Fridays?",
+    "What is the process for reporting harassment?",
+    "Who approves expense reports over the limit?",
+    "How does the performance review cycle work?",
+    "What happens if I violate the code of conduct?",
+    "Is there a budget for professional training?",
+    "How much notice do I need to give before leave?",
+]
+
+
+def legacy_prompt(message, context):
+    """The synthesis template before the prefix-first restructuring"""
+    return f"""
+Based on the following company data, provide a clear and specific answer to this question: {message}
+
+Available Company Data:
+{context}
+
+Instructions:
+- Give a direct, helpful answer based only on the provided data
+- Include specific numbers, names, dates, and details when available
+- If the question asks for counts or statistics, provide exact numbers
+- Be conversational and helpful, not just a data dump
+- If the data doesn't fully answer the question, acknowledge what information is available
+
+Answer:"""
+
+
+def contexts(count):
+    """Different policy rows per question, as retrieval would return"""
+    with open(POLICIES_CSV, newline="", encoding="utf-8") as f:
+        rows = [" | ".join(f"{key}: {value}" for key, value in row.items()) for row in csv.DictReader(f)]
+    return ["Policy Data:\n" + "\n".join(rows[(i + offset) % len(rows)] for offset in range(2)) for i in range(count)]
+
+
+def unload(base_url, model):
+    requests.post(f"{base_url}/api/generate", json={"model": model, "keep_alive": 0}, timeout=60).raise_for_status()
+    time.sleep(1.0)
+
+
+def stream_ttft(base_url, model, prompt, keep_alive, num_predict=16):
+    """Seconds to the first generated token, and the final stats Ollama reports"""
+    payload = {"model": model, "prompt": prompt, "stream": True, "options": {"num_predict": num_predict}}
+    if keep_alive is not None:
+        payload["keep_alive"] = keep_alive
+    started = time.perf_counter()
+    first = None
+    final = {}
+    with requests.post(f"{base_url}/api/generate", json=payload, stream=True, timeout=300) as response:
+        response.raise_for_status()
+        for line in response.iter_lines():
+            if not line:
+                continue
+            chunk = json.loads(line)
+            if first is None and chunk.get("response"):
+                first = time.perf_counter() - started
+            if chunk.get("done"):
+                final = chunk
+    return {
+        "ttft_ms": round((first if first is not None else time.perf_counter() - started) * 1000, 1),
+        "prompt_eval_tokens": final.get("prompt_eval_count"),
+        "load_ms": round(final.get("load_duration", 0) / 1e6, 1),
+    }
+
+
+def session(base_url, model, template, questions, keep_alive):
+    return [stream_ttft(base_url, model, template(question, context), keep_alive) for question, context in questions]
+
+
+def summarize(name, runs):
+    ttfts = [run["ttft_ms"] for run in runs]
+    tokens = [run["prompt_eval_tokens"] or 0 for run in runs]
+    return {
+        "scenario": name,
+        "requests": len(runs),
+        "first_ttft_ms": ttfts[0],
+        "median_ttft_ms": round(statistics.median(ttfts), 1),
+        "median_prompt_eval_tokens": statistics.median(tokens),
+        "runs": runs,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time to first token with and without warm-up and prefix reuse")
+    parser.add_argument("--base-url", default=settings.ollama_base_url)
+    parser.add_argument("--model", default=settings.ollama_model)
+    parser.add_argument("--keep-alive", default=settings.ollama_keep_alive)
+    parser.add_argument("--questions", type=int, default=6)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    try:
+        requests.get(f"{args.base_url}/api/tags", timeout=2).raise_for_status()
+    except Exception as e:
+        sys.exit(f"Ollama is not reachable at {args.base_url}: {e}")
+
+    count = min(args.questions, len(QUESTIONS))
+    questions = list(zip(QUESTIONS[:count], contexts(count)))
+    probe = OllamaHealthProbe(args.base_url, args.model, keep_alive=args.keep_alive)
+    results = []
+
+    unload(args.base_url, args.model)
+    results.append(summarize("cold", session(args.base_url, args.model, synthesis_prompt, questions[:1], None)))
+
+    unload(args.base_url, args.model)
+    probe.warm_up(SYNTHESIS_INSTRUCTIONS)
+    results.append(summarize("warmed", session(args.base_url, args.model, synthesis_prompt, questions[:1], args.keep_alive)))
+
+    for name, template in (("legacy_layout", legacy_prompt), ("prefix_first", synthesis_prompt)):
+        unload(args.base_url, args.model)
+        probe.warm_up()
+        results.append(summarize(name, session(args.base_url, args.model, template, questions, args.keep_alive)))
+
+    if args.json:
+        print(json.dumps({"model": args.model, "keep_alive": args.keep_alive, "scenarios": results}, indent=2))
+        return
+    print(f"model {args.model}, keep_alive {args.keep_alive}")
+    print(f"{'scenario':<14} {'requests':>8} {'first TTFT ms':>14} {'median TTFT ms':>15} {'median prompt tokens':>21}")
+    for result in results:
+        print(
+            f"{result['scenario']:<14} {result['requests']:>8} {result['first_ttft_ms']:>14.1f} "
+            f"{result['median_ttft_ms']:>15.1f} {result['median_prompt_eval_tokens']:>21}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,25 @@
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from app.routes import auth, users, chat_routes
 from app.core.config import settings
+from app.core.metrics import registry, HTTP_REQUEST_SECONDS, CONTENT_TYPE_LATEST
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await chat_routes.startup()
+    yield
+    await chat_routes.shutdown()
+
 
 app = FastAPI(
     title=settings.app_name,
     description="Authentication API with PostgreSQL backend and Multi-Agent RAG",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -18,6 +31,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template rather than raw path to keep cardinality bounded
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=str(status)
+        )
+
+
 # Include routers
 app.include_router(auth.router)
 app.include_router(users.router)
@@ -34,6 +67,12 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return Response(content=registry.render(), media_type=CONTENT_TYPE_LATEST)
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(